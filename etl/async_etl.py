@@ -0,0 +1,162 @@
+import asyncio
+from contextlib import nullcontext
+from functools import partial
+from typing import Optional
+
+from async_load import AsyncElasticsearchLoader
+from async_psql_extractor import AsyncPostgresExtractor
+from configs import es_config, loguru_config, pg_config, settings_config
+from indexes import ALL_INDEXES
+from loguru import logger
+from main import ETL, INITIAL_CHECKPOINT
+from pipeline import AsyncETLPipeline
+from sql_queries import (
+    ALL_BY_IDS_SQL_QUERIES,
+    ALL_COUNT_QUERIES,
+    ALL_SQL_QUERIES,
+    MOVIE_RELATED_SQL_QUERIES,
+)
+
+logger.add(**loguru_config)
+
+
+class AsyncETL:
+    """
+    A class that runs the polling ETL process on asyncio: all indexes are updated
+    concurrently on one event loop with asyncpg and AsyncElasticsearch. Checkpoints, the
+    transform, skipping of unchanged documents and the pass summary are those of ETL.
+    """
+
+    def __init__(self, etl: Optional[ETL] = None):
+        self.etl = etl or ETL()
+        self.psql = AsyncPostgresExtractor(
+            dsn=pg_config.url,
+            all_queries=ALL_SQL_QUERIES,
+            count_queries=ALL_COUNT_QUERIES,
+            related_queries=MOVIE_RELATED_SQL_QUERIES,
+            by_ids_queries=ALL_BY_IDS_SQL_QUERIES,
+        )
+        self.es = AsyncElasticsearchLoader(
+            es_url=es_config.url, sync_loader=self.etl.es
+        )
+
+    async def save_chunk(
+        self,
+        index_name: str,
+        state_key: str,
+        checkpoint: Optional[dict],
+        documents: list,
+    ) -> None:
+        """
+        Loads transformed documents to Elasticsearch and advances the checkpoint, if any.
+        """
+
+        documents, hashes = self.etl.filter_chunk(index_name, checkpoint, documents)
+        if documents:
+            await self.es.load_movies_data(documents, index_name)
+        self.etl.commit_chunk(index_name, state_key, checkpoint, hashes)
+
+    async def is_large_load(self, index_name: str, checkpoint: dict) -> bool:
+        if settings_config.BULK_LOAD_FORCE:
+            return True
+        if not settings_config.BULK_LOAD_THRESHOLD:
+            return False
+        pending = await self.psql.count_rows(checkpoint, index_name)
+        return pending >= settings_config.BULK_LOAD_THRESHOLD
+
+    def create_pipeline(self, index_name: str, state_key: str) -> AsyncETLPipeline:
+        return AsyncETLPipeline(
+            transform=partial(
+                self.etl.transform.transform_movies_data, index_name=index_name
+            ),
+            load=partial(self.save_chunk, index_name, state_key),
+            name=index_name,
+        )
+
+    async def load_all_data(self, index_name: str) -> None:
+        """
+        Load data from Postgres to Elasticsearch.
+        """
+
+        pipeline = self.create_pipeline(index_name, f'{index_name}_checkpoint')
+        checkpoint = self.etl.get_checkpoint(index_name)
+        bulk_load_mode = (
+            self.es.bulk_load_mode(
+                index_name, force_merge=settings_config.BULK_LOAD_FORCE_MERGE
+            )
+            if await self.is_large_load(index_name, checkpoint)
+            else nullcontext()
+        )
+        async with bulk_load_mode:
+            count = await pipeline.run(
+                self.psql.get_movies_data(checkpoint, index_name)
+            )
+        logger.info('Successfully transferred {} documents to Elasticsearch.', count)
+
+    async def propagate_related_updates(self, related_index: str) -> None:
+        """
+        Reloads movies whose denormalized persons or genres changed since the last pass.
+        """
+
+        state_key = f'movies_{related_index}_checkpoint'
+        checkpoint = self.etl.state.get_state(state_key)
+        if not checkpoint:
+            self.etl.state.set_state(
+                state_key,
+                await self.psql.get_latest_checkpoint(related_index)
+                or INITIAL_CHECKPOINT,
+            )
+            return
+
+        pipeline = self.create_pipeline('movies', state_key)
+        count = await pipeline.run(
+            self.psql.get_related_movies_data(checkpoint, related_index)
+        )
+        logger.info(
+            'Reloaded {} movies affected by changes in "{}".', count, related_index
+        )
+
+    async def update_index(self, index_name: str) -> None:
+        if self.etl.is_paused(index_name):
+            return
+        self.etl.summary.start(index_name)
+        try:
+            if index_name == 'movies':
+                for related_index in MOVIE_RELATED_SQL_QUERIES:
+                    await self.propagate_related_updates(related_index)
+            await self.load_all_data(index_name)
+        finally:
+            self.etl.summary.finish(index_name)
+
+    async def run_pass(self) -> None:
+        """
+        Runs one incremental pass over all indexes concurrently.
+        """
+
+        self.etl.state.refresh()
+        for index_name in ALL_INDEXES:
+            if await self.es.create_index(index_name):
+                self.etl.hash_store.clear(index_name)
+        self.etl.summary.reset()
+        try:
+            async with asyncio.TaskGroup() as group:
+                for index_name in ALL_INDEXES:
+                    group.create_task(self.update_index(index_name))
+        finally:
+            self.etl.state.flush()
+            self.etl.summary.log()
+            self.etl.export_metrics()
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.psql.connect_to_postgres()
+                await self.es.connect_to_elastic()
+                await self.run_pass()
+            except Exception as e:
+                logger.error('An error occurred during ETL process. Error: {}.', e)
+            finally:
+                self.etl.state.flush()
+                await self.psql.close()
+                await self.es.close()
+                await asyncio.sleep(settings_config.FREQUENCY)
@@ -0,0 +1,121 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Union
+
+from backoff import expo, on_exception
+from configs import loguru_config, settings_config
+from elasticsearch import AsyncElasticsearch, ConnectionTimeout, TransportError
+from elasticsearch.helpers import BulkIndexError, async_streaming_bulk
+from load import ElasticsearchLoader, OrjsonSerializer
+from loguru import logger
+from metrics import BULK_DURATION
+from pydantic import BaseModel
+
+logger.add(**loguru_config)
+
+
+class AsyncElasticsearchLoader:
+    """
+    An asyncio counterpart of ElasticsearchLoader for bulk loading. Index management
+    (creating indexes, bulk-load mode) is delegated to the sync loader, which runs it in
+    a worker thread.
+    """
+
+    def __init__(self, es_url: str, sync_loader: ElasticsearchLoader):
+        self.connection = None
+        self.es_url = es_url
+        self.sync_loader = sync_loader
+
+    @on_exception(
+        expo,
+        (ConnectionError, TransportError, ConnectionTimeout),
+        max_tries=settings_config.MAX_TRIES,
+        logger=logger,
+    )
+    async def connect_to_elastic(self) -> None:
+        """
+        Connects to Elasticsearch.
+        """
+
+        logger.info('Attempting to connect to Elasticsearch')
+        self.connection = AsyncElasticsearch(
+            hosts=[self.es_url], serializer=OrjsonSerializer()
+        )
+        await asyncio.to_thread(self.sync_loader.connect_to_elastic)
+        logger.info('The connection with Elasticsearch has been established')
+
+    async def close(self) -> None:
+        if self.connection is not None:
+            await self.connection.close()
+
+    async def create_index(self, index_name: str) -> bool:
+        return await asyncio.to_thread(self.sync_loader.create_index, index_name)
+
+    @asynccontextmanager
+    async def bulk_load_mode(
+        self, index_name: str, force_merge: bool = False
+    ) -> AsyncIterator[None]:
+        """
+        Runs ElasticsearchLoader.bulk_load_mode around the block without blocking the loop.
+        """
+
+        manager = self.sync_loader.bulk_load_mode(index_name, force_merge)
+        await asyncio.to_thread(manager.__enter__)
+        try:
+            yield
+        finally:
+            await asyncio.to_thread(manager.__exit__, None, None, None)
+
+    async def load_movies_data(
+        self, data: list[Union[dict, BaseModel]], index_name: str
+    ) -> None:
+        """
+        Loads data into Elasticsearch with async_streaming_bulk. Documents rejected because
+        of a full write queue (429) are re-sent with exponential backoff; any other
+        per-document failure is raised immediately.
+        """
+
+        pending = ElasticsearchLoader.build_actions(data, index_name)
+        started_at = time.perf_counter()
+        for attempt in range(settings_config.BULK_MAX_RETRIES + 1):
+            if attempt:
+                delay = ElasticsearchLoader.get_backoff_delay(attempt)
+                logger.warning(
+                    'Elasticsearch rejected {} documents, retrying them in {}s.',
+                    len(pending),
+                    delay,
+                )
+                await asyncio.sleep(delay)
+            results = [
+                result
+                async for result in async_streaming_bulk(
+                    self.connection,
+                    pending,
+                    chunk_size=settings_config.BULK_CHUNK_SIZE,
+                    max_chunk_bytes=settings_config.BULK_MAX_CHUNK_BYTES,
+                    raise_on_error=False,
+                    raise_on_exception=False,
+                )
+            ]
+            pending, failed = ElasticsearchLoader.split_failures(pending, results)
+            if failed:
+                raise BulkIndexError(
+                    f'{len(failed)} document(s) failed to index.', failed
+                )
+            if not pending:
+                break
+        else:
+            raise BulkIndexError(
+                f'{len(pending)} document(s) were still rejected after '
+                f'{settings_config.BULK_MAX_RETRIES} retries.',
+                pending,
+            )
+        elapsed = time.perf_counter() - started_at
+        BULK_DURATION.labels(index_name).observe(elapsed)
+        logger.info(
+            'Loaded {} documents to Elasticsearch in {:.2f}s ({:.0f} docs/sec).',
+            len(data),
+            elapsed,
+            len(data) / elapsed if elapsed else 0,
+        )
@@ -0,0 +1,213 @@
+import re
+from typing import AsyncIterator, Optional
+
+import asyncpg
+import orjson
+from asyncpg import Connection, PostgresConnectionError, PostgresError
+from backoff import expo, on_exception
+from configs import loguru_config, settings_config
+from loguru import logger
+from psql_extractor import PostgresExtractor
+from summary import checkpoint_position
+
+logger.add(**loguru_config)
+
+
+def to_asyncpg_query(query: str) -> str:
+    """
+    Replaces the %s placeholders of a psycopg2 query with the numbered ones of asyncpg.
+    """
+
+    numbers = iter(range(1, query.count('%s') + 1))
+    return re.sub('%s', lambda _: f'${next(numbers)}', query)
+
+
+class AsyncPostgresExtractor:
+    """
+    An asyncio counterpart of PostgresExtractor built on an asyncpg connection pool. It
+    runs the same queries over the binary protocol and returns rows shaped like the ones
+    of the sync extractor (dicts with string ids and decoded JSON), so the transform and
+    state logic is shared.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        all_queries: dict[str],
+        count_queries: dict[str],
+        related_queries: dict[str, dict[str]],
+        by_ids_queries: dict[str],
+    ):
+        self.pool = None
+        self.dsn = dsn
+        self.all_queries = self.convert_queries(all_queries)
+        self.count_queries = self.convert_queries(count_queries)
+        self.related_queries = {
+            related_index: self.convert_queries(queries)
+            for related_index, queries in related_queries.items()
+        }
+        self.by_ids_queries = self.convert_queries(by_ids_queries)
+
+    @staticmethod
+    def convert_queries(queries: dict[str]) -> dict[str]:
+        return {name: to_asyncpg_query(query) for name, query in queries.items()}
+
+    @on_exception(
+        expo,
+        (OSError, PostgresConnectionError),
+        max_tries=settings_config.MAX_TRIES,
+        logger=logger,
+    )
+    async def connect_to_postgres(self) -> None:
+        """
+        Creates a connection pool, so concurrent index loads get connections of their own.
+        """
+
+        logger.info('Attempting to connect to PostgreSQL')
+        self.pool = await asyncpg.create_pool(
+            dsn=self.dsn,
+            min_size=1,
+            max_size=settings_config.ASYNC_PG_POOL_SIZE,
+            init=self.init_connection,
+        )
+        logger.info('The connection with PostgreSQL has been established')
+
+    @staticmethod
+    async def init_connection(connection: Connection) -> None:
+        for json_type in ('json', 'jsonb'):
+            await connection.set_type_codec(
+                json_type,
+                encoder=lambda value: orjson.dumps(value).decode(),
+                decoder=orjson.loads,
+                schema='pg_catalog',
+            )
+        await connection.set_type_codec(
+            'uuid', encoder=str, decoder=str, schema='pg_catalog', format='text'
+        )
+
+    async def close(self) -> None:
+        if self.pool is not None:
+            await self.pool.close()
+
+    @on_exception(
+        expo, PostgresError, max_tries=settings_config.MAX_TRIES, logger=logger
+    )
+    async def count_rows(self, checkpoint: dict, index_name: str) -> int:
+        """
+        Counts rows of the index source table that are newer than the given checkpoint.
+        """
+
+        return await self.pool.fetchval(
+            self.count_queries[index_name], *checkpoint_position(checkpoint)
+        )
+
+    async def get_movies_data(
+        self,
+        checkpoint: dict,
+        index_name: str,
+        chunk_size: int = settings_config.CHUNK_SIZE,
+    ) -> AsyncIterator[tuple[dict, list[dict]]]:
+        """
+        Retrieves rows newer than the given checkpoint page by page, the same way
+        PostgresExtractor.get_movies_data does: the aggregating queries pick the ids of
+        a page first, so every query joins and aggregates at most chunk_size rows.
+        Every chunk is yielded together with the checkpoint of its last row.
+        """
+
+        async with self.pool.acquire() as connection:
+            while True:
+                rows = await connection.fetch(
+                    self.all_queries[index_name],
+                    *checkpoint_position(checkpoint),
+                    chunk_size,
+                )
+                logger.info(
+                    'Fetched {} rows of index "{}" from PostgreSQL',
+                    len(rows),
+                    index_name,
+                )
+                if not rows:
+                    break
+                rows = [dict(row) for row in rows]
+                checkpoint = PostgresExtractor.make_checkpoint(rows[-1])
+                yield checkpoint, rows
+                if len(rows) < chunk_size:
+                    break
+
+    @on_exception(
+        expo, PostgresError, max_tries=settings_config.MAX_TRIES, logger=logger
+    )
+    async def get_latest_checkpoint(self, related_index: str) -> Optional[dict]:
+        """
+        Returns the checkpoint of the most recently updated row of a related table.
+        """
+
+        row = await self.pool.fetchrow(
+            self.related_queries[related_index]['latest_row']
+        )
+        return PostgresExtractor.make_checkpoint(row) if row else None
+
+    async def get_related_movies_data(
+        self,
+        checkpoint: dict,
+        related_index: str,
+        chunk_size: int = settings_config.CHUNK_SIZE,
+    ) -> AsyncIterator[tuple[Optional[dict], list[dict]]]:
+        """
+        Retrieves movies whose persons or genres changed after the given checkpoint, the
+        same way PostgresExtractor.get_related_movies_data does.
+        """
+
+        queries = self.related_queries[related_index]
+        async with self.pool.acquire() as connection:
+            while True:
+                related_rows = await connection.fetch(
+                    queries['changed_rows'],
+                    *checkpoint_position(checkpoint),
+                    chunk_size,
+                )
+                if not related_rows:
+                    break
+                checkpoint = PostgresExtractor.make_checkpoint(related_rows[-1])
+
+                movies_ids = [
+                    row['film_work_id']
+                    for row in await connection.fetch(
+                        queries['movies_ids'], [row['id'] for row in related_rows]
+                    )
+                ]
+                logger.info(
+                    'Found {} changed rows of index "{}" affecting {} movies',
+                    len(related_rows),
+                    related_index,
+                    len(movies_ids),
+                )
+                if not movies_ids:
+                    yield checkpoint, []
+                for start in range(0, len(movies_ids), chunk_size):
+                    rows = await connection.fetch(
+                        queries['movies'], movies_ids[start : start + chunk_size]
+                    )
+                    is_last_chunk = start + chunk_size >= len(movies_ids)
+                    yield checkpoint if is_last_chunk else None, [
+                        dict(row) for row in rows
+                    ]
+
+                if len(related_rows) < chunk_size:
+                    break
+
+    async def get_data_by_ids(
+        self,
+        ids: list[str],
+        index_name: str,
+        chunk_size: int = settings_config.CHUNK_SIZE,
+    ) -> AsyncIterator[tuple[None, list[dict]]]:
+        """
+        Retrieves rows of the index with the given ids in chunks.
+        """
+
+        for start in range(0, len(ids), chunk_size):
+            rows = await self.pool.fetch(
+                self.by_ids_queries[index_name], ids[start : start + chunk_size]
+            )
+            yield None, [dict(row) for row in rows]
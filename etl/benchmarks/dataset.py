@@ -0,0 +1,193 @@
+"""
+Generates a synthetic content dataset inside the Postgres database the ETL reads from.
+
+Benchmarks of queries use rolled_back_dataset, which inserts the rows in a transaction
+that is always rolled back, so they can run against any database without leaving data
+behind. Benchmarks of the whole ETL need the rows committed, because the ETL reads them
+over connections of its own; run this module from the etl directory to populate the
+database, e.g.:
+
+    python -m benchmarks.dataset --movies 100000 --persons 200000 --genres 50
+    python -m benchmarks.dataset --delete
+"""
+import argparse
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+import psycopg2
+from configs import pg_config
+from psycopg2.extensions import cursor as Cursor
+from psycopg2.extras import RealDictCursor
+
+BENCHMARK_PREFIX = 'Benchmark '
+
+GENERATE_DATASET_SQL = """
+    CREATE TEMPORARY TABLE benchmark_genre ON COMMIT DROP AS
+        SELECT gen_random_uuid() AS id, number
+        FROM generate_series(1, %(genres)s) AS number;
+    CREATE TEMPORARY TABLE benchmark_film_work ON COMMIT DROP AS
+        SELECT gen_random_uuid() AS id, number
+        FROM generate_series(1, %(movies)s) AS number;
+    CREATE TEMPORARY TABLE benchmark_person ON COMMIT DROP AS
+        SELECT gen_random_uuid() AS id, number
+        FROM generate_series(1, %(persons)s) AS number;
+
+    INSERT INTO content.genre (id, name, description, created_at, updated_at)
+    SELECT id, %(prefix)s || 'genre ' || number, repeat('Genre description. ', 5), now(), now()
+    FROM benchmark_genre;
+
+    INSERT INTO content.film_work
+        (id, title, description, creation_date, rating, type, created_at, updated_at)
+    SELECT
+        id,
+        %(prefix)s || 'movie ' || number,
+        repeat('Movie description. ', 20),
+        current_date - (number %% 20000),
+        round((random() * 10)::numeric, 1),
+        CASE WHEN number %% 5 = 0 THEN 'tv_show' ELSE 'movie' END,
+        now(),
+        now() - number * interval '1 second'
+    FROM benchmark_film_work;
+
+    INSERT INTO content.person (id, full_name, created_at, updated_at)
+    SELECT id, %(prefix)s || 'person ' || number, now(), now() - number * interval '1 second'
+    FROM benchmark_person;
+
+    INSERT INTO content.genre_film_work (id, genre_id, film_work_id, created_at)
+    SELECT gen_random_uuid(), genre.id, film_work.id, now()
+    FROM benchmark_film_work AS film_work
+    CROSS JOIN generate_series(0, %(genres_per_movie)s - 1) AS slot
+    JOIN benchmark_genre AS genre
+        ON genre.number = (film_work.number * 7 + slot) %% %(genres)s + 1;
+
+    INSERT INTO content.person_film_work (id, person_id, film_work_id, role, created_at)
+    SELECT
+        gen_random_uuid(),
+        person.id,
+        film_work.id,
+        (ARRAY['actor', 'director', 'writer'])[slot %% 3 + 1],
+        now()
+    FROM benchmark_film_work AS film_work
+    CROSS JOIN generate_series(0, %(persons_per_movie)s - 1) AS slot
+    JOIN benchmark_person AS person
+        ON person.number = (film_work.number * 31 + slot * 101) %% %(persons)s + 1;
+"""
+
+DELETE_DATASET_SQL = """
+    CREATE TEMPORARY TABLE benchmark_film_work ON COMMIT DROP AS
+        SELECT id FROM content.film_work WHERE title LIKE %(pattern)s;
+    CREATE TEMPORARY TABLE benchmark_person ON COMMIT DROP AS
+        SELECT id FROM content.person WHERE full_name LIKE %(pattern)s;
+    CREATE TEMPORARY TABLE benchmark_genre ON COMMIT DROP AS
+        SELECT id FROM content.genre WHERE name LIKE %(pattern)s;
+
+    DELETE FROM content.person_film_work
+    WHERE film_work_id IN (SELECT id FROM benchmark_film_work)
+        OR person_id IN (SELECT id FROM benchmark_person);
+    DELETE FROM content.genre_film_work
+    WHERE film_work_id IN (SELECT id FROM benchmark_film_work)
+        OR genre_id IN (SELECT id FROM benchmark_genre);
+    DELETE FROM content.film_work WHERE id IN (SELECT id FROM benchmark_film_work);
+    DELETE FROM content.person WHERE id IN (SELECT id FROM benchmark_person);
+    DELETE FROM content.genre WHERE id IN (SELECT id FROM benchmark_genre);
+"""
+
+ANALYZE_SQL = (
+    'ANALYZE content.film_work, content.person, content.genre, '
+    'content.person_film_work, content.genre_film_work'
+)
+
+
+def generate_dataset(
+    cursor: Cursor,
+    movies: int,
+    persons: int,
+    genres: int,
+    persons_per_movie: int,
+    genres_per_movie: int,
+) -> None:
+    """
+    Inserts the given numbers of film works, persons and genres, linking every movie to
+    persons_per_movie persons and genres_per_movie genres.
+    """
+
+    cursor.execute(
+        GENERATE_DATASET_SQL,
+        {
+            'prefix': BENCHMARK_PREFIX,
+            'movies': movies,
+            'persons': persons,
+            'genres': genres,
+            'persons_per_movie': min(persons_per_movie, persons),
+            'genres_per_movie': min(genres_per_movie, genres),
+        },
+    )
+
+
+@contextmanager
+def rolled_back_dataset(
+    dsn: str,
+    movies: int,
+    persons: int,
+    genres: int,
+    persons_per_movie: int,
+    genres_per_movie: int,
+) -> Iterator[Cursor]:
+    """
+    Yields a cursor of a transaction that sees the generated dataset on top of the
+    existing data. The transaction is rolled back on exit.
+    """
+
+    connection = psycopg2.connect(dsn=dsn, cursor_factory=RealDictCursor)
+    try:
+        with connection.cursor() as cursor:
+            generate_dataset(
+                cursor, movies, persons, genres, persons_per_movie, genres_per_movie
+            )
+            cursor.execute('ANALYZE content.person_film_work, content.person')
+            yield cursor
+    finally:
+        connection.rollback()
+        connection.close()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--movies', type=int, default=10000)
+    parser.add_argument('--persons', type=int, default=20000)
+    parser.add_argument('--genres', type=int, default=30)
+    parser.add_argument('--persons-per-movie', type=int, default=10)
+    parser.add_argument('--genres-per-movie', type=int, default=3)
+    parser.add_argument(
+        '--delete',
+        action='store_true',
+        help='delete previously generated rows instead of generating new ones',
+    )
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    started_at = time.perf_counter()
+    with psycopg2.connect(dsn=pg_config.url) as connection:
+        with connection.cursor() as cursor:
+            if args.delete:
+                cursor.execute(DELETE_DATASET_SQL, {'pattern': f'{BENCHMARK_PREFIX}%'})
+            else:
+                generate_dataset(
+                    cursor,
+                    args.movies,
+                    args.persons,
+                    args.genres,
+                    args.persons_per_movie,
+                    args.genres_per_movie,
+                )
+    connection.autocommit = True
+    with connection.cursor() as cursor:
+        cursor.execute(ANALYZE_SQL)
+    connection.close()
+    print(
+        f'{"Deleted" if args.delete else "Generated"} the benchmark dataset '
+        f'in {time.perf_counter() - started_at:.2f}s.'
+    )
@@ -0,0 +1,187 @@
+"""
+End-to-end benchmark of ETL.load_all_data over the data of the configured Postgres database.
+
+Every index is loaded from scratch into a throwaway benchmark_<index> target with a fresh
+state and hash store. Without --es the documents go to a stand-in loader that builds and
+serializes the bulk actions but doesn't send them, so only Postgres is needed. Reports:
+
+* docs/sec of the overlapping pipeline (ETL.load_all_data as the ETL runs it);
+* time and peak traced memory of every stage, measured by running extract, transform and
+  load of each chunk one after another under tracemalloc (which slows them down).
+
+Populate the database with benchmarks.dataset first and run it from the etl directory, e.g.:
+
+    python -m benchmarks.etl_benchmark --indexes movies persons --es
+"""
+import argparse
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Iterator, Union
+
+from configs import es_config
+from hash_store import ChangeDetector, SQLiteHashStore
+from indexes import ALL_INDEXES
+from load import ElasticsearchLoader, OrjsonSerializer
+from main import ETL, INITIAL_CHECKPOINT
+from pydantic import BaseModel
+from state import JsonFileStorage, State
+
+STAGES = ('extract', 'transform', 'load')
+
+
+class StandInElasticsearchLoader(ElasticsearchLoader):
+    """
+    A loader that does the client-side work of a bulk load (building and serializing the
+    actions) without an Elasticsearch cluster.
+    """
+
+    def __init__(self):
+        super().__init__(es_url=es_config.url)
+        self.serializer = OrjsonSerializer()
+
+    def connect_to_elastic(self) -> None:
+        pass
+
+    def create_index(self, index_name: str) -> bool:
+        return True
+
+    def delete_index(self, index_name: str) -> None:
+        pass
+
+    def bulk_load_mode(self, index_name: str, force_merge: bool = False):
+        return nullcontext()
+
+    def load_movies_data(
+        self, data: list[Union[dict, BaseModel]], index_name: str
+    ) -> None:
+        for action in self.build_actions(data, index_name):
+            self.serializer.dumps(action)
+
+
+@contextmanager
+def benchmark_etl(use_es: bool) -> Iterator[ETL]:
+    """
+    Yields an ETL with a state and hash store of its own in a temporary directory.
+    """
+
+    with tempfile.TemporaryDirectory() as directory:
+        etl = ETL()
+        etl.state = State(JsonFileStorage(str(Path(directory) / 'state.json')))
+        etl.hash_store = SQLiteHashStore(str(Path(directory) / 'hashes.sqlite'))
+        etl.change_detector = ChangeDetector(etl.hash_store)
+        if not use_es:
+            etl.es = StandInElasticsearchLoader()
+        etl.psql.connect_to_postgres()
+        etl.es.connect_to_elastic()
+        try:
+            yield etl
+        finally:
+            etl.psql.cursor.close()
+            etl.psql.connection.close()
+
+
+def create_target_index(etl: ETL, index_name: str) -> str:
+    target_index = f'benchmark_{index_name}'
+    etl.es.delete_index(target_index)
+    if not isinstance(etl.es, StandInElasticsearchLoader):
+        etl.es.connection.indices.create(
+            index=target_index, body=ALL_INDEXES[index_name]
+        )
+    return target_index
+
+
+def bench_pipeline(index_name: str, use_es: bool) -> tuple[int, float]:
+    with benchmark_etl(use_es) as etl:
+        target_index = create_target_index(etl, index_name)
+        try:
+            started_at = time.perf_counter()
+            etl.load_all_data(index_name, target_index=target_index)
+            elapsed = time.perf_counter() - started_at
+            summary = etl.summary.indexes.get(target_index)
+            count = summary.documents if summary else 0
+        finally:
+            etl.es.delete_index(target_index)
+    return count, elapsed
+
+
+def bench_stages(index_name: str, use_es: bool) -> tuple[int, dict, dict]:
+    """
+    Runs the stages of every chunk one after another and returns the number of documents
+    with the total time and the peak traced memory (above the memory in use when the stage
+    started) of every stage.
+    """
+
+    elapsed = dict.fromkeys(STAGES, 0.0)
+    peaks = dict.fromkeys(STAGES, 0)
+
+    def run_stage(stage: str, func, *args):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        started_at = time.perf_counter()
+        result = func(*args)
+        elapsed[stage] += time.perf_counter() - started_at
+        peaks[stage] = max(peaks[stage], tracemalloc.get_traced_memory()[1] - baseline)
+        return result
+
+    count = 0
+    with benchmark_etl(use_es) as etl:
+        target_index = create_target_index(etl, index_name)
+        state_key = f'{target_index}_checkpoint'
+        chunks = etl.psql.get_movies_data(INITIAL_CHECKPOINT, index_name)
+        tracemalloc.start()
+        try:
+            while chunk := run_stage('extract', next, chunks, None):
+                checkpoint, rows = chunk
+                documents = run_stage(
+                    'transform', etl.transform.transform_movies_data, rows, index_name
+                )
+                run_stage(
+                    'load',
+                    etl.save_chunk,
+                    target_index,
+                    state_key,
+                    checkpoint,
+                    documents,
+                )
+                count += len(documents)
+        finally:
+            tracemalloc.stop()
+            etl.es.delete_index(target_index)
+    return count, elapsed, peaks
+
+
+def report(index_name: str, use_es: bool) -> None:
+    count, elapsed = bench_pipeline(index_name, use_es)
+    print(f'{index_name}: {count} docs')
+    if not count:
+        return
+    print(f'  {"pipeline":<10} {elapsed:7.2f}s {count / elapsed:10.0f} docs/sec')
+    count, stage_elapsed, peaks = bench_stages(index_name, use_es)
+    for stage in STAGES:
+        print(
+            f'  {stage:<10} {stage_elapsed[stage]:7.2f}s '
+            f'{count / stage_elapsed[stage]:10.0f} docs/sec '
+            f'{peaks[stage] / 2**20:8.1f} MiB peak'
+        )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        '--indexes', nargs='+', choices=list(ALL_INDEXES), default=list(ALL_INDEXES)
+    )
+    parser.add_argument(
+        '--es',
+        action='store_true',
+        help='load into throwaway Elasticsearch indexes instead of the stand-in loader',
+    )
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    for index in args.indexes:
+        report(index, args.es)
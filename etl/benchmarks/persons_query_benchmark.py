@@ -0,0 +1,105 @@
+"""
+Benchmark of the persons extraction query against the previous json_agg version.
+
+Generates a dataset in a rolled-back transaction of the configured Postgres database and
+reports, for each query, the time to page through all persons and the size of the result
+in the text format the driver receives. Run it from the etl directory, e.g.:
+
+    python -m benchmarks.persons_query_benchmark --movies 50000 --persons 100000
+"""
+import argparse
+import time
+
+from benchmarks.dataset import rolled_back_dataset
+from configs import pg_config
+from psql_extractor import PostgresExtractor
+from psycopg2.extensions import cursor as Cursor
+from sql_queries import KEYSET_CONDITION, KEYSET_ORDER, MIN_UUID, PERSON_SQL_QUERY
+
+LEGACY_PERSON_SQL_QUERY = f"""
+    SELECT
+        person.id,
+        person.full_name,
+        person.updated_at,
+        COALESCE (json_agg(
+        DISTINCT jsonb_build_object(
+           'id', film_work.id,
+           'title', film_work.title,
+           'rating', film_work.rating,
+           'type', film_work.type
+       )
+   ) FILTER (WHERE film_work.id is not null), '[]') as all_movies,
+    array_agg(DISTINCT person_film_work.role) as roles
+    FROM content.person
+    LEFT JOIN content.person_film_work ON person_film_work.person_id = person.id
+    LEFT JOIN content.film_work ON film_work.id = person_film_work.film_work_id
+    WHERE {KEYSET_CONDITION.format(table='person')}
+    GROUP BY person.id
+    {KEYSET_ORDER.format(table='person')}
+"""
+
+QUERIES = {
+    'legacy json_agg': LEGACY_PERSON_SQL_QUERY,
+    'array_agg of ids': PERSON_SQL_QUERY,
+}
+
+
+def fetch_all_pages(cursor: Cursor, query: str, chunk_size: int) -> tuple[int, int]:
+    """
+    Pages through the query the way the extractor does and returns the number of rows
+    and the size of their text representation in bytes.
+    """
+
+    checkpoint = {'updated_at': '-infinity', 'id': MIN_UUID}
+    rows_count = transfer_size = 0
+    while True:
+        cursor.execute(
+            f'SELECT page.*, octet_length(page::text) AS row_size FROM ({query}) page '
+            'ORDER BY page.updated_at, page.id',
+            (checkpoint['updated_at'], checkpoint['id'], chunk_size),
+        )
+        rows = cursor.fetchall()
+        rows_count += len(rows)
+        transfer_size += sum(row['row_size'] for row in rows)
+        if len(rows) < chunk_size:
+            return rows_count, transfer_size
+        checkpoint = PostgresExtractor.make_checkpoint(rows[-1])
+
+
+def bench_queries(cursor: Cursor, chunk_size: int, repeat: int) -> None:
+    print(f'Persons extraction (pages of {chunk_size}):')
+    for name, query in QUERIES.items():
+        timings = []
+        for _ in range(repeat):
+            started_at = time.perf_counter()
+            rows_count, transfer_size = fetch_all_pages(cursor, query, chunk_size)
+            timings.append(time.perf_counter() - started_at)
+        print(
+            f'  {name:<18} {min(timings):8.2f}s {rows_count:>9} rows '
+            f'{transfer_size / 1024 / 1024:9.1f} MiB'
+        )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--movies', type=int, default=20000)
+    parser.add_argument('--persons', type=int, default=50000)
+    parser.add_argument('--genres', type=int, default=30)
+    parser.add_argument('--persons-per-movie', type=int, default=30)
+    parser.add_argument('--genres-per-movie', type=int, default=3)
+    parser.add_argument('--chunk-size', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    with rolled_back_dataset(
+        pg_config.dsn,
+        movies=args.movies,
+        persons=args.persons,
+        genres=args.genres,
+        persons_per_movie=args.persons_per_movie,
+        genres_per_movie=args.genres_per_movie,
+    ) as dataset_cursor:
+        bench_queries(dataset_cursor, args.chunk_size, args.repeat)
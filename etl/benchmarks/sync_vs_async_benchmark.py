@@ -0,0 +1,169 @@
+"""
+Benchmark of the sync ETL path (psycopg2, Elasticsearch) against the async one (asyncpg,
+AsyncElasticsearch) over the data of the configured Postgres database.
+
+Every index is extracted from scratch and transformed. With --load the documents are
+also loaded into throwaway benchmark_<mode>_<index> indexes, which are deleted afterwards;
+without it only Postgres is needed. Run it from the etl directory, e.g.:
+
+    python -m benchmarks.sync_vs_async_benchmark --load
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Awaitable, Callable, Optional
+
+from async_load import AsyncElasticsearchLoader
+from async_psql_extractor import AsyncPostgresExtractor
+from configs import es_config, pg_config
+from indexes import ALL_INDEXES
+from load import ElasticsearchLoader
+from main import ETL, INITIAL_CHECKPOINT
+from pipeline import AsyncETLPipeline, ETLPipeline
+from sql_queries import (
+    ALL_BY_IDS_SQL_QUERIES,
+    ALL_COUNT_QUERIES,
+    ALL_SQL_QUERIES,
+    MOVIE_RELATED_SQL_QUERIES,
+)
+from transform import DataTransformer
+
+transformer = DataTransformer()
+
+
+def create_benchmark_indexes(es: Optional[ElasticsearchLoader], mode: str) -> None:
+    if es is None:
+        return
+    for index_name, body in ALL_INDEXES.items():
+        es.delete_index(f'benchmark_{mode}_{index_name}')
+        es.connection.indices.create(index=f'benchmark_{mode}_{index_name}', body=body)
+
+
+def delete_benchmark_indexes(es: Optional[ElasticsearchLoader], mode: str) -> None:
+    if es is None:
+        return
+    for index_name in ALL_INDEXES:
+        es.delete_index(f'benchmark_{mode}_{index_name}')
+
+
+def run_sync_index(
+    index_name: str, es: Optional[ElasticsearchLoader]
+) -> tuple[str, int, float]:
+    psql = ETL.create_extractor()
+    psql.connect_to_postgres()
+    load = (
+        (lambda checkpoint, documents: None)
+        if es is None
+        else lambda checkpoint, documents: es.load_movies_data(
+            documents, f'benchmark_sync_{index_name}'
+        )
+    )
+    pipeline = ETLPipeline(
+        transform=partial(transformer.transform_movies_data, index_name=index_name),
+        load=load,
+    )
+    started_at = time.perf_counter()
+    try:
+        count = pipeline.run(psql.get_movies_data(INITIAL_CHECKPOINT, index_name))
+    finally:
+        psql.cursor.close()
+        psql.connection.close()
+    return index_name, count, time.perf_counter() - started_at
+
+
+def bench_sync(load: bool) -> tuple[list[tuple[str, int, float]], float]:
+    es = None
+    if load:
+        es = ElasticsearchLoader(es_url=es_config.url)
+        es.connect_to_elastic()
+    create_benchmark_indexes(es, 'sync')
+    started_at = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=len(ALL_INDEXES)) as executor:
+            results = list(
+                executor.map(partial(run_sync_index, es=es), list(ALL_INDEXES))
+            )
+    finally:
+        delete_benchmark_indexes(es, 'sync')
+    return results, time.perf_counter() - started_at
+
+
+async def run_async_index(
+    index_name: str,
+    psql: AsyncPostgresExtractor,
+    load: Callable[[str, list], Awaitable[None]],
+) -> tuple[str, int, float]:
+    pipeline = AsyncETLPipeline(
+        transform=partial(transformer.transform_movies_data, index_name=index_name),
+        load=partial(load, index_name),
+    )
+    started_at = time.perf_counter()
+    count = await pipeline.run(psql.get_movies_data(INITIAL_CHECKPOINT, index_name))
+    return index_name, count, time.perf_counter() - started_at
+
+
+async def bench_async(load: bool) -> tuple[list[tuple[str, int, float]], float]:
+    psql = AsyncPostgresExtractor(
+        dsn=pg_config.url,
+        all_queries=ALL_SQL_QUERIES,
+        count_queries=ALL_COUNT_QUERIES,
+        related_queries=MOVIE_RELATED_SQL_QUERIES,
+        by_ids_queries=ALL_BY_IDS_SQL_QUERIES,
+    )
+    await psql.connect_to_postgres()
+    sync_es = es = None
+    if load:
+        sync_es = ElasticsearchLoader(es_url=es_config.url)
+        es = AsyncElasticsearchLoader(es_url=es_config.url, sync_loader=sync_es)
+        await es.connect_to_elastic()
+
+    async def load_chunk(index_name: str, checkpoint: dict, documents: list) -> None:
+        if es is not None:
+            await es.load_movies_data(documents, f'benchmark_async_{index_name}')
+
+    create_benchmark_indexes(sync_es, 'async')
+    started_at = time.perf_counter()
+    try:
+        results = await asyncio.gather(
+            *(
+                run_async_index(index_name, psql, load_chunk)
+                for index_name in ALL_INDEXES
+            )
+        )
+    finally:
+        delete_benchmark_indexes(sync_es, 'async')
+        await psql.close()
+        if es is not None:
+            await es.close()
+    return results, time.perf_counter() - started_at
+
+
+def report(mode: str, results: list[tuple[str, int, float]], elapsed: float) -> None:
+    print(f'{mode}:')
+    for index_name, count, index_elapsed in results:
+        print(
+            f'  {index_name:<8} {count:>8} docs {index_elapsed:7.2f}s '
+            f'{count / index_elapsed:10.0f} docs/sec'
+        )
+    total = sum(count for _, count, _ in results)
+    print(
+        f'  {"all":<8} {total:>8} docs {elapsed:7.2f}s {total / elapsed:10.0f} docs/sec'
+    )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        '--load',
+        action='store_true',
+        help='also load the documents into throwaway Elasticsearch indexes',
+    )
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    report('sync', *bench_sync(args.load))
+    report('async', *asyncio.run(bench_async(args.load)))
@@ -0,0 +1,140 @@
+"""
+Micro-benchmark of the ETL transform stage over synthetic movie rows.
+
+Run it from the etl directory, e.g.:
+
+    python -m benchmarks.transform_benchmark --rows 20000 --workers 1 2 4
+"""
+import argparse
+import random
+import time
+import uuid
+from functools import partial
+from typing import Callable
+
+from pipeline import ETLPipeline
+from transform import DataTransformer
+
+ROLES = ['director', 'actor', 'writer']
+
+
+def make_movie_rows(
+    count: int, persons_per_movie: int, genres_per_movie: int, seed: int = 0
+) -> list[dict]:
+    """
+    Builds rows shaped like the result of MOVIE_SQL_QUERY.
+    """
+
+    rng = random.Random(seed)
+    return [
+        {
+            'id': str(uuid.UUID(int=rng.getrandbits(128))),
+            'title': f'Movie {number}',
+            'description': 'Synthetic movie description. ' * 5,
+            'rating': round(rng.uniform(0, 10), 1),
+            'type': rng.choice(['movie', 'tv_show']),
+            'creation_date': None,
+            'file_path': None,
+            'all_persons': [
+                {
+                    'id': str(uuid.UUID(int=rng.getrandbits(128))),
+                    'full_name': f'Person {number}-{person}',
+                    'role': rng.choice(ROLES),
+                }
+                for person in range(persons_per_movie)
+            ],
+            'all_genres': [
+                {
+                    'id': str(uuid.UUID(int=rng.getrandbits(128))),
+                    'name': f'Genre {genre}',
+                    'description': None,
+                }
+                for genre in range(genres_per_movie)
+            ],
+        }
+        for number in range(count)
+    ]
+
+
+def get_persons_by_role_per_role_scan(
+    persons: list[dict], roles: list[str]
+) -> dict[str, tuple[list[dict], list[str]]]:
+    """
+    The previous implementation, which scanned all persons once per role.
+    """
+
+    persons_data_by_role = {}
+    for role in roles:
+        persons_with_role = [
+            {'id': person.get('id'), 'full_name': person.get('full_name')}
+            for person in persons
+            if person.get('role') == role
+        ]
+        names_of_persons_with_role = [
+            person.get('full_name') for person in persons_with_role
+        ]
+        persons_data_by_role[role] = (persons_with_role, names_of_persons_with_role)
+    return persons_data_by_role
+
+
+def best_of(func: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started_at)
+    return min(timings)
+
+
+def bench_role_bucketing(rows: list[dict], repeat: int) -> None:
+    transformer = DataTransformer()
+    implementations = {
+        'per-role scan': get_persons_by_role_per_role_scan,
+        'single pass': transformer.get_persons_by_role,
+    }
+    print('Role bucketing:')
+    for name, implementation in implementations.items():
+        elapsed = best_of(
+            lambda: [implementation(row['all_persons'], ROLES) for row in rows],
+            repeat,
+        )
+        print(f'  {name:<14} {elapsed * 1e6 / len(rows):8.2f} us/row')
+
+
+def bench_transform_stage(
+    rows: list[dict], chunk_size: int, workers: list[int], repeat: int
+) -> None:
+    transformer = DataTransformer()
+    chunks = [
+        (None, rows[start : start + chunk_size])
+        for start in range(0, len(rows), chunk_size)
+    ]
+    print(f'Transform stage ({len(rows)} rows, chunks of {chunk_size}):')
+    for worker_count in workers:
+        pipeline = ETLPipeline(
+            transform=partial(transformer.transform_movies_data, index_name='movies'),
+            load=lambda checkpoint, documents: None,
+            transform_workers=worker_count,
+        )
+        elapsed = best_of(lambda: pipeline.run(chunks), repeat)
+        print(f'  {worker_count} worker(s) {len(rows) / elapsed:10.0f} docs/sec')
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--persons-per-movie', type=int, default=30)
+    parser.add_argument('--genres-per-movie', type=int, default=3)
+    parser.add_argument('--chunk-size', type=int, default=200)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--repeat', type=int, default=3)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    movie_rows = make_movie_rows(
+        args.rows, args.persons_per_movie, args.genres_per_movie
+    )
+    bench_role_bucketing(movie_rows, args.repeat)
+    bench_transform_stage(movie_rows, args.chunk_size, args.workers, args.repeat)
@@ -0,0 +1,159 @@
+import abc
+import hashlib
+import sqlite3
+import threading
+from typing import Union
+
+import orjson
+from configs import loguru_config
+from elasticsearch.serializer import JSONSerializer
+from loguru import logger
+from pydantic import BaseModel
+
+logger.add(**loguru_config)
+
+HASH_DIGEST_SIZE = 16
+# Bookkeeping fields move on every reload of a row, so they are left out of the hash: a
+# document that only differs from the loaded one in them is not sent again.
+HASH_EXCLUDED_FIELDS = frozenset({'updated_at'})
+# Stays below the bound-parameter limit of older SQLite builds (999).
+SQLITE_MAX_VARIABLES = 900
+
+
+def document_hash(document: Union[dict, BaseModel]) -> bytes:
+    """
+    Returns a stable hash of an index document: keys are sorted, so it depends only on
+    the document content and not on the order its fields were built in. Fields of
+    HASH_EXCLUDED_FIELDS are ignored.
+    """
+
+    if isinstance(document, BaseModel):
+        document = document.dict(exclude=HASH_EXCLUDED_FIELDS)
+    else:
+        document = {
+            key: value
+            for key, value in document.items()
+            if key not in HASH_EXCLUDED_FIELDS
+        }
+    serialized = orjson.dumps(
+        document, default=JSONSerializer().default, option=orjson.OPT_SORT_KEYS
+    )
+    return hashlib.blake2b(serialized, digest_size=HASH_DIGEST_SIZE).digest()
+
+
+class BaseHashStore:
+    @abc.abstractmethod
+    def get_many(self, index_name: str, ids: list[str]) -> dict[str, bytes]:
+        pass
+
+    @abc.abstractmethod
+    def set_many(self, index_name: str, hashes: dict[str, bytes]) -> None:
+        pass
+
+    @abc.abstractmethod
+    def clear(self, index_name: str) -> None:
+        pass
+
+    @abc.abstractmethod
+    def move(self, source_index: str, target_index: str) -> None:
+        pass
+
+
+class SQLiteHashStore(BaseHashStore):
+    """
+    A class that keeps the hashes of the documents last loaded to each index in a local
+    SQLite file (16 bytes per document).
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(file_path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS document_hashes ('
+            'index_name TEXT, id TEXT, hash BLOB, PRIMARY KEY (index_name, id)'
+            ') WITHOUT ROWID'
+        )
+
+    def get_many(self, index_name: str, ids: list[str]) -> dict[str, bytes]:
+        hashes = {}
+        with self.lock:
+            for start in range(0, len(ids), SQLITE_MAX_VARIABLES):
+                batch = ids[start : start + SQLITE_MAX_VARIABLES]
+                placeholders = ', '.join('?' * len(batch))
+                rows = self.connection.execute(
+                    'SELECT id, hash FROM document_hashes '
+                    f'WHERE index_name = ? AND id IN ({placeholders})',
+                    (index_name, *batch),
+                )
+                hashes.update(rows)
+        return hashes
+
+    def set_many(self, index_name: str, hashes: dict[str, bytes]) -> None:
+        with self.lock, self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO document_hashes (index_name, id, hash) '
+                'VALUES (?, ?, ?)',
+                [(index_name, id, hash) for id, hash in hashes.items()],
+            )
+
+    def clear(self, index_name: str) -> None:
+        with self.lock, self.connection:
+            self.connection.execute(
+                'DELETE FROM document_hashes WHERE index_name = ?', (index_name,)
+            )
+        logger.info('Cleared document hashes of index "{}".', index_name)
+
+    def move(self, source_index: str, target_index: str) -> None:
+        """
+        Replaces the hashes of target_index with the ones of source_index, e.g. once the
+        alias has been switched to a rebuilt index.
+        """
+
+        with self.lock, self.connection:
+            self.connection.execute(
+                'DELETE FROM document_hashes WHERE index_name = ?', (target_index,)
+            )
+            self.connection.execute(
+                'UPDATE document_hashes SET index_name = ? WHERE index_name = ?',
+                (target_index, source_index),
+            )
+
+
+class ChangeDetector:
+    """
+    A class that filters out documents identical to the ones already loaded to an index,
+    e.g. rows whose updated_at was touched in Postgres without any visible change.
+    """
+
+    def __init__(self, hash_store: BaseHashStore):
+        self.hash_store = hash_store
+
+    def filter_changed(
+        self, index_name: str, documents: list
+    ) -> tuple[list, dict[str, bytes]]:
+        """
+        Returns the changed documents together with their new hashes, which must be saved
+        only after the documents have been loaded.
+        """
+
+        hashes = [document_hash(document) for document in documents]
+        ids = [str(self.get_id(document)) for document in documents]
+        known_hashes = self.hash_store.get_many(index_name, ids)
+        changed, changed_hashes = [], {}
+        for document, id, hash in zip(documents, ids, hashes):
+            if known_hashes.get(id) != hash:
+                changed.append(document)
+                changed_hashes[id] = hash
+        if len(changed) < len(documents):
+            logger.info(
+                'Skipped {} unchanged documents of index "{}".',
+                len(documents) - len(changed),
+                index_name,
+            )
+        return changed, changed_hashes
+
+    @staticmethod
+    def get_id(document: Union[dict, BaseModel]) -> str:
+        return document.id if isinstance(document, BaseModel) else document['id']
@@ -56,6 +56,7 @@ MOVIES_INDEX = {
                 "fields": {"raw": {"type": "keyword"}},
             },
             "file_path": {"type": "keyword"},
+            "updated_at": {"type": "date"},
             "description": {"type": "text", "analyzer": "ru_en"},
             "directors_names": {"type": "text", "analyzer": "ru_en"},
             "actors_names": {"type": "text", "analyzer": "ru_en"},
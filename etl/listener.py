@@ -0,0 +1,80 @@
+import json
+import select
+import time
+
+import psycopg2
+from backoff import expo, on_exception
+from configs import loguru_config, settings_config
+from loguru import logger
+from psycopg2 import OperationalError
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from sql_queries import build_notify_triggers_sql
+
+logger.add(**loguru_config)
+
+
+class PostgresListener:
+    """
+    A class that listens to the content change feed that the notify triggers publish
+    through Postgres LISTEN/NOTIFY and hands incoming changes over in batches.
+    """
+
+    def __init__(self, dsn: str, channel: str = settings_config.LISTEN_CHANNEL):
+        self.connection = None
+        self.dsn = dsn
+        self.channel = channel
+
+    @on_exception(
+        expo, OperationalError, max_tries=settings_config.MAX_TRIES, logger=logger
+    )
+    def connect_to_postgres(self) -> None:
+        """
+        Opens a dedicated autocommit connection, installs the notify triggers if enabled
+        and subscribes to the channel.
+        """
+
+        logger.info('Attempting to subscribe to PostgreSQL channel "{}"', self.channel)
+        self.connection = psycopg2.connect(dsn=self.dsn)
+        self.connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        with self.connection.cursor() as cursor:
+            if settings_config.LISTEN_INSTALL_TRIGGERS:
+                cursor.execute(build_notify_triggers_sql(self.channel))
+            cursor.execute(f'LISTEN {self.channel};')
+        logger.info('Subscribed to PostgreSQL channel "{}"', self.channel)
+
+    def close(self) -> None:
+        if self.connection is not None and not self.connection.closed:
+            self.connection.close()
+
+    def wait_for_changes(self, timeout: float) -> list[dict]:
+        """
+        Blocks until the first change arrives or the timeout expires, then keeps collecting
+        changes for LISTEN_BATCH_WINDOW seconds (or up to LISTEN_MAX_BATCH of them), so a
+        burst of writes is processed as one incremental load. Returns an empty list on
+        timeout and raises OperationalError if the connection is lost.
+        """
+
+        if not self._wait(timeout):
+            return []
+        changes = self._drain()
+        deadline = time.monotonic() + settings_config.LISTEN_BATCH_WINDOW
+        while len(changes) < settings_config.LISTEN_MAX_BATCH:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if self._wait(remaining):
+                changes.extend(self._drain())
+        logger.info('Received {} changes from PostgreSQL', len(changes))
+        return changes
+
+    def _wait(self, timeout: float) -> bool:
+        if not self.connection.notifies:
+            if select.select([self.connection], [], [], timeout) == ([], [], []):
+                return False
+            self.connection.poll()
+        return bool(self.connection.notifies)
+
+    def _drain(self) -> list[dict]:
+        changes = [json.loads(notify.payload) for notify in self.connection.notifies]
+        self.connection.notifies.clear()
+        return changes
@@ -1,3 +1,9 @@
+import time
+from contextlib import contextmanager
+from http import HTTPStatus
+from typing import Any, Iterable, Iterator, Union
+
+import orjson
 from backoff import expo, on_exception
 from configs import loguru_config, settings_config
 from elasticsearch import (
@@ -7,14 +13,31 @@ from elasticsearch import (
     SerializationError,
     TransportError,
 )
-from elasticsearch.helpers import bulk
+from elasticsearch.helpers import BulkIndexError, bulk, parallel_bulk, streaming_bulk
+from elasticsearch.serializer import JSONSerializer
 from indexes import ALL_INDEXES
 from loguru import logger
-from schemas import MovieData
+from metrics import BULK_DURATION, BULK_REJECTED_DOCUMENTS
+from pydantic import BaseModel
 
 logger.add(**loguru_config)
 
 
+class OrjsonSerializer(JSONSerializer):
+    """
+    A JSON serializer for the Elasticsearch client backed by orjson, which natively
+    handles the UUID, date and datetime values of ETL documents.
+    """
+
+    def dumps(self, data: Any) -> str:
+        if isinstance(data, str):
+            return data
+        try:
+            return orjson.dumps(data, default=self.default).decode()
+        except (TypeError, ValueError) as e:
+            raise SerializationError(data, e)
+
+
 class ElasticsearchLoader:
     """
     A class to load data into Elasticsearch.
@@ -36,37 +59,283 @@ class ElasticsearchLoader:
         """
 
         logger.info('Attempting to connect to Elasticsearch')
-        self.connection = Elasticsearch(hosts=[self.es_url])
+        self.connection = Elasticsearch(
+            hosts=[self.es_url], serializer=OrjsonSerializer()
+        )
         logger.info('The connection with Elasticsearch has been established')
 
     @on_exception(
         expo, RequestError, max_tries=settings_config.MAX_TRIES, logger=logger
     )
-    def create_index(self, index_name: str) -> None:
+    def create_index(self, index_name: str) -> bool:
         """
-        Creates the Elasticsearch index if it doesn't exist.
+        Creates the first version of the index behind an alias named after it, if neither
+        the alias nor a (legacy) index with that name exists. Returns whether it did.
         """
 
-        if not self.connection.indices.exists(index=index_name):
-            response = self.connection.indices.create(
-                index=index_name, body=ALL_INDEXES[index_name], ignore=400
-            )
-            logger.info(
-                'Created index "{}". Response from Elasticsearch: {}',
-                index_name,
-                response,
+        if self.connection.indices.exists(index=index_name):
+            self.update_mapping(index_name)
+            return False
+        self.create_versioned_index(index_name, version=1, with_alias=True)
+        return True
+
+    @on_exception(
+        expo, RequestError, max_tries=settings_config.MAX_TRIES, logger=logger
+    )
+    def update_mapping(self, index_name: str) -> None:
+        """
+        Adds fields introduced in the mapping since the index was created, so strict
+        mappings accept documents that carry them. Changing existing fields still takes a
+        reindex.
+        """
+
+        self.connection.indices.put_mapping(
+            index=index_name, body=ALL_INDEXES[index_name]['mappings']
+        )
+
+    @on_exception(
+        expo, RequestError, max_tries=settings_config.MAX_TRIES, logger=logger
+    )
+    def create_versioned_index(
+        self, alias: str, version: int, with_alias: bool = False
+    ) -> str:
+        """
+        Creates the given version of an index (e.g. movies_v2) from its current mapping.
+        """
+
+        index_name = f'{alias}_v{version}'
+        body = ALL_INDEXES[alias]
+        if with_alias:
+            body = {**body, 'aliases': {alias: {}}}
+        response = self.connection.indices.create(
+            index=index_name, body=body, ignore=400
+        )
+        logger.info(
+            'Created index "{}". Response from Elasticsearch: {}',
+            index_name,
+            response,
+        )
+        return index_name
+
+    def get_latest_version(self, alias: str) -> int:
+        """
+        Returns the highest existing version of the index, or 0 if there is none.
+        """
+
+        prefix = f'{alias}_v'
+        versions = [
+            int(index_name[len(prefix) :])
+            for index_name in self.connection.indices.get(index=f'{prefix}*')
+            if index_name[len(prefix) :].isdigit()
+        ]
+        return max(versions, default=0)
+
+    def get_alias_indices(self, alias: str) -> list[str]:
+        """
+        Returns the names of the indices the alias currently points to.
+        """
+
+        if not self.connection.indices.exists_alias(name=alias):
+            return []
+        return list(self.connection.indices.get_alias(name=alias))
+
+    def swap_alias(self, alias: str, index_name: str) -> list[str]:
+        """
+        Atomically points the alias to the given index and returns the indices it was
+        detached from. A legacy concrete index that occupies the alias name is removed in
+        the same request, so readers never see the name missing.
+        """
+
+        old_indices = self.get_alias_indices(alias)
+        actions = [
+            {'remove': {'index': old_index, 'alias': alias}}
+            for old_index in old_indices
+        ]
+        if not old_indices and self.connection.indices.exists(index=alias):
+            actions.append({'remove_index': {'index': alias}})
+        actions.append({'add': {'index': index_name, 'alias': alias}})
+        self.connection.indices.update_aliases(body={'actions': actions})
+        logger.info('Alias "{}" now points to index "{}".', alias, index_name)
+        return old_indices
+
+    def delete_index(self, index_name: str) -> None:
+        """
+        Deletes the index.
+        """
+
+        self.connection.indices.delete(index=index_name, ignore=404)
+        logger.info('Deleted index "{}".', index_name)
+
+    def count_documents(self, index_name: str) -> int:
+        """
+        Refreshes the index and returns the number of documents in it.
+        """
+
+        self.connection.indices.refresh(index=index_name)
+        return self.connection.count(index=index_name)['count']
+
+    @contextmanager
+    def bulk_load_mode(
+        self, index_name: str, force_merge: bool = False
+    ) -> Iterator[None]:
+        """
+        Disables periodic refreshes and replicas of the index for the duration of a heavy
+        load. The original settings are restored afterwards, even if the load fails, and
+        the index is refreshed once (and optionally force-merged) to publish the data.
+        """
+
+        original = self.get_index_settings(
+            index_name, ('refresh_interval', 'number_of_replicas')
+        )
+        logger.info(
+            'Switching index "{}" to bulk-load mode. Original settings: {}',
+            index_name,
+            original,
+        )
+        self.connection.indices.put_settings(
+            index=index_name,
+            body={'index': {'refresh_interval': '-1', 'number_of_replicas': 0}},
+        )
+        try:
+            yield
+        finally:
+            self.connection.indices.put_settings(
+                index=index_name, body={'index': original}
             )
+            self.connection.indices.refresh(index=index_name)
+            if force_merge:
+                self.connection.indices.forcemerge(
+                    index=index_name, max_num_segments=1, request_timeout=3600
+                )
+            logger.info('Restored settings of index "{}".', index_name)
+
+    def get_index_settings(self, index_name: str, names: tuple[str, ...]) -> dict:
+        """
+        Returns the current values of the given index settings, falling back to the
+        cluster defaults for the ones that were never set explicitly.
+        """
+
+        response = self.connection.indices.get_settings(
+            index=index_name,
+            name=[f'index.{name}' for name in names],
+            include_defaults=True,
+        )
+        index_settings = next(iter(response.values()))
+        explicit = index_settings.get('settings', {}).get('index', {})
+        defaults = index_settings.get('defaults', {}).get('index', {})
+        return {name: explicit.get(name, defaults.get(name)) for name in names}
 
     @on_exception(
         expo, SerializationError, max_tries=settings_config.MAX_TRIES, logger=logger
     )
-    def load_movies_data(self, data: list[MovieData], index_name: str) -> None:
+    def load_movies_data(
+        self, data: list[Union[dict, BaseModel]], index_name: str
+    ) -> None:
         """
         Loads data into Elasticsearch.
         """
 
-        actions = [
-            {'_index': index_name, '_id': row.id, '_source': row.dict()} for row in data
+        actions = self.build_actions(data, index_name)
+        started_at = time.perf_counter()
+        if settings_config.BULK_MODE == 'bulk':
+            bulk(self.connection, actions=actions)
+        else:
+            self.bulk_with_retries(actions)
+        elapsed = time.perf_counter() - started_at
+        BULK_DURATION.labels(index_name).observe(elapsed)
+        logger.info(
+            'Loaded {} documents to Elasticsearch in {:.2f}s ({:.0f} docs/sec).',
+            len(data),
+            elapsed,
+            len(data) / elapsed if elapsed else 0,
+        )
+
+    @staticmethod
+    def build_actions(
+        data: list[Union[dict, BaseModel]], index_name: str
+    ) -> list[dict]:
+        documents = [row.dict() if isinstance(row, BaseModel) else row for row in data]
+        return [
+            {'_index': index_name, '_id': str(document['id']), '_source': document}
+            for document in documents
         ]
-        bulk(self.connection, actions=actions)
-        logger.info('Loaded {} documents to Elasticsearch.', len(data))
+
+    @staticmethod
+    def get_backoff_delay(attempt: int) -> float:
+        return min(
+            settings_config.BULK_INITIAL_BACKOFF * 2 ** (attempt - 1),
+            settings_config.BULK_MAX_BACKOFF,
+        )
+
+    def bulk_with_retries(self, actions: list[dict]) -> None:
+        """
+        Indexes actions with the streaming or parallel bulk helper. Documents rejected
+        because of a full write queue (429) are re-sent on their own with exponential
+        backoff; any other per-document failure is raised immediately.
+        """
+
+        pending = actions
+        for attempt in range(settings_config.BULK_MAX_RETRIES + 1):
+            if attempt:
+                delay = self.get_backoff_delay(attempt)
+                logger.warning(
+                    'Elasticsearch rejected {} documents, retrying them in {}s.',
+                    len(pending),
+                    delay,
+                )
+                time.sleep(delay)
+            pending, failed = self.index_actions(pending)
+            if failed:
+                raise BulkIndexError(
+                    f'{len(failed)} document(s) failed to index.', failed
+                )
+            if not pending:
+                return
+        raise BulkIndexError(
+            f'{len(pending)} document(s) were still rejected after '
+            f'{settings_config.BULK_MAX_RETRIES} retries.',
+            pending,
+        )
+
+    def index_actions(self, actions: list[dict]) -> tuple[list[dict], list[dict]]:
+        """
+        Sends actions once and splits unsuccessful items into rejected actions that can be
+        retried and failed items that can't.
+        """
+
+        options = {
+            'chunk_size': settings_config.BULK_CHUNK_SIZE,
+            'max_chunk_bytes': settings_config.BULK_MAX_CHUNK_BYTES,
+            'raise_on_error': False,
+            'raise_on_exception': False,
+        }
+        if settings_config.BULK_MODE == 'parallel':
+            results = parallel_bulk(
+                self.connection,
+                actions,
+                thread_count=settings_config.BULK_THREAD_COUNT,
+                **options,
+            )
+        else:
+            results = streaming_bulk(self.connection, actions, **options)
+
+        return self.split_failures(actions, results)
+
+    @staticmethod
+    def split_failures(
+        actions: list[dict], results: Iterable[tuple[bool, dict]]
+    ) -> tuple[list[dict], list[dict]]:
+        actions_by_id = {action['_id']: action for action in actions}
+        rejected, failed = [], []
+        for ok, item in results:
+            if ok:
+                continue
+            info = next(iter(item.values()))
+            if info.get('status') == HTTPStatus.TOO_MANY_REQUESTS:
+                rejected.append(actions_by_id[info['_id']])
+                reason = 'rejected'
+            else:
+                failed.append(item)
+                reason = 'failed'
+            BULK_REJECTED_DOCUMENTS.labels(info.get('_index'), reason).inc()
+        return rejected, failed
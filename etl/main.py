@@ -1,17 +1,42 @@
+import asyncio
 import time
-from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from functools import partial
+from typing import Iterator, Optional
 
 from configs import es_config, loguru_config, pg_config, settings_config
+from hash_store import ChangeDetector, SQLiteHashStore
 from indexes import ALL_INDEXES
+from listener import PostgresListener
 from load import ElasticsearchLoader
 from loguru import logger
+from metrics import (
+    SKIPPED_DOCUMENTS,
+    export_metrics,
+    observe_checkpoint,
+    start_metrics_server,
+)
+from pipeline import ETLPipeline
 from psql_extractor import PostgresExtractor
-from sql_queries import ALL_SQL_QUERIES
-from state import JsonFileStorage, State
+from sql_queries import (
+    ALL_BY_IDS_SQL_QUERIES,
+    ALL_COUNT_QUERIES,
+    ALL_SHARDED_COUNT_QUERIES,
+    ALL_SHARDED_SQL_QUERIES,
+    ALL_SQL_QUERIES,
+    MIN_UUID,
+    MOVIE_RELATED_SQL_QUERIES,
+)
+from state import State, get_storage
+from summary import PassSummary, checkpoint_position
 from transform import DataTransformer
 
 logger.add(**loguru_config)
 
+INITIAL_CHECKPOINT = {'updated_at': datetime.min.isoformat(), 'id': MIN_UUID}
+
 
 class ETL:
     """
@@ -20,28 +45,158 @@ class ETL:
     """
 
     def __init__(self):
-        self.psql = PostgresExtractor(dsn=pg_config.dsn, all_queries=ALL_SQL_QUERIES)
+        self.psql = self.create_extractor()
         self.es = ElasticsearchLoader(es_url=es_config.url)
         self.transform = DataTransformer()
-        self.state = State(JsonFileStorage(settings_config.STATE_FILE_NAME))
+        self.state = State(get_storage())
+        self.listener = PostgresListener(dsn=pg_config.dsn)
+        self.hash_store = SQLiteHashStore(settings_config.HASH_STORE_PATH)
+        self.change_detector = ChangeDetector(self.hash_store)
+        self.summary = PassSummary()
+        self.deferred_changes = []
+
+    @staticmethod
+    def create_extractor() -> PostgresExtractor:
+        return PostgresExtractor(
+            dsn=pg_config.dsn,
+            all_queries=ALL_SQL_QUERIES,
+            count_queries=ALL_COUNT_QUERIES,
+            related_queries=MOVIE_RELATED_SQL_QUERIES,
+            by_ids_queries=ALL_BY_IDS_SQL_QUERIES,
+            sharded_queries=ALL_SHARDED_SQL_QUERIES,
+            sharded_count_queries=ALL_SHARDED_COUNT_QUERIES,
+        )
 
-    def load_all_data(self, index_name: str) -> None:
+    def get_checkpoint(self, index_name: str) -> dict:
         """
-        Load data from Postgres to Elasticsearch
+        Returns the (updated_at, id) keyset checkpoint to resume the index from.
         """
 
-        last_state = self.state.get_state(f'{index_name}_updated_at') or datetime.min
-        count = 0
+        checkpoint = self.state.get_state(f'{index_name}_checkpoint')
+        if checkpoint:
+            return checkpoint
+        # States written before keyset pagination only kept the timestamp.
+        updated_at = self.state.get_state(f'{index_name}_updated_at')
+        if updated_at:
+            return {'updated_at': updated_at, 'id': MIN_UUID}
+        return INITIAL_CHECKPOINT
+
+    def is_paused(self, index_name: str) -> bool:
+        """
+        Tells whether the reindex command has paused the index. The pause is acknowledged
+        in the state, which tells the reindex command that no load of the index is running
+        in this process any more.
+        """
+
+        token = self.state.get_state(f'{index_name}_paused')
+        if not token:
+            return False
+        if self.state.get_state(f'{index_name}_paused_ack') != token:
+            self.state.set_state(f'{index_name}_paused_ack', token)
+            self.state.flush()
+        logger.info(
+            'Index "{}" is paused by the reindex command, skipping it.', index_name
+        )
+        return True
+
+    def is_large_load(
+        self,
+        index_name: str,
+        checkpoints: dict[Optional[tuple[str, str]], dict],
+        psql: Optional[PostgresExtractor] = None,
+    ) -> bool:
+        """
+        Decides whether the pending load is big enough to switch the index to bulk-load mode.
+        checkpoints maps the id range of every shard (None for the whole table) to the
+        checkpoint its pending rows are counted from.
+        """
+
+        if settings_config.BULK_LOAD_FORCE:
+            return True
+        if not settings_config.BULK_LOAD_THRESHOLD:
+            return False
+        psql = psql or self.psql
+        pending = sum(
+            psql.count_rows(checkpoint, index_name, id_range=id_range)
+            for id_range, checkpoint in checkpoints.items()
+        )
+        return pending >= settings_config.BULK_LOAD_THRESHOLD
+
+    def save_chunk(
+        self,
+        index_name: str,
+        state_key: str,
+        checkpoint: Optional[dict],
+        documents: list,
+    ) -> None:
+        """
+        Loads transformed documents to Elasticsearch and advances the checkpoint, if any.
+        Documents identical to the ones loaded before are skipped; the hashes of the loaded
+        ones are saved only once Elasticsearch has accepted them.
+        """
+
+        documents, hashes = self.filter_chunk(index_name, checkpoint, documents)
+        if documents:
+            self.es.load_movies_data(documents, index_name)
+        self.commit_chunk(index_name, state_key, checkpoint, hashes)
+
+    def filter_chunk(
+        self, index_name: str, checkpoint: Optional[dict], documents: list
+    ) -> tuple[list, dict[str, bytes]]:
+        self.summary.add_chunk(index_name, len(documents), checkpoint)
+        if not documents or not settings_config.SKIP_UNCHANGED:
+            return documents, {}
+        changed, hashes = self.change_detector.filter_changed(index_name, documents)
+        SKIPPED_DOCUMENTS.labels(index_name).inc(len(documents) - len(changed))
+        return changed, hashes
+
+    def commit_chunk(
+        self,
+        index_name: str,
+        state_key: Optional[str],
+        checkpoint: Optional[dict],
+        hashes: dict[str, bytes],
+    ) -> None:
+        if hashes:
+            self.hash_store.set_many(index_name, hashes)
+        if checkpoint:
+            self.state.set_state(state_key, checkpoint)
+            if state_key == f'{index_name}_checkpoint':
+                observe_checkpoint(index_name, checkpoint)
+
+    def load_all_data(
+        self,
+        index_name: str,
+        target_index: Optional[str] = None,
+        force_bulk_load: bool = False,
+        psql: Optional[PostgresExtractor] = None,
+    ) -> None:
+        """
+        Load data from Postgres to Elasticsearch. Documents of index_name go to target_index
+        (index_name itself by default), which also owns the checkpoint of the load.
+        """
+
+        psql = psql or self.psql
+        target_index = target_index or index_name
+        pipeline = ETLPipeline(
+            transform=partial(
+                self.transform.transform_movies_data, index_name=index_name
+            ),
+            load=partial(self.save_chunk, target_index, f'{target_index}_checkpoint'),
+            name=target_index,
+        )
+        checkpoint = self.get_checkpoint(target_index)
+        bulk_load_mode = (
+            self.es.bulk_load_mode(
+                target_index, force_merge=settings_config.BULK_LOAD_FORCE_MERGE
+            )
+            if force_bulk_load
+            or self.is_large_load(index_name, {None: checkpoint}, psql)
+            else nullcontext()
+        )
         try:
-            for movies_data in self.psql.get_movies_data(last_state, index_name):
-                self.state.set_state(
-                    f'{index_name}_updated_at', datetime.now(timezone.utc).isoformat()
-                )
-                es_movies = self.transform.transform_movies_data(
-                    movies_data, index_name
-                )
-                self.es.load_movies_data(es_movies, index_name),
-                count += len(es_movies)
+            with bulk_load_mode:
+                count = pipeline.run(psql.get_movies_data(checkpoint, index_name))
             logger.info(
                 'Successfully transferred {} documents to Elasticsearch.', count
             )
@@ -49,22 +204,337 @@ class ETL:
             logger.error('An error occurred while transferring data. Error: {}.', e)
             raise
 
+    def load_sharded_data(
+        self,
+        index_name: str,
+        shards: int,
+        psql: Optional[PostgresExtractor] = None,
+    ) -> None:
+        """
+        Loads the index with one worker per id range, each with its own connection and
+        checkpoint. A shard without a checkpoint starts from the checkpoint of the whole
+        index. Once all shards are done, every row up to the newest shard checkpoint has
+        been loaded, so the checkpoint of the whole index is moved there: a shard that got
+        no new rows doesn't hold it back.
+        """
+
+        checkpoint = self.get_checkpoint(index_name)
+        state_keys = self.get_shard_state_keys(index_name, shards)
+        id_ranges = PostgresExtractor.split_id_range(shards)
+        shard_checkpoints = {
+            state_key: self.state.get_state(state_key) or checkpoint
+            for state_key in state_keys
+        }
+        bulk_load_mode = (
+            self.es.bulk_load_mode(
+                index_name, force_merge=settings_config.BULK_LOAD_FORCE_MERGE
+            )
+            if self.is_large_load(
+                index_name,
+                {
+                    id_range: shard_checkpoints[state_key]
+                    for state_key, id_range in zip(state_keys, id_ranges)
+                },
+                psql,
+            )
+            else nullcontext()
+        )
+        with bulk_load_mode, ThreadPoolExecutor(
+            max_workers=shards, thread_name_prefix=f'{index_name}-shard'
+        ) as executor:
+            futures = [
+                executor.submit(
+                    self.load_shard,
+                    index_name,
+                    state_key,
+                    shard_checkpoints[state_key],
+                    id_range,
+                )
+                for state_key, id_range in zip(state_keys, id_ranges)
+            ]
+            for future in futures:
+                future.result()
+
+        self.state.set_state(
+            f'{index_name}_checkpoint',
+            max(
+                (
+                    self.state.get_state(state_key) or shard_checkpoints[state_key]
+                    for state_key in state_keys
+                ),
+                key=checkpoint_position,
+            ),
+        )
+
+    @staticmethod
+    def get_shard_state_keys(index_name: str, shards: int) -> list[str]:
+        return [
+            f'{index_name}_shard_{number}_of_{shards}_checkpoint'
+            for number in range(1, shards + 1)
+        ]
+
+    def rewind_checkpoint(self, index_name: str, checkpoint: dict) -> None:
+        """
+        Moves the checkpoints of the index and of its shards back to the given one, if they
+        are ahead of it.
+        """
+
+        state_keys = [f'{index_name}_checkpoint']
+        if index_name == 'movies' and settings_config.MOVIES_SHARDS > 1:
+            state_keys += self.get_shard_state_keys(
+                index_name, settings_config.MOVIES_SHARDS
+            )
+        for state_key in state_keys:
+            current = self.state.get_state(state_key)
+            if current and checkpoint_position(current) > checkpoint_position(
+                checkpoint
+            ):
+                self.state.set_state(state_key, checkpoint)
+
+    def load_shard(
+        self,
+        index_name: str,
+        state_key: str,
+        checkpoint: dict,
+        id_range: tuple[str, str],
+    ) -> None:
+        pipeline = ETLPipeline(
+            transform=partial(
+                self.transform.transform_movies_data, index_name=index_name
+            ),
+            load=partial(self.save_chunk, index_name, state_key),
+            name=index_name,
+        )
+        with self.connected_extractor() as psql:
+            count = pipeline.run(
+                psql.get_movies_data(checkpoint, index_name, id_range=id_range)
+            )
+        logger.info(
+            'Transferred {} documents of index "{}" ids {}..{}.',
+            count,
+            index_name,
+            *id_range,
+        )
+
+    def propagate_related_updates(
+        self, related_index: str, psql: Optional[PostgresExtractor] = None
+    ) -> None:
+        """
+        Reloads movies whose denormalized persons or genres changed since the last pass.
+        """
+
+        psql = psql or self.psql
+        state_key = f'movies_{related_index}_checkpoint'
+        checkpoint = self.state.get_state(state_key)
+        if not checkpoint:
+            # Without a checkpoint the movies index is (re)loaded from scratch anyway,
+            # so tracking starts from the latest related row.
+            self.state.set_state(
+                state_key,
+                psql.get_latest_checkpoint(related_index) or INITIAL_CHECKPOINT,
+            )
+            return
+
+        pipeline = ETLPipeline(
+            transform=partial(
+                self.transform.transform_movies_data, index_name='movies'
+            ),
+            load=partial(self.save_chunk, 'movies', state_key),
+            name='movies',
+        )
+        try:
+            count = pipeline.run(
+                psql.get_related_movies_data(checkpoint, related_index)
+            )
+            logger.info(
+                'Reloaded {} movies affected by changes in "{}".', count, related_index
+            )
+        except Exception as e:
+            logger.error(
+                'An error occurred while propagating "{}" changes. Error: {}.',
+                related_index,
+                e,
+            )
+            raise
+
+    def load_by_ids(self, index_name: str, ids: list[str]) -> None:
+        """
+        Reloads documents with the given ids without moving any checkpoint.
+        """
+
+        pipeline = ETLPipeline(
+            transform=partial(
+                self.transform.transform_movies_data, index_name=index_name
+            ),
+            load=partial(self.save_chunk, index_name, None),
+            name=index_name,
+        )
+        count = pipeline.run(self.psql.get_data_by_ids(ids, index_name))
+        logger.info('Reloaded {} documents of index "{}" by id.', count, index_name)
+
+    @contextmanager
+    def connected_extractor(self) -> Iterator[PostgresExtractor]:
+        """
+        Yields an extractor with a connection of its own, for work running in a thread.
+        """
+
+        psql = self.create_extractor()
+        psql.connect_to_postgres()
+        try:
+            yield psql
+        finally:
+            psql.cursor.close()
+            psql.connection.close()
+
+    def update_index(
+        self, index_name: str, psql: Optional[PostgresExtractor] = None
+    ) -> None:
+        """
+        Brings one index up to date. Movies first pick up changes of related persons and
+        genres; everything that writes movies runs in this call, so a movie is never loaded
+        by two workers at once.
+        """
+
+        if self.is_paused(index_name):
+            return
+        self.summary.start(index_name)
+        try:
+            if index_name == 'movies':
+                for related_index in MOVIE_RELATED_SQL_QUERIES:
+                    self.propagate_related_updates(related_index, psql)
+                if settings_config.MOVIES_SHARDS > 1:
+                    self.load_sharded_data(
+                        index_name, settings_config.MOVIES_SHARDS, psql
+                    )
+                    return
+            self.load_all_data(index_name, psql=psql)
+        finally:
+            self.summary.finish(index_name)
+
+    def update_index_in_worker(self, index_name: str) -> None:
+        with self.connected_extractor() as psql:
+            self.update_index(index_name, psql)
+
+    def run_pass(self) -> None:
+        """
+        Runs one incremental pass over all indexes, concurrently if PARALLEL_INDEXES is set,
+        so a large movies delta doesn't hold back fresh genres and persons.
+        """
+
+        self.state.refresh()
+        for index_name in ALL_INDEXES:
+            if self.es.create_index(index_name):
+                self.hash_store.clear(index_name)
+        self.summary.reset()
+        try:
+            if settings_config.PARALLEL_INDEXES:
+                with ThreadPoolExecutor(
+                    max_workers=len(ALL_INDEXES), thread_name_prefix='etl'
+                ) as executor:
+                    futures = [
+                        executor.submit(self.update_index_in_worker, index_name)
+                        for index_name in ALL_INDEXES
+                    ]
+                    for future in futures:
+                        future.result()
+            else:
+                for index_name in ALL_INDEXES:
+                    self.update_index(index_name)
+        finally:
+            self.state.flush()
+            self.summary.log()
+            self.export_metrics()
+
+    def export_metrics(self) -> None:
+        """
+        Refreshes the replication lag of every index, which keeps growing while an index
+        receives no changes, and writes the metrics textfile, if configured.
+        """
+
+        for index_name in ALL_INDEXES:
+            observe_checkpoint(index_name, self.get_checkpoint(index_name))
+        export_metrics()
+
+    def process_changes(self, changes: list[dict]) -> None:
+        """
+        Runs incremental loads for the indexes affected by a batch of change notifications.
+        Entity tables move their updated_at, so their regular keyset loads pick the rows up;
+        link tables don't, so the movies and persons they point to are reloaded by id.
+        Changes arriving while the reindex command has paused an index are kept until it
+        is resumed.
+        """
+
+        self.state.refresh()
+        if any([self.is_paused(index_name) for index_name in ALL_INDEXES]):
+            self.deferred_changes += changes
+            return
+        changes, self.deferred_changes = self.deferred_changes + changes, []
+        tables = {change['table'] for change in changes}
+        if 'film_work' in tables:
+            self.load_all_data('movies')
+        for related_index, table in (('genres', 'genre'), ('persons', 'person')):
+            if table in tables:
+                self.propagate_related_updates(related_index)
+                self.load_all_data(related_index)
+
+        for index_name, column in (
+            ('movies', 'film_work_id'),
+            ('persons', 'person_id'),
+        ):
+            ids = list({change[column] for change in changes if column in change})
+            if ids:
+                self.load_by_ids(index_name, ids)
+        self.state.flush()
+
     def run(self):
+        if settings_config.LISTEN_MODE:
+            return self.run_event_driven()
         while True:
             try:
                 self.psql.connect_to_postgres()
                 self.es.connect_to_elastic()
-                for index_name in ALL_INDEXES:
-                    self.es.create_index(index_name)
-                    self.load_all_data(index_name)
+                self.run_pass()
+            except Exception as e:
+                logger.error('An error occurred during ETL process. Error: {}.', e)
+            finally:
+                self.state.flush()
+                self.psql.cursor.close()
+                self.psql.connection.close()
+                time.sleep(settings_config.FREQUENCY)
+
+    def run_event_driven(self):
+        """
+        Loads changes as Postgres announces them. After every (re)connection a regular
+        polling pass catches up with whatever changed while nobody was listening.
+        """
+
+        while True:
+            try:
+                self.psql.connect_to_postgres()
+                self.listener.connect_to_postgres()
+                self.es.connect_to_elastic()
+                self.run_pass()
+                while True:
+                    changes = self.listener.wait_for_changes(settings_config.FREQUENCY)
+                    # Runs without changes too, to acknowledge and end reindex pauses.
+                    self.process_changes(changes)
             except Exception as e:
                 logger.error('An error occurred during ETL process. Error: {}.', e)
             finally:
+                self.state.flush()
+                self.listener.close()
                 self.psql.cursor.close()
                 self.psql.connection.close()
                 time.sleep(settings_config.FREQUENCY)
 
 
 if __name__ == "__main__":
-    etl = ETL()
-    etl.run()
+    start_metrics_server()
+    if settings_config.ETL_MODE == 'async':
+        # Imported here because the async ETL extends the ETL class of this module.
+        from async_etl import AsyncETL
+
+        asyncio.run(AsyncETL().run())
+    else:
+        etl = ETL()
+        etl.run()
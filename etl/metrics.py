@@ -0,0 +1,94 @@
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from configs import loguru_config, settings_config
+from loguru import logger
+from prometheus_client import (
+    REGISTRY,
+    Counter,
+    Gauge,
+    Histogram,
+    start_http_server,
+    write_to_textfile,
+)
+from summary import checkpoint_position
+
+logger.add(**loguru_config)
+
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+STAGE_DURATION = Histogram(
+    'etl_stage_duration_seconds',
+    'Time an ETL pipeline stage spent on one chunk.',
+    ['index', 'stage'],
+    buckets=STAGE_BUCKETS,
+)
+STAGE_ROWS = Counter(
+    'etl_stage_rows_total',
+    'Rows (documents after the transform) that passed an ETL pipeline stage.',
+    ['index', 'stage'],
+)
+SKIPPED_DOCUMENTS = Counter(
+    'etl_skipped_documents_total',
+    'Documents not sent to Elasticsearch because their content did not change.',
+    ['index'],
+)
+BULK_DURATION = Histogram(
+    'etl_bulk_duration_seconds',
+    'Latency of loading one chunk to Elasticsearch, retries included.',
+    ['index'],
+    buckets=STAGE_BUCKETS,
+)
+BULK_REJECTED_DOCUMENTS = Counter(
+    'etl_bulk_rejected_documents_total',
+    'Documents Elasticsearch refused to index: "rejected" ones (429) are retried, '
+    '"failed" ones fail the load.',
+    ['index', 'reason'],
+)
+LAST_LOADED_UPDATED_AT = Gauge(
+    'etl_last_loaded_updated_at_seconds',
+    'The updated_at (unix time) of the newest row loaded to Elasticsearch.',
+    ['index'],
+)
+REPLICATION_LAG = Gauge(
+    'etl_replication_lag_seconds',
+    'Seconds between now and the updated_at of the newest row loaded to Elasticsearch.',
+    ['index'],
+)
+
+
+def observe_stage(index_name: str, stage: str, started_at: float, rows: int) -> None:
+    STAGE_DURATION.labels(index_name, stage).observe(time.perf_counter() - started_at)
+    STAGE_ROWS.labels(index_name, stage).inc(rows)
+
+
+def observe_checkpoint(index_name: str, checkpoint: Optional[dict]) -> None:
+    """
+    Updates the replication lag of the index from the checkpoint of its last loaded row.
+    """
+
+    if not checkpoint:
+        return
+    updated_at, _ = checkpoint_position(checkpoint)
+    if updated_at.year == 1:
+        return
+    LAST_LOADED_UPDATED_AT.labels(index_name).set(updated_at.timestamp())
+    REPLICATION_LAG.labels(index_name).set(
+        (datetime.now(timezone.utc) - updated_at).total_seconds()
+    )
+
+
+def start_metrics_server() -> None:
+    if settings_config.METRICS_PORT:
+        start_http_server(settings_config.METRICS_PORT)
+        logger.info('Serving ETL metrics on port {}', settings_config.METRICS_PORT)
+
+
+def export_metrics() -> None:
+    """
+    Writes the metrics to METRICS_TEXTFILE (for the node exporter textfile collector).
+    """
+
+    if settings_config.METRICS_TEXTFILE:
+        write_to_textfile(settings_config.METRICS_TEXTFILE, REGISTRY)
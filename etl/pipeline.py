@@ -0,0 +1,248 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import aclosing
+from queue import Empty, Full, Queue
+from typing import Any, AsyncIterable, Awaitable, Callable, Iterable
+
+from configs import loguru_config, settings_config
+from loguru import logger
+from metrics import observe_stage
+
+logger.add(**loguru_config)
+
+STAGE_DONE = object()
+QUEUE_POLL_TIMEOUT = 0.1
+
+
+class PipelineStopped(Exception):
+    """Raised inside a stage when another stage of the pipeline has failed."""
+
+
+class ETLPipeline:
+    """
+    A class that runs extract, transform and load as overlapping stages connected by
+    bounded queues. Extraction and transformation work in their own threads while loading
+    happens in the calling thread, so Postgres and Elasticsearch are busy at the same time
+    and full queues apply backpressure to the faster stages. With transform_workers > 1 the
+    transform stage fans chunks out to a process pool, so the transform callable and the
+    rows must be picklable. Time and rows of every stage are recorded in the metrics under
+    the pipeline name.
+    """
+
+    def __init__(
+        self,
+        transform: Callable[[list[dict]], list],
+        load: Callable[[Any, list], None],
+        queue_size: int = settings_config.PIPELINE_QUEUE_SIZE,
+        transform_workers: int = settings_config.TRANSFORM_WORKERS,
+        name: str = 'default',
+    ):
+        self.transform = transform
+        self.load = load
+        self.name = name
+        self.queue_size = queue_size
+        self.transform_workers = transform_workers
+        self._stop = threading.Event()
+        self._errors = []
+
+    def run(self, chunks: Iterable[tuple[Any, list[dict]]]) -> int:
+        """
+        Pushes (checkpoint, rows) chunks through the pipeline and returns the number of
+        loaded documents. Chunks are loaded in extraction order, so the load callback may
+        safely persist every checkpoint it receives. The first error of any stage stops
+        the whole pipeline and is re-raised.
+        """
+
+        self._stop = threading.Event()
+        self._errors = []
+        extracted = Queue(maxsize=self.queue_size)
+        transformed = Queue(maxsize=self.queue_size)
+        workers = [
+            threading.Thread(
+                target=self._run_stage,
+                args=('extract', self._extract, chunks, extracted),
+                daemon=True,
+            ),
+            threading.Thread(
+                target=self._run_stage,
+                args=('transform', self._transform, extracted, transformed),
+                daemon=True,
+            ),
+        ]
+        for worker in workers:
+            worker.start()
+
+        count = self._run_stage('load', self._load, transformed) or 0
+        self._stop.set()
+        for worker in workers:
+            worker.join()
+
+        if self._errors:
+            raise self._errors[0]
+        return count
+
+    def _run_stage(self, name: str, stage: Callable, *args) -> Any:
+        try:
+            return stage(*args)
+        except PipelineStopped:
+            pass
+        except Exception as e:
+            logger.error('Stage "{}" of the ETL pipeline failed. Error: {}.', name, e)
+            self._errors.append(e)
+            self._stop.set()
+
+    def _extract(self, chunks: Iterable, output: Queue) -> None:
+        chunks = iter(chunks)
+        while True:
+            started_at = time.perf_counter()
+            chunk = next(chunks, STAGE_DONE)
+            if chunk is STAGE_DONE:
+                break
+            observe_stage(self.name, 'extract', started_at, len(chunk[1]))
+            self._put(output, chunk)
+        self._put(output, STAGE_DONE)
+
+    def _transform(self, source: Queue, output: Queue) -> None:
+        if self.transform_workers > 1:
+            self._transform_in_processes(source, output)
+            return
+        while (chunk := self._get(source)) is not STAGE_DONE:
+            checkpoint, rows = chunk
+            started_at = time.perf_counter()
+            documents = self.transform(rows)
+            observe_stage(self.name, 'transform', started_at, len(documents))
+            self._put(output, (checkpoint, documents))
+        self._put(output, STAGE_DONE)
+
+    def _transform_in_processes(self, source: Queue, output: Queue) -> None:
+        # Up to transform_workers chunks are transformed at once; results are still
+        # handed over in submission order to keep checkpoints monotonic.
+        in_flight: deque[tuple[Any, float, Future]] = deque()
+        with ProcessPoolExecutor(max_workers=self.transform_workers) as executor:
+            while (chunk := self._get(source)) is not STAGE_DONE:
+                checkpoint, rows = chunk
+                in_flight.append(
+                    (
+                        checkpoint,
+                        time.perf_counter(),
+                        executor.submit(self.transform, rows),
+                    )
+                )
+                if len(in_flight) >= self.transform_workers:
+                    self._put(output, self._collect(*in_flight.popleft()))
+            while in_flight:
+                self._put(output, self._collect(*in_flight.popleft()))
+        self._put(output, STAGE_DONE)
+
+    def _collect(
+        self, checkpoint: Any, submitted_at: float, future: Future
+    ) -> tuple[Any, list]:
+        documents = future.result()
+        observe_stage(self.name, 'transform', submitted_at, len(documents))
+        return checkpoint, documents
+
+    def _load(self, source: Queue) -> int:
+        count = 0
+        while (chunk := self._get(source)) is not STAGE_DONE:
+            checkpoint, documents = chunk
+            started_at = time.perf_counter()
+            self.load(checkpoint, documents)
+            observe_stage(self.name, 'load', started_at, len(documents))
+            count += len(documents)
+        return count
+
+    def _put(self, queue: Queue, item: Any) -> None:
+        while not self._stop.is_set():
+            try:
+                queue.put(item, timeout=QUEUE_POLL_TIMEOUT)
+                return
+            except Full:
+                continue
+        raise PipelineStopped
+
+    def _get(self, queue: Queue) -> Any:
+        while not self._stop.is_set():
+            try:
+                return queue.get(timeout=QUEUE_POLL_TIMEOUT)
+            except Empty:
+                continue
+        raise PipelineStopped
+
+
+class AsyncETLPipeline:
+    """
+    An asyncio counterpart of ETLPipeline. Extract, transform and load run as tasks of one
+    event loop connected by bounded queues; the CPU-bound transform is moved to a worker
+    thread, so it doesn't stall the I/O of other pipelines running on the same loop.
+    """
+
+    def __init__(
+        self,
+        transform: Callable[[list[dict]], list],
+        load: Callable[[Any, list], Awaitable[None]],
+        queue_size: int = settings_config.PIPELINE_QUEUE_SIZE,
+        name: str = 'default',
+    ):
+        self.transform = transform
+        self.load = load
+        self.queue_size = queue_size
+        self.name = name
+
+    async def run(self, chunks: AsyncIterable[tuple[Any, list[dict]]]) -> int:
+        """
+        Pushes (checkpoint, rows) chunks through the pipeline in order and returns the
+        number of loaded documents. The first error of any stage cancels the others and
+        is re-raised.
+        """
+
+        extracted = asyncio.Queue(maxsize=self.queue_size)
+        transformed = asyncio.Queue(maxsize=self.queue_size)
+        tasks = [
+            asyncio.create_task(self._extract(chunks, extracted)),
+            asyncio.create_task(self._transform(extracted, transformed)),
+            asyncio.create_task(self._load(transformed)),
+        ]
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in tasks:
+            if task in done and task.exception():
+                logger.error(
+                    'A stage of the async ETL pipeline failed. Error: {}.',
+                    task.exception(),
+                )
+                raise task.exception()
+        return tasks[-1].result()
+
+    async def _extract(self, chunks: AsyncIterable, output: asyncio.Queue) -> None:
+        # Closing the generator on cancellation releases its connection right away.
+        async with aclosing(chunks):
+            started_at = time.perf_counter()
+            async for chunk in chunks:
+                observe_stage(self.name, 'extract', started_at, len(chunk[1]))
+                await output.put(chunk)
+                started_at = time.perf_counter()
+        await output.put(STAGE_DONE)
+
+    async def _transform(self, source: asyncio.Queue, output: asyncio.Queue) -> None:
+        while (chunk := await source.get()) is not STAGE_DONE:
+            checkpoint, rows = chunk
+            started_at = time.perf_counter()
+            documents = await asyncio.to_thread(self.transform, rows)
+            observe_stage(self.name, 'transform', started_at, len(documents))
+            await output.put((checkpoint, documents))
+        await output.put(STAGE_DONE)
+
+    async def _load(self, source: asyncio.Queue) -> int:
+        count = 0
+        while (chunk := await source.get()) is not STAGE_DONE:
+            checkpoint, documents = chunk
+            started_at = time.perf_counter()
+            await self.load(checkpoint, documents)
+            observe_stage(self.name, 'load', started_at, len(documents))
+            count += len(documents)
+        return count
@@ -1,5 +1,5 @@
-from datetime import datetime
-from typing import Generator
+import uuid
+from typing import Generator, Optional
 
 import psycopg2
 from backoff import expo, on_exception
@@ -16,11 +16,25 @@ class PostgresExtractor:
     A class that extracts data from a Postgres database using a provided SQL query.
     """
 
-    def __init__(self, dsn: str, all_queries: dict[str]):
+    def __init__(
+        self,
+        dsn: str,
+        all_queries: dict[str],
+        count_queries: dict[str],
+        related_queries: dict[str, dict[str]],
+        by_ids_queries: dict[str],
+        sharded_queries: dict[str],
+        sharded_count_queries: dict[str],
+    ):
         self.cursor = None
         self.connection = None
         self.dsn = dsn
         self.all_queries = all_queries
+        self.count_queries = count_queries
+        self.related_queries = related_queries
+        self.by_ids_queries = by_ids_queries
+        self.sharded_queries = sharded_queries
+        self.sharded_count_queries = sharded_count_queries
 
     @on_exception(
         expo, OperationalError, max_tries=settings_config.MAX_TRIES, logger=logger
@@ -41,24 +55,187 @@ class PostgresExtractor:
         max_tries=settings_config.MAX_TRIES,
         logger=logger,
     )
-    def get_movies_data(
+    def count_rows(
         self,
-        latest_updated_at: datetime,
+        checkpoint: dict,
         index_name: str,
-        chunk_size: int = settings_config.CHUNK_SIZE,
-    ) -> Generator:
+        id_range: Optional[tuple[str, str]] = None,
+    ) -> int:
         """
-        Retrieves movies data from PostgreSQL using the provided SQL query.
+        Counts rows of the index source table that are newer than the given checkpoint,
+        only within the (inclusive) id range if one is given.
         """
 
+        query = self.count_queries[index_name]
+        if id_range:
+            query = self.sharded_count_queries[index_name]
         self.cursor.execute(
-            query=self.all_queries[index_name], vars=(latest_updated_at,)
+            query=query,
+            vars=(checkpoint['updated_at'], checkpoint['id'], *(id_range or ())),
         )
+        return self.cursor.fetchone()['count']
+
+    @on_exception(
+        expo,
+        (DatabaseError, ProgrammingError),
+        max_tries=settings_config.MAX_TRIES,
+        logger=logger,
+    )
+    def get_movies_data(
+        self,
+        checkpoint: dict,
+        index_name: str,
+        chunk_size: int = settings_config.CHUNK_SIZE,
+        id_range: Optional[tuple[str, str]] = None,
+    ) -> Generator[tuple[dict, list[dict]], None, None]:
+        """
+        Retrieves movies data from PostgreSQL page by page, starting right after the given
+        (updated_at, id) checkpoint. Every chunk is yielded together with the checkpoint
+        of its last row, so the caller can persist it once the chunk has been loaded.
+        With an id_range only rows whose ids fall into the (inclusive) range are read.
+        """
+
+        query = self.all_queries[index_name]
+        if id_range:
+            query = self.sharded_queries[index_name]
         while True:
-            rows = self.cursor.fetchmany(chunk_size)
+            self.cursor.execute(
+                query=query,
+                vars=(
+                    checkpoint['updated_at'],
+                    checkpoint['id'],
+                    *(id_range or ()),
+                    chunk_size,
+                ),
+            )
+            rows = self.cursor.fetchall()
             logger.info(
                 'Fetched {} rows of index "{}" from PostgreSQL', len(rows), index_name
             )
             if not rows:
                 break
-            yield rows
+            checkpoint = self.make_checkpoint(rows[-1])
+            yield checkpoint, rows
+            if len(rows) < chunk_size:
+                break
+
+    @on_exception(
+        expo,
+        (DatabaseError, ProgrammingError),
+        max_tries=settings_config.MAX_TRIES,
+        logger=logger,
+    )
+    def get_latest_checkpoint(self, related_index: str) -> Optional[dict]:
+        """
+        Returns the checkpoint of the most recently updated row of a related table.
+        """
+
+        self.cursor.execute(query=self.related_queries[related_index]['latest_row'])
+        row = self.cursor.fetchone()
+        return self.make_checkpoint(row) if row else None
+
+    @on_exception(
+        expo,
+        (DatabaseError, ProgrammingError),
+        max_tries=settings_config.MAX_TRIES,
+        logger=logger,
+    )
+    def get_related_movies_data(
+        self,
+        checkpoint: dict,
+        related_index: str,
+        chunk_size: int = settings_config.CHUNK_SIZE,
+    ) -> Generator[tuple[Optional[dict], list[dict]], None, None]:
+        """
+        Retrieves movies whose persons or genres changed after the given checkpoint. Changed
+        rows of the related table are read in batches, mapped to film work ids through the
+        link table and the affected movies are fetched in chunks. Only the last chunk of a
+        batch carries the batch checkpoint, the others carry None.
+        """
+
+        queries = self.related_queries[related_index]
+        while True:
+            self.cursor.execute(
+                query=queries['changed_rows'],
+                vars=(checkpoint['updated_at'], checkpoint['id'], chunk_size),
+            )
+            related_rows = self.cursor.fetchall()
+            if not related_rows:
+                break
+            checkpoint = self.make_checkpoint(related_rows[-1])
+
+            self.cursor.execute(
+                query=queries['movies_ids'],
+                vars=([row['id'] for row in related_rows],),
+            )
+            movies_ids = [row['film_work_id'] for row in self.cursor.fetchall()]
+            logger.info(
+                'Found {} changed rows of index "{}" affecting {} movies',
+                len(related_rows),
+                related_index,
+                len(movies_ids),
+            )
+            if not movies_ids:
+                yield checkpoint, []
+            for start in range(0, len(movies_ids), chunk_size):
+                self.cursor.execute(
+                    query=queries['movies'],
+                    vars=(movies_ids[start : start + chunk_size],),
+                )
+                is_last_chunk = start + chunk_size >= len(movies_ids)
+                yield checkpoint if is_last_chunk else None, self.cursor.fetchall()
+
+            if len(related_rows) < chunk_size:
+                break
+
+    @on_exception(
+        expo,
+        (DatabaseError, ProgrammingError),
+        max_tries=settings_config.MAX_TRIES,
+        logger=logger,
+    )
+    def get_data_by_ids(
+        self,
+        ids: list[str],
+        index_name: str,
+        chunk_size: int = settings_config.CHUNK_SIZE,
+    ) -> Generator[tuple[None, list[dict]], None, None]:
+        """
+        Retrieves rows of the index with the given ids in chunks. Loading them doesn't
+        move any checkpoint, so every chunk carries None instead of one.
+        """
+
+        for start in range(0, len(ids), chunk_size):
+            self.cursor.execute(
+                query=self.by_ids_queries[index_name],
+                vars=(ids[start : start + chunk_size],),
+            )
+            rows = self.cursor.fetchall()
+            logger.info(
+                'Fetched {} rows of index "{}" by id from PostgreSQL',
+                len(rows),
+                index_name,
+            )
+            yield None, rows
+
+    @staticmethod
+    def split_id_range(shards: int) -> list[tuple[str, str]]:
+        """
+        Splits the UUID space into the given number of equal, inclusive id ranges.
+        """
+
+        max_id = 2**128 - 1
+        step = (max_id + 1) // shards
+        bounds = [number * step for number in range(shards)] + [max_id + 1]
+        return [
+            (str(uuid.UUID(int=lower)), str(uuid.UUID(int=upper - 1)))
+            for lower, upper in zip(bounds, bounds[1:])
+        ]
+
+    @staticmethod
+    def make_checkpoint(row: dict) -> dict:
+        """
+        Builds a JSON-serializable keyset checkpoint from a fetched row.
+        """
+
+        return {'updated_at': row['updated_at'].isoformat(), 'id': str(row['id'])}
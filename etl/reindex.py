@@ -0,0 +1,198 @@
+import argparse
+import time
+from uuid import uuid4
+
+from configs import loguru_config, settings_config
+from indexes import ALL_INDEXES
+from loguru import logger
+from main import ETL, INITIAL_CHECKPOINT
+from sql_queries import MOVIE_RELATED_SQL_QUERIES
+
+logger.add(**loguru_config)
+
+PAUSE_POLL_INTERVAL = 1
+
+
+class ReindexValidationError(Exception):
+    """Raised when a rebuilt index doesn't contain every row of its source table."""
+
+
+class ReindexPauseError(Exception):
+    """Raised when the regular ETL doesn't confirm that it has paused the index in time."""
+
+
+class Reindexer:
+    """
+    A class that rebuilds an index as a new version (e.g. movies_v2) next to the live one
+    and atomically switches the alias the API reads from once the new version is complete.
+    """
+
+    def __init__(self, etl: ETL):
+        self.etl = etl
+
+    def reindex(
+        self, alias: str, keep_old: bool = False, pause_live_etl: bool = True
+    ) -> None:
+        """
+        Builds the next version of the index, validates it against Postgres, swaps the
+        alias and, unless keep_old is set, deletes the previous versions. An unfinished
+        build left by an interrupted run is resumed from its own checkpoint.
+
+        The regular ETL keeps loading the old index during the build. It is paused for the
+        last catch-up and the swap, so it writes neither documents into the old index nor
+        checkpoints and hashes of the alias until the new index has taken over.
+        """
+
+        target_index = self.prepare_target_index(alias)
+        related_checkpoints = self.get_related_checkpoints(alias)
+        self.build(alias, target_index)
+
+        try:
+            if pause_live_etl:
+                self.pause_live_etl(alias)
+                self.build(alias, target_index, bulk_load=False)
+            old_indices = self.etl.es.swap_alias(alias, target_index)
+            self.etl.hash_store.move(target_index, alias)
+            # The regular ETL kept advancing the live checkpoints during the build.
+            self.etl.state.refresh()
+            self.sync_live_checkpoint(alias, target_index)
+            for state_key, checkpoint in related_checkpoints.items():
+                self.etl.state.set_state(state_key, checkpoint)
+            self.etl.state.flush()
+        finally:
+            if pause_live_etl:
+                self.resume_live_etl(alias)
+        if not keep_old:
+            for old_index in old_indices:
+                self.etl.es.delete_index(old_index)
+        logger.info('Reindexing of "{}" into "{}" is complete.', alias, target_index)
+
+    def prepare_target_index(self, alias: str) -> str:
+        latest_version = self.etl.es.get_latest_version(alias)
+        latest_index = f'{alias}_v{latest_version}'
+        if latest_version and latest_index not in self.etl.es.get_alias_indices(alias):
+            logger.info('Resuming the unfinished build of index "{}".', latest_index)
+            return latest_index
+        target_index = self.etl.es.create_versioned_index(alias, latest_version + 1)
+        self.etl.state.set_state(f'{target_index}_checkpoint', INITIAL_CHECKPOINT)
+        self.etl.hash_store.clear(target_index)
+        return target_index
+
+    def build(self, alias: str, target_index: str, bulk_load: bool = True) -> None:
+        """
+        Loads the whole source table into the target index, then repeats incremental
+        catch-up passes until the document count matches the table row count, so rows
+        changed while the bulk load was running end up in the new index too.
+        """
+
+        for attempt in range(1, settings_config.REINDEX_MAX_CATCH_UPS + 1):
+            self.etl.load_all_data(
+                alias,
+                target_index=target_index,
+                force_bulk_load=bulk_load and attempt == 1,
+            )
+            expected = self.etl.psql.count_rows(INITIAL_CHECKPOINT, alias)
+            actual = self.etl.es.count_documents(target_index)
+            if actual == expected:
+                logger.info(
+                    'Index "{}" holds all {} rows of its source table.',
+                    target_index,
+                    expected,
+                )
+                return
+            logger.warning(
+                'Index "{}" holds {} documents while Postgres has {} rows, catching up.',
+                target_index,
+                actual,
+                expected,
+            )
+        raise ReindexValidationError(
+            f'Index "{target_index}" does not match its source table after '
+            f'{settings_config.REINDEX_MAX_CATCH_UPS} passes, the alias is left untouched.'
+        )
+
+    def pause_live_etl(self, alias: str) -> None:
+        """
+        Asks the regular ETL to stop loading the index and waits until it confirms, which
+        it does at the start of its next pass, once no load of the index is running. Every
+        pause has a token of its own, so the confirmation of an earlier run doesn't count.
+        """
+
+        token = uuid4().hex
+        self.etl.state.set_state(f'{alias}_paused', token)
+        self.etl.state.flush()
+        logger.info('Waiting for the regular ETL to pause index "{}".', alias)
+        deadline = time.monotonic() + settings_config.REINDEX_PAUSE_TIMEOUT
+        while self.etl.state.get_state(f'{alias}_paused_ack') != token:
+            if time.monotonic() >= deadline:
+                raise ReindexPauseError(
+                    f'The regular ETL has not paused index "{alias}" in '
+                    f'{settings_config.REINDEX_PAUSE_TIMEOUT} seconds, the alias is left '
+                    'untouched.'
+                )
+            time.sleep(PAUSE_POLL_INTERVAL)
+            self.etl.state.refresh()
+
+    def resume_live_etl(self, alias: str) -> None:
+        self.etl.state.set_state(f'{alias}_paused', None)
+        self.etl.state.flush()
+
+    def get_related_checkpoints(self, alias: str) -> dict[str, dict]:
+        """
+        Captures the person/genre propagation checkpoints before the build. They are put
+        back after the swap, so changes propagated to the old index during the build are
+        propagated to the new one as well.
+        """
+
+        if alias != 'movies':
+            return {}
+        state_keys = [
+            f'movies_{related}_checkpoint' for related in MOVIE_RELATED_SQL_QUERIES
+        ]
+        return {
+            state_key: checkpoint
+            for state_key in state_keys
+            if (checkpoint := self.etl.state.get_state(state_key))
+        }
+
+    def sync_live_checkpoint(self, alias: str, target_index: str) -> None:
+        """
+        Rewinds the checkpoints of the regular ETL to the one of the new index if they are
+        ahead, so rows loaded into the old index between the last catch-up pass and the
+        alias swap are loaded again.
+        """
+
+        self.etl.rewind_checkpoint(alias, self.etl.get_checkpoint(target_index))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description='Rebuild an Elasticsearch index without downtime.'
+    )
+    parser.add_argument('index', choices=list(ALL_INDEXES))
+    parser.add_argument(
+        '--keep-old',
+        action='store_true',
+        help='keep the previous index version after switching the alias',
+    )
+    parser.add_argument(
+        '--no-pause',
+        action='store_true',
+        help="don't wait for the regular ETL to pause the index, when it isn't running",
+    )
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    etl = ETL()
+    etl.psql.connect_to_postgres()
+    etl.es.connect_to_elastic()
+    try:
+        Reindexer(etl).reindex(
+            args.index, keep_old=args.keep_old, pause_live_etl=not args.no_pause
+        )
+    finally:
+        etl.state.flush()
+        etl.psql.cursor.close()
+        etl.psql.connection.close()
@@ -1,8 +1,8 @@
-from datetime import date
-from typing import Optional
+from datetime import date, datetime
+from typing import Literal, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, Field, PostgresDsn
+from pydantic import BaseModel, Field, PostgresDsn, root_validator
 from pydantic.env_settings import BaseSettings
 
 
@@ -48,8 +48,53 @@ class CustomSettings(BaseSettings):
     CHUNK_SIZE: int = Field(200)
     FREQUENCY: int = Field(60)
     STATE_FILE_NAME: str = Field('movies_state.json')
+    STATE_BACKEND: Literal['json', 'sqlite', 'redis'] = Field('json')
+    STATE_SQLITE_PATH: str = Field('etl_state.sqlite')
+    STATE_REDIS_URL: str = Field('redis://redis:6379/0')
+    STATE_REDIS_KEY: str = Field('etl_state')
+    STATE_FLUSH_INTERVAL: float = Field(5)
+    STATE_FLUSH_EVERY: int = Field(50)
     INDEX_NAME: str = Field('movies')
-    MAX_TRIES = int = Field(5)
+    MAX_TRIES: int = Field(5)
+    PIPELINE_QUEUE_SIZE: int = Field(4)
+    TRANSFORM_WORKERS: int = Field(1)
+    PARALLEL_INDEXES: bool = Field(True)
+    MOVIES_SHARDS: int = Field(1)
+    ETL_MODE: Literal['sync', 'async'] = Field('sync')
+    ASYNC_PG_POOL_SIZE: int = Field(4)
+    METRICS_PORT: Optional[int] = Field(None)
+    METRICS_TEXTFILE: Optional[str] = Field(None)
+    STRICT_VALIDATION: bool = Field(False)
+    BULK_MODE: Literal['bulk', 'streaming', 'parallel'] = Field('bulk')
+    BULK_THREAD_COUNT: int = Field(4)
+    BULK_CHUNK_SIZE: int = Field(500)
+    BULK_MAX_CHUNK_BYTES: int = Field(10 * 1024 * 1024)
+    BULK_MAX_RETRIES: int = Field(3)
+    BULK_INITIAL_BACKOFF: float = Field(2)
+    BULK_MAX_BACKOFF: float = Field(60)
+    BULK_LOAD_THRESHOLD: int = Field(10000)
+    BULK_LOAD_FORCE: bool = Field(False)
+    BULK_LOAD_FORCE_MERGE: bool = Field(False)
+    REINDEX_MAX_CATCH_UPS: int = Field(3)
+    REINDEX_PAUSE_TIMEOUT: float = Field(600)
+    LISTEN_MODE: bool = Field(False)
+    LISTEN_CHANNEL: str = Field('content_changes')
+    LISTEN_INSTALL_TRIGGERS: bool = Field(True)
+    LISTEN_BATCH_WINDOW: float = Field(1)
+    LISTEN_MAX_BATCH: int = Field(1000)
+    SKIP_UNCHANGED: bool = Field(True)
+    HASH_STORE_PATH: str = Field('document_hashes.sqlite')
+
+    @root_validator(skip_on_failure=True)
+    def check_async_mode(cls, values: dict) -> dict:
+        # The async ETL only polls and loads the movies index in one stream.
+        if values['ETL_MODE'] == 'async' and (
+            values['LISTEN_MODE'] or values['MOVIES_SHARDS'] > 1
+        ):
+            raise ValueError(
+                'ETL_MODE=async supports neither LISTEN_MODE nor MOVIES_SHARDS > 1'
+            )
+        return values
 
 
 class ShortPersonData(BaseModel):
@@ -76,6 +121,7 @@ class MovieData(BaseModel):
     genres: list[GenreData]
     title: str
     file_path: Optional[str] = None
+    updated_at: Optional[datetime] = None
     description: Optional[str] = None
     directors_names: list[str] = []
     actors_names: list[str] = []
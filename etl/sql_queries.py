@@ -1,4 +1,31 @@
-MOVIE_SQL_QUERY = """
+MIN_UUID = '00000000-0000-0000-0000-000000000000'
+
+# Every extraction query pages through its table by the (updated_at, id) keyset:
+# rows are strictly ordered, so the last row of a loaded chunk is a precise checkpoint
+# to resume from, even when many rows share the same updated_at.
+KEYSET_CONDITION = '({table}.updated_at, {table}.id) > (%s::timestamptz, %s::uuid)'
+KEYSET_ORDER = 'ORDER BY {table}.updated_at, {table}.id LIMIT %s'
+# Sharded loads split a table into disjoint id ranges, each paged by its own keyset.
+ID_RANGE_CONDITION = '{table}.id BETWEEN %s::uuid AND %s::uuid'
+# Aggregating queries pick the ids of a page from the table first, so only the rows of
+# that page are joined and aggregated instead of the whole table on every page.
+KEYSET_PAGE_CONDITION = """{table}.id = ANY(ARRAY(
+        SELECT {table}.id FROM content.{table}
+        WHERE {condition}
+        {order}
+    ))"""
+PAGE_ORDER = 'ORDER BY {table}.updated_at, {table}.id'
+
+
+def keyset_page_condition(table: str, condition: str = KEYSET_CONDITION) -> str:
+    return KEYSET_PAGE_CONDITION.format(
+        table=table,
+        condition=condition.format(table=table),
+        order=KEYSET_ORDER.format(table=table),
+    )
+
+
+MOVIE_SELECT = """
     SELECT
         film_work.id,
         film_work.title,
@@ -28,38 +55,59 @@ MOVIE_SQL_QUERY = """
     LEFT JOIN content.person ON person.id = person_film_work.person_id
     LEFT JOIN content.genre_film_work ON genre_film_work.film_work_id = film_work.id
     LEFT JOIN content.genre ON genre.id = genre_film_work.genre_id
-    WHERE film_work.updated_at > %s
+"""
+
+MOVIE_SQL_QUERY = f"""{MOVIE_SELECT}
+    WHERE {keyset_page_condition('film_work')}
+    GROUP BY film_work.id
+    {PAGE_ORDER.format(table='film_work')}
+"""
+
+MOVIE_SHARD_SQL_QUERY = f"""{MOVIE_SELECT}
+    WHERE {keyset_page_condition(
+        'film_work', f'{KEYSET_CONDITION} AND {ID_RANGE_CONDITION}'
+    )}
+    GROUP BY film_work.id
+    {PAGE_ORDER.format(table='film_work')}
+"""
+
+MOVIES_BY_IDS_SQL_QUERY = f"""{MOVIE_SELECT}
+    WHERE film_work.id = ANY(%s::uuid[])
     GROUP BY film_work.id
 """
 
-GENRE_SQL_QUERY = """
+GENRE_SQL_QUERY = f"""
     SELECT
         genre.id,
         genre.name,
         genre.description,
         genre.updated_at
     FROM content.genre
-    WHERE genre.updated_at > %s;
+    WHERE {KEYSET_CONDITION.format(table='genre')}
+    {KEYSET_ORDER.format(table='genre')}
 """
 
-PERSON_SQL_QUERY = """
+PERSON_SELECT = """
     SELECT
         person.id,
         person.full_name,
         person.updated_at,
-        COALESCE (json_agg(
-        DISTINCT jsonb_build_object(
-           'id', film_work.id,
-           'title', film_work.title,
-           'rating', film_work.rating,
-           'type', film_work.type
-       )
-   ) FILTER (WHERE film_work.id is not null), '[]') as all_movies,
-    array_agg(DISTINCT person_film_work.role) as roles
+        COALESCE (array_agg(DISTINCT person_film_work.film_work_id::text)
+        FILTER (WHERE person_film_work.film_work_id is not null), '{}') as movies_ids,
+        COALESCE (array_agg(DISTINCT person_film_work.role)
+        FILTER (WHERE person_film_work.role is not null), '{}') as roles
     FROM content.person
     LEFT JOIN content.person_film_work ON person_film_work.person_id = person.id
-    LEFT JOIN content.film_work ON film_work.id = person_film_work.film_work_id
-    WHERE person.updated_at > %s
+"""
+
+PERSON_SQL_QUERY = f"""{PERSON_SELECT}
+    WHERE {keyset_page_condition('person')}
+    GROUP BY person.id
+    {PAGE_ORDER.format(table='person')}
+"""
+
+PERSONS_BY_IDS_SQL_QUERY = f"""{PERSON_SELECT}
+    WHERE person.id = ANY(%s::uuid[])
     GROUP BY person.id
 """
 
@@ -68,3 +116,118 @@ ALL_SQL_QUERIES = {
     'genres': GENRE_SQL_QUERY,
     'persons': PERSON_SQL_QUERY,
 }
+
+ALL_SHARDED_SQL_QUERIES = {
+    'movies': MOVIE_SHARD_SQL_QUERY,
+}
+
+ALL_BY_IDS_SQL_QUERIES = {
+    'movies': MOVIES_BY_IDS_SQL_QUERY,
+    'persons': PERSONS_BY_IDS_SQL_QUERY,
+}
+
+INDEX_TABLES = {
+    'movies': 'film_work',
+    'genres': 'genre',
+    'persons': 'person',
+}
+
+ALL_COUNT_QUERIES = {
+    index_name: f"""
+    SELECT count(*)
+    FROM content.{table}
+    WHERE {KEYSET_CONDITION.format(table=table)}
+"""
+    for index_name, table in INDEX_TABLES.items()
+}
+
+ALL_SHARDED_COUNT_QUERIES = {
+    index_name: f"""{ALL_COUNT_QUERIES[index_name]}
+    AND {ID_RANGE_CONDITION.format(table=INDEX_TABLES[index_name])}
+"""
+    for index_name in ALL_SHARDED_SQL_QUERIES
+}
+
+# Persons and genres are denormalized into movie documents, so their changes are tracked
+# with their own keyset and mapped to the affected film works through the link tables.
+CHANGED_ROWS_SQL_QUERY = f"""
+    SELECT {{table}}.id, {{table}}.updated_at
+    FROM content.{{table}}
+    WHERE {KEYSET_CONDITION}
+    {KEYSET_ORDER}
+"""
+
+LATEST_ROW_SQL_QUERY = """
+    SELECT {table}.id, {table}.updated_at
+    FROM content.{table}
+    ORDER BY {table}.updated_at DESC, {table}.id DESC
+    LIMIT 1
+"""
+
+RELATED_MOVIES_IDS_SQL_QUERY = """
+    SELECT DISTINCT {table}_film_work.film_work_id
+    FROM content.{table}_film_work
+    WHERE {table}_film_work.{table}_id = ANY(%s::uuid[])
+"""
+
+MOVIE_RELATED_SQL_QUERIES = {
+    index_name: {
+        'changed_rows': CHANGED_ROWS_SQL_QUERY.format(table=table),
+        'latest_row': LATEST_ROW_SQL_QUERY.format(table=table),
+        'movies_ids': RELATED_MOVIES_IDS_SQL_QUERY.format(table=table),
+        'movies': MOVIES_BY_IDS_SQL_QUERY,
+    }
+    for index_name, table in (('persons', 'person'), ('genres', 'genre'))
+}
+
+# Change feed for the event-driven mode: every change of a content table notifies the
+# channel with the table name and the columns passed as trigger arguments (ids only, so
+# payloads stay far below the 8000 bytes NOTIFY limit).
+NOTIFY_FUNCTION_SQL = """
+    CREATE OR REPLACE FUNCTION content.notify_change() RETURNS trigger AS $$
+    DECLARE
+        changed_row jsonb;
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            changed_row := to_jsonb(OLD);
+        ELSE
+            changed_row := to_jsonb(NEW);
+        END IF;
+        PERFORM pg_notify(
+            TG_ARGV[0],
+            (jsonb_build_object('table', TG_TABLE_NAME) || (
+                SELECT jsonb_object_agg(key, value)
+                FROM jsonb_each(changed_row)
+                WHERE key = ANY(TG_ARGV[1:])
+            ))::text
+        );
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+"""
+
+NOTIFY_TRIGGER_SQL = """
+    CREATE OR REPLACE TRIGGER notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON content.{table}
+    FOR EACH ROW EXECUTE FUNCTION content.notify_change('{channel}', {columns});
+"""
+
+NOTIFY_TABLE_COLUMNS = {
+    'film_work': ('id',),
+    'genre': ('id',),
+    'person': ('id',),
+    'genre_film_work': ('film_work_id',),
+    'person_film_work': ('film_work_id', 'person_id'),
+}
+
+
+def build_notify_triggers_sql(channel: str) -> str:
+    triggers = [
+        NOTIFY_TRIGGER_SQL.format(
+            table=table,
+            channel=channel,
+            columns=', '.join(f"'{column}'" for column in columns),
+        )
+        for table, columns in NOTIFY_TABLE_COLUMNS.items()
+    ]
+    return NOTIFY_FUNCTION_SQL + ''.join(triggers)
@@ -1,9 +1,18 @@
 import abc
 import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
 from typing import Any, Optional
 
-from configs import loguru_config
+from backoff import expo, on_exception
+from configs import loguru_config, settings_config
 from loguru import logger
+from redis import ConnectionError as RedisConnectionError
+from redis import Redis
+from summary import checkpoint_position
 
 logger.add(**loguru_config)
 
@@ -11,7 +20,9 @@ logger.add(**loguru_config)
 class BaseStorage:
     @abc.abstractmethod
     def save_state(self, state: dict) -> None:
-        pass
+        """
+        Saves the given keys, leaving the other stored keys as they are.
+        """
 
     @abc.abstractmethod
     def retrieve_state(self) -> dict:
@@ -27,11 +38,25 @@ class JsonFileStorage(BaseStorage):
         self.file_path = file_path
 
     def save_state(self, state: dict) -> None:
+        """
+        Writes the merged state to a temporary file next to the state file and renames it
+        over the old one, so a crash mid-write never leaves a truncated state behind.
+        """
+
+        merged_state = {**self.retrieve_state(), **state}
+        directory = os.path.dirname(os.path.abspath(self.file_path))
+        descriptor, temp_path = tempfile.mkstemp(
+            dir=directory, prefix='.state-', suffix='.tmp'
+        )
         try:
-            with open(self.file_path, 'w') as f:
-                json.dump(state, f)
-        except FileNotFoundError as e:
-            logger.error('The file {} has not been found. Error: {}', self.file_path, e)
+            with os.fdopen(descriptor, 'w') as f:
+                json.dump(merged_state, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.file_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
 
     def retrieve_state(self) -> dict:
         state = {}
@@ -43,20 +68,188 @@ class JsonFileStorage(BaseStorage):
         return state
 
 
+class SQLiteStorage(BaseStorage):
+    """
+    A class that keeps every state key in its own row of a SQLite table, so several ETL
+    processes on one host can share a state file.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.connection = sqlite3.connect(file_path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS etl_state (key TEXT PRIMARY KEY, value TEXT)'
+        )
+
+    def save_state(self, state: dict) -> None:
+        with self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO etl_state (key, value) VALUES (?, ?)',
+                [(key, json.dumps(value)) for key, value in state.items()],
+            )
+
+    def retrieve_state(self) -> dict:
+        rows = self.connection.execute('SELECT key, value FROM etl_state')
+        return {key: json.loads(value) for key, value in rows}
+
+
+class RedisStorage(BaseStorage):
+    """
+    A class that keeps the state in a Redis hash, one field per key, so ETL instances on
+    different hosts can share it.
+    """
+
+    def __init__(self, url: str, key: str):
+        self.connection = Redis.from_url(url)
+        self.key = key
+
+    @on_exception(
+        expo,
+        RedisConnectionError,
+        max_tries=settings_config.MAX_TRIES,
+        logger=logger,
+    )
+    def save_state(self, state: dict) -> None:
+        self.connection.hset(
+            self.key,
+            mapping={key: json.dumps(value) for key, value in state.items()},
+        )
+
+    @on_exception(
+        expo,
+        RedisConnectionError,
+        max_tries=settings_config.MAX_TRIES,
+        logger=logger,
+    )
+    def retrieve_state(self) -> dict:
+        return {
+            key.decode(): json.loads(value)
+            for key, value in self.connection.hgetall(self.key).items()
+        }
+
+
 class State:
     """
     A class that manages application state by delegating data persistence to a storage object.
+    The state is read from the storage and served from memory until the next refresh(),
+    which the ETL calls at the start of every pass, so keys written by other processes in
+    between (e.g. checkpoints rewound by the reindex command) are seen. Changed keys are
+    written back every flush_every changes or flush_interval seconds, whichever comes
+    first, and on an explicit flush().
+
+    A checkpoint (a *_checkpoint key) changed in the storage by another process since this
+    one last read or wrote it is merged on flush instead of overwritten: the lower of both
+    positions is kept, so rows are loaded again rather than skipped.
     """
 
-    def __init__(self, storage: BaseStorage):
+    def __init__(
+        self,
+        storage: BaseStorage,
+        flush_interval: float = settings_config.STATE_FLUSH_INTERVAL,
+        flush_every: int = settings_config.STATE_FLUSH_EVERY,
+    ):
         self.storage = storage
-        self.state = {}
+        self.flush_interval = flush_interval
+        self.flush_every = flush_every
+        self.state = None
+        # The values this process last read from or wrote to the storage.
+        self.stored = {}
+        # Checkpoints another process moved; merged on every flush until the next refresh.
+        self.conflicts = set()
+        self.changed = {}
+        self.changes_count = 0
+        self.flushed_at = time.monotonic()
+        self.lock = threading.RLock()
 
     def set_state(self, key: str, value: Any) -> None:
-        if self.state is not None:
+        with self.lock:
+            self.load()
             self.state[key] = value
-            self.storage.save_state(self.state)
+            self.changed[key] = value
+            self.changes_count += 1
+            if (
+                self.changes_count >= self.flush_every
+                or time.monotonic() - self.flushed_at >= self.flush_interval
+            ):
+                self.flush()
 
     def get_state(self, key: str) -> Any:
+        with self.lock:
+            self.load()
+            return self.state.get(key)
+
+    def load(self) -> None:
+        if self.state is None:
+            self.read()
+
+    def read(self) -> None:
         self.state = self.storage.retrieve_state()
-        return self.state.get(key)
+        self.stored = dict(self.state)
+        self.conflicts = set()
+
+    def refresh(self) -> None:
+        """
+        Writes the pending changes and reads the state from the storage again.
+        """
+
+        with self.lock:
+            self.flush()
+            self.read()
+
+    def flush(self) -> None:
+        """
+        Writes the keys changed since the last flush to the storage.
+        """
+
+        with self.lock:
+            if self.changed:
+                changes = self.merge_changes()
+                if changes:
+                    self.storage.save_state(changes)
+                    self.stored.update(changes)
+                self.changed = {}
+            self.changes_count = 0
+            self.flushed_at = time.monotonic()
+
+    def merge_changes(self) -> dict:
+        """
+        Drops the changed checkpoints that are ahead of a checkpoint another process has
+        written since this one last saw it, and takes the stored one over instead.
+        """
+
+        checkpoint_keys = [key for key in self.changed if key.endswith('_checkpoint')]
+        if not checkpoint_keys:
+            return self.changed
+        stored_state = self.storage.retrieve_state()
+        changes = dict(self.changed)
+        for key in checkpoint_keys:
+            stored = stored_state.get(key)
+            if not stored or (
+                key not in self.conflicts and stored == self.stored.get(key)
+            ):
+                continue
+            if key not in self.conflicts:
+                logger.warning(
+                    'Checkpoint "{}" was changed by another process, keeping the lower one.',
+                    key,
+                )
+                self.conflicts.add(key)
+            if checkpoint_position(stored) <= checkpoint_position(changes[key]):
+                del changes[key]
+                self.state[key] = self.stored[key] = stored
+        return changes
+
+
+def get_storage() -> BaseStorage:
+    """
+    Returns the state storage selected by STATE_BACKEND.
+    """
+
+    if settings_config.STATE_BACKEND == 'sqlite':
+        return SQLiteStorage(settings_config.STATE_SQLITE_PATH)
+    if settings_config.STATE_BACKEND == 'redis':
+        return RedisStorage(
+            settings_config.STATE_REDIS_URL, settings_config.STATE_REDIS_KEY
+        )
+    return JsonFileStorage(settings_config.STATE_FILE_NAME)
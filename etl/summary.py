@@ -0,0 +1,77 @@
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from configs import loguru_config
+from loguru import logger
+
+logger.add(**loguru_config)
+
+
+def checkpoint_position(checkpoint: dict) -> tuple[datetime, str]:
+    updated_at = datetime.fromisoformat(checkpoint['updated_at'])
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    return updated_at, checkpoint['id']
+
+
+class IndexSummary:
+    def __init__(self):
+        self.documents = 0
+        self.started_at = None
+        self.elapsed = 0.0
+        self.max_lag = None
+
+    @property
+    def throughput(self) -> float:
+        return self.documents / self.elapsed if self.elapsed else 0.0
+
+
+class PassSummary:
+    """
+    A class that collects per-index throughput of an ETL pass. The lag of a loaded chunk is
+    the time between the change of its last row in Postgres and the moment the chunk was
+    loaded to Elasticsearch; the summary reports the largest one.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.indexes = {}
+
+    def reset(self) -> None:
+        with self.lock:
+            self.indexes = {}
+
+    def start(self, index_name: str) -> None:
+        with self.lock:
+            summary = self.indexes.setdefault(index_name, IndexSummary())
+            summary.started_at = time.perf_counter()
+
+    def finish(self, index_name: str) -> None:
+        with self.lock:
+            summary = self.indexes[index_name]
+            summary.elapsed += time.perf_counter() - summary.started_at
+
+    def add_chunk(
+        self, index_name: str, documents_count: int, checkpoint: Optional[dict]
+    ) -> None:
+        with self.lock:
+            summary = self.indexes.setdefault(index_name, IndexSummary())
+            summary.documents += documents_count
+            if documents_count and checkpoint:
+                updated_at, _ = checkpoint_position(checkpoint)
+                lag = (datetime.now(timezone.utc) - updated_at).total_seconds()
+                summary.max_lag = max(lag, summary.max_lag or lag)
+
+    def log(self) -> None:
+        with self.lock:
+            for index_name, summary in self.indexes.items():
+                logger.info(
+                    'Index "{}": {} documents in {:.2f}s ({:.0f} docs/sec), max lag {}.',
+                    index_name,
+                    summary.documents,
+                    summary.elapsed,
+                    summary.throughput,
+                    f'{summary.max_lag:.1f}s' if summary.max_lag is not None else 'n/a',
+                )
@@ -0,0 +1,17 @@
+import os
+import sys
+from pathlib import Path
+
+# The ETL modules import each other as top-level modules and read their settings from
+# the environment on import.
+sys.path.insert(0, str(Path(__file__).parents[1]))
+for name, value in {
+    'POSTGRES_HOST': 'localhost',
+    'POSTGRES_PORT': '5432',
+    'POSTGRES_USER': 'app',
+    'POSTGRES_PASSWORD': 'app',
+    'POSTGRES_DB': 'movies_database',
+    'ES_HOST': 'http://localhost',
+    'ES_PORT': '9200',
+}.items():
+    os.environ.setdefault(name, value)
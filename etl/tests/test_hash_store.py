@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from hash_store import ChangeDetector, SQLiteHashStore
+from transform import DataTransformer
+
+MOVIE_ROW = {
+    'id': '3d825f60-9fff-4dfe-b294-1a45fa1e115d',
+    'title': 'Star Wars: Episode IV - A New Hope',
+    'description': 'The Imperial Forces hold Princess Leia hostage.',
+    'rating': 8.6,
+    'type': 'movie',
+    'created_at': datetime(2021, 6, 16, tzinfo=timezone.utc),
+    'updated_at': datetime(2021, 6, 16, tzinfo=timezone.utc),
+    'creation_date': None,
+    'file_path': None,
+    'all_persons': [
+        {
+            'role': 'director',
+            'id': 'a5a8f573-3cee-4ccc-8a2b-91cb9f55250a',
+            'full_name': 'George Lucas',
+        },
+        {
+            'role': 'actor',
+            'id': '26e83050-29ef-4163-a99d-b546cac208f8',
+            'full_name': 'Mark Hamill',
+        },
+    ],
+    'all_genres': [
+        {
+            'id': '3d8d9bf5-0d90-4353-88ba-4ccc5d2c07ff',
+            'name': 'Action',
+            'description': None,
+        }
+    ],
+}
+
+
+@pytest.fixture
+def change_detector(tmp_path):
+    return ChangeDetector(SQLiteHashStore(str(tmp_path / 'hashes.sqlite')))
+
+
+def load(change_detector: ChangeDetector, rows: list[dict]) -> list:
+    documents = DataTransformer().transform_movies_data(rows, 'movies')
+    changed, hashes = change_detector.filter_changed('movies', documents)
+    change_detector.hash_store.set_many('movies', hashes)
+    return changed
+
+
+def test_movie_with_only_updated_at_moved_is_skipped(change_detector):
+    assert len(load(change_detector, [MOVIE_ROW])) == 1
+
+    touched = {**MOVIE_ROW, 'updated_at': MOVIE_ROW['updated_at'] + timedelta(days=1)}
+
+    assert load(change_detector, [touched]) == []
+
+
+def test_changed_movie_is_loaded_again(change_detector):
+    load(change_detector, [MOVIE_ROW])
+
+    renamed = {
+        **MOVIE_ROW,
+        'title': 'Star Wars',
+        'updated_at': MOVIE_ROW['updated_at'] + timedelta(days=1),
+    }
+
+    assert [document['title'] for document in load(change_detector, [renamed])] == [
+        'Star Wars'
+    ]
@@ -0,0 +1,83 @@
+import threading
+
+import pytest
+import reindex
+from main import ETL
+from reindex import ReindexPauseError, Reindexer
+from state import JsonFileStorage, State
+
+CHECKPOINT = {
+    'updated_at': '2023-01-01T00:00:00+00:00',
+    'id': '00000000-0000-0000-0000-000000000000',
+}
+ADVANCED_CHECKPOINT = {
+    'updated_at': '2023-06-01T00:00:00+00:00',
+    'id': '00000000-0000-0000-0000-000000000000',
+}
+REWOUND_CHECKPOINT = {
+    'updated_at': '2022-01-01T00:00:00+00:00',
+    'id': '00000000-0000-0000-0000-000000000000',
+}
+
+
+@pytest.fixture
+def storage_path(tmp_path):
+    return str(tmp_path / 'state.json')
+
+
+def make_etl(storage_path: str) -> ETL:
+    # Only the state is used, so the ETL is built without its connections.
+    etl = ETL.__new__(ETL)
+    etl.state = State(JsonFileStorage(storage_path), flush_every=100)
+    return etl
+
+
+def test_rewound_checkpoint_survives_the_flush_of_the_live_etl(storage_path):
+    live_etl = make_etl(storage_path)
+    live_etl.state.set_state('movies_checkpoint', CHECKPOINT)
+    live_etl.state.flush()
+    # The live pass has loaded further, but not flushed yet, when the alias is swapped.
+    live_etl.state.set_state('movies_checkpoint', ADVANCED_CHECKPOINT)
+
+    reindex_etl = make_etl(storage_path)
+    reindex_etl.state.set_state('movies_v2_checkpoint', REWOUND_CHECKPOINT)
+    Reindexer(reindex_etl).sync_live_checkpoint('movies', 'movies_v2')
+    reindex_etl.state.flush()
+
+    live_etl.state.flush()
+    live_etl.state.set_state('movies_checkpoint', ADVANCED_CHECKPOINT)
+    live_etl.state.flush()
+
+    stored = JsonFileStorage(storage_path).retrieve_state()
+    assert stored['movies_checkpoint'] == REWOUND_CHECKPOINT
+    live_etl.state.refresh()
+    assert live_etl.get_checkpoint('movies') == REWOUND_CHECKPOINT
+
+
+def test_pause_waits_for_the_live_etl(monkeypatch, storage_path):
+    monkeypatch.setattr(reindex, 'PAUSE_POLL_INTERVAL', 0.01)
+    live_etl = make_etl(storage_path)
+    reindexer = Reindexer(make_etl(storage_path))
+
+    pause = threading.Thread(target=reindexer.pause_live_etl, args=('movies',))
+    pause.start()
+    pause.join(0.1)
+    assert pause.is_alive()
+
+    live_etl.state.refresh()
+    assert live_etl.is_paused('movies')
+    assert not live_etl.is_paused('genres')
+    pause.join(5)
+    assert not pause.is_alive()
+
+    reindexer.resume_live_etl('movies')
+    live_etl.state.refresh()
+    assert not live_etl.is_paused('movies')
+
+
+def test_pause_fails_without_the_live_etl(monkeypatch, storage_path):
+    monkeypatch.setattr(reindex.settings_config, 'REINDEX_PAUSE_TIMEOUT', 0)
+    reindexer = Reindexer(make_etl(storage_path))
+
+    with pytest.raises(ReindexPauseError):
+        reindexer.pause_live_etl('movies')
@@ -0,0 +1,80 @@
+from state import JsonFileStorage, State
+
+CHECKPOINT = {
+    'updated_at': '2023-01-01T00:00:00+00:00',
+    'id': '00000000-0000-0000-0000-000000000000',
+}
+ADVANCED_CHECKPOINT = {
+    'updated_at': '2023-06-01T00:00:00+00:00',
+    'id': '00000000-0000-0000-0000-000000000000',
+}
+REWOUND_CHECKPOINT = {
+    'updated_at': '2022-01-01T00:00:00+00:00',
+    'id': '00000000-0000-0000-0000-000000000000',
+}
+
+
+def test_refresh_reads_checkpoints_written_by_another_process(tmp_path):
+    storage_path = str(tmp_path / 'state.json')
+    etl_state = State(JsonFileStorage(storage_path))
+    etl_state.set_state('movies_checkpoint', CHECKPOINT)
+    etl_state.flush()
+
+    reindex_state = State(JsonFileStorage(storage_path))
+    reindex_state.set_state('movies_checkpoint', REWOUND_CHECKPOINT)
+    reindex_state.flush()
+
+    assert etl_state.get_state('movies_checkpoint') == CHECKPOINT
+    etl_state.refresh()
+    assert etl_state.get_state('movies_checkpoint') == REWOUND_CHECKPOINT
+
+
+def test_refresh_writes_pending_changes_first(tmp_path):
+    storage_path = str(tmp_path / 'state.json')
+    state = State(JsonFileStorage(storage_path), flush_every=100)
+    state.set_state('genres_checkpoint', CHECKPOINT)
+
+    state.refresh()
+
+    assert state.get_state('genres_checkpoint') == CHECKPOINT
+    assert JsonFileStorage(storage_path).retrieve_state() == {
+        'genres_checkpoint': CHECKPOINT
+    }
+
+
+def test_flush_keeps_the_lower_of_two_concurrent_checkpoints(tmp_path):
+    storage_path = str(tmp_path / 'state.json')
+    first = State(JsonFileStorage(storage_path), flush_every=100)
+    second = State(JsonFileStorage(storage_path), flush_every=100)
+    first.set_state('persons_checkpoint', CHECKPOINT)
+    first.flush()
+    second.refresh()
+
+    second.set_state('persons_checkpoint', ADVANCED_CHECKPOINT)
+    first.set_state('persons_checkpoint', REWOUND_CHECKPOINT)
+    first.flush()
+    second.flush()
+
+    assert JsonFileStorage(storage_path).retrieve_state() == {
+        'persons_checkpoint': REWOUND_CHECKPOINT
+    }
+    assert second.get_state('persons_checkpoint') == REWOUND_CHECKPOINT
+
+
+def test_flush_writes_a_checkpoint_below_the_one_of_another_process(tmp_path):
+    storage_path = str(tmp_path / 'state.json')
+    first = State(JsonFileStorage(storage_path), flush_every=100)
+    second = State(JsonFileStorage(storage_path), flush_every=100)
+    first.set_state('persons_checkpoint', ADVANCED_CHECKPOINT)
+    first.flush()
+    second.refresh()
+
+    first.set_state('persons_checkpoint', CHECKPOINT)
+    first.flush()
+    second.set_state('persons_checkpoint', REWOUND_CHECKPOINT)
+    second.flush()
+
+    assert second.get_state('persons_checkpoint') == REWOUND_CHECKPOINT
+    assert JsonFileStorage(storage_path).retrieve_state() == {
+        'persons_checkpoint': REWOUND_CHECKPOINT
+    }
@@ -15,19 +15,59 @@ class DataTransformer:
     def get_persons_by_role(
         self, persons: list[dict], roles: list[str]
     ) -> dict[str, tuple[list[dict], list[str]]]:
-        persons_data_by_role = {}
-        for role in roles:
-            persons_with_role = [
+        persons_data_by_role = {role: ([], []) for role in roles}
+        for person in persons:
+            persons_with_role = persons_data_by_role.get(person.get('role'))
+            if persons_with_role is None:
+                continue
+            persons_with_role[0].append(
                 {'id': person.get('id'), 'full_name': person.get('full_name')}
-                for person in persons
-                if person.get('role') == role
-            ]
-            names_of_persons_with_role = [
-                person.get('full_name') for person in persons_with_role
-            ]
-            persons_data_by_role[role] = (persons_with_role, names_of_persons_with_role)
+            )
+            persons_with_role[1].append(person.get('full_name'))
         return persons_data_by_role
 
+    def build_movie_document(self, movie: dict) -> dict:
+        persons = self.get_persons_by_role(
+            persons=movie.get('all_persons'),
+            roles=['director', 'actor', 'writer'],
+        )
+        return {
+            'id': movie.get('id'),
+            'imdb_rating': movie.get('rating'),
+            'type': movie.get('type'),
+            'creation_date': movie.get('creation_date'),
+            'genres': [
+                self.build_genre_document(genre) for genre in movie.get('all_genres')
+            ],
+            'title': movie.get('title'),
+            'file_path': movie.get('file_path'),
+            'updated_at': movie.get('updated_at'),
+            'description': movie.get('description'),
+            'directors_names': persons.get('director')[1],
+            'actors_names': persons.get('actor')[1],
+            'writers_names': persons.get('writer')[1],
+            'directors': persons.get('director')[0],
+            'actors': persons.get('actor')[0],
+            'writers': persons.get('writer')[0],
+        }
+
+    @staticmethod
+    def build_genre_document(genre: dict) -> dict:
+        return {
+            'id': genre.get('id'),
+            'name': genre.get('name'),
+            'description': genre.get('description'),
+        }
+
+    @staticmethod
+    def build_person_document(person: dict) -> dict:
+        return {
+            'id': person.get('id'),
+            'full_name': person.get('full_name'),
+            'roles': person.get('roles'),
+            'movies_ids': person.get('movies_ids'),
+        }
+
     @on_exception(
         expo, ValidationError, max_tries=settings_config.MAX_TRIES, logger=logger
     )
@@ -35,56 +75,21 @@ class DataTransformer:
         self,
         movies_data: list[dict],
         index_name: str,
-    ) -> list[Union[MovieData, GenreData, FullPersonData]]:
-        es_data = []
+    ) -> list[Union[dict, MovieData, GenreData, FullPersonData]]:
+        """
+        Builds Elasticsearch documents from Postgres rows as plain dicts, ready to be
+        serialized into a bulk request. With STRICT_VALIDATION every document is also
+        validated by its pydantic model first.
+        """
+
         if index_name == 'movies':
-            for movie in movies_data:
-                persons = self.get_persons_by_role(
-                    persons=movie.get('all_persons'),
-                    roles=['director', 'actor', 'writer'],
-                )
-                genres = [
-                    GenreData(
-                        id=genre.get('id'),
-                        name=genre.get('name'),
-                        description=genre.get('description'),
-                    )
-                    for genre in movie.get('all_genres')
-                ]
-                movie_data = MovieData(
-                    id=movie.get('id'),
-                    imdb_rating=movie.get('rating'),
-                    type=movie.get('type'),
-                    creation_date=movie.get("creation_date"),
-                    genres=genres,
-                    title=movie.get('title'),
-                    file_path=movie.get("file_path"),
-                    description=movie.get('description'),
-                    directors_names=persons.get('director')[1],
-                    actors_names=persons.get('actor')[1],
-                    writers_names=persons.get('writer')[1],
-                    directors=persons.get('director')[0],
-                    actors=persons.get('actor')[0],
-                    writers=persons.get('writer')[0],
-                )
-                es_data.append(movie_data)
-            return es_data
+            build_document, model = self.build_movie_document, MovieData
         elif index_name == 'genres':
-            for genre in movies_data:
-                genre_data = GenreData(
-                    id=genre.get('id'),
-                    name=genre.get('name'),
-                    description=genre.get('description'),
-                )
-                es_data.append(genre_data)
-            return es_data
+            build_document, model = self.build_genre_document, GenreData
         else:
-            for person in movies_data:
-                person_data = FullPersonData(
-                    id=person.get('id'),
-                    full_name=person.get('full_name'),
-                    roles=person.get('roles'),
-                    movies_ids=[movie.get('id') for movie in person.get('all_movies')],
-                )
-                es_data.append(person_data)
-            return es_data
+            build_document, model = self.build_person_document, FullPersonData
+
+        es_data = [build_document(row) for row in movies_data]
+        if settings_config.STRICT_VALIDATION:
+            return [model(**document) for document in es_data]
+        return es_data
@@ -0,0 +1,24 @@
+from aioredis import Redis
+from elasticsearch import AsyncElasticsearch
+from fastapi import APIRouter, Depends, Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+
+from core.metrics import observe_pools
+from db.elastic import es_manager
+from db.redis import redis_manager
+
+router = APIRouter()
+
+
+@router.get(path='/metrics', include_in_schema=False)
+async def get_metrics(
+    redis: Redis = Depends(redis_manager.get_redis),
+    elastic: AsyncElasticsearch = Depends(es_manager.get_elastic),
+) -> Response:
+    """
+    Expose the API metrics in the Prometheus text format.
+    """
+    observe_pools(redis, elastic)
+    return Response(
+        generate_latest(REGISTRY), headers={'Content-Type': CONTENT_TYPE_LATEST}
+    )
@@ -1,8 +1,16 @@
+from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
 
-from api.v1.utils import raise_exception_if_not_found, to_response_model
+from api.v1.utils import (
+    not_modified_response,
+    raise_exception_if_not_found,
+    set_cache_headers,
+    sparse_fields,
+    sparse_response,
+    to_response_model,
+)
 from core.config import Config
 from models.schemas import GenreDetail
 from services.genres import GenreService, get_service
@@ -15,20 +23,22 @@ router = APIRouter(prefix='/genres', tags=['Genres'])
     name='Genres List',
     description='Get a list of all movie genres with pagination',
     response_model=list[GenreDetail],
-    response_model_exclude_unset=True,
 )
 async def get_genres_list(
     page_number: int = Query(default=0, ge=0),
     page_size: int = Query(default=Config.PROJECT_GLOBAL_PAGE_SIZE, gt=0),
+    fields: Optional[frozenset[str]] = Depends(sparse_fields(GenreDetail)),
     genre_service: GenreService = Depends(get_service),
 ) -> list[GenreDetail]:
     """
     Get a list of all movie genres with pagination.
     """
     genres_list = await genre_service.get_genres_list(
-        page_number=page_number, page_size=page_size
+        page_number=page_number, page_size=page_size, fields=fields
     )
     raise_exception_if_not_found(genres_list, 'No genres found')
+    if fields:
+        return sparse_response(genres_list, fields)
     return to_response_model(genres_list, GenreDetail)
 
 
@@ -37,21 +47,23 @@ async def get_genres_list(
     name='Search Genres',
     description='Search for movie genres by their name',
     response_model=list[GenreDetail],
-    response_model_exclude_unset=True,
 )
 async def get_persons_by_search(
     query: str,
     page_number: int = Query(default=0, ge=0),
     page_size: int = Query(default=Config.PROJECT_GLOBAL_PAGE_SIZE, gt=0),
+    fields: Optional[frozenset[str]] = Depends(sparse_fields(GenreDetail)),
     person_service: GenreService = Depends(get_service),
 ) -> list[GenreDetail]:
     """
     Search for movie genres by their name.
     """
     genres_list = await person_service.get_genres_by_search(
-        query, page_number, page_size
+        query, page_number, page_size, fields
     )
     raise_exception_if_not_found(genres_list, 'No genres found')
+    if fields:
+        return sparse_response(genres_list, fields)
     return to_response_model(genres_list, GenreDetail)
 
 
@@ -60,14 +72,23 @@ async def get_persons_by_search(
     name='Genre Details',
     description='Get detailed information about a specific genre by its ID',
     response_model=GenreDetail,
-    response_model_exclude_unset=True,
 )
 async def get_genre_detail(
-    genre_id: UUID, genre_service: GenreService = Depends(get_service)
+    genre_id: UUID,
+    request: Request,
+    response: Response,
+    fields: Optional[frozenset[str]] = Depends(sparse_fields(GenreDetail)),
+    genre_service: GenreService = Depends(get_service),
 ) -> GenreDetail:
     """
     Get detailed information about a specific genre by its ID.
     """
-    genre = await genre_service.get_genre_by_id(genre_id)
+    etag, max_age = await genre_service.get_etag_by_id(genre_id, fields)
+    if not_modified := not_modified_response(request, etag, max_age):
+        return not_modified
+    genre = await genre_service.get_genre_by_id(genre_id, fields)
     raise_exception_if_not_found(genre, 'Genre not found')
-    return GenreDetail(id=genre.id, name=genre.name, description=genre.description)
+    set_cache_headers(response, etag, genre, max_age)
+    if fields:
+        return sparse_response(genre, fields, response.headers)
+    return to_response_model(genre, GenreDetail, response.headers)
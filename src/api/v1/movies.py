@@ -1,8 +1,19 @@
+from datetime import datetime
+from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
 
-from api.v1.utils import raise_exception_if_not_found, to_response_model
+from api.v1.utils import (
+    ndjson_stream,
+    not_modified_response,
+    raise_exception_if_not_found,
+    set_cache_headers,
+    sparse_fields,
+    sparse_response,
+    to_response_model,
+)
 from core.config import Config
 from models.schemas import MovieDetail, MovieList, SortField
 from services.movies import MovieService, get_service
@@ -15,13 +26,13 @@ router = APIRouter(prefix='/movies', tags=['Movies'])
     name='Movies List',
     description='Get a list of all movies with optional filtering by genre and sorting by IMDb rating',
     response_model=list[MovieList],
-    response_model_exclude_unset=True,
 )
 async def get_movies_list(
     sort: SortField = Query(default=SortField.imdb_rating_desc),
     genre_id: UUID = None,
     page_number: int = Query(default=0, ge=0),
     page_size: int = Query(default=Config.PROJECT_GLOBAL_PAGE_SIZE, gt=0),
+    fields: Optional[frozenset[str]] = Depends(sparse_fields(MovieList)),
     movie_service: MovieService = Depends(get_service),
 ) -> list[MovieList]:
     """
@@ -37,8 +48,11 @@ async def get_movies_list(
         sort_field=sort_field,
         sort_type=sort_type,
         genre_id=genre_id,
+        fields=fields,
     )
     raise_exception_if_not_found(movies_list, 'No movies found')
+    if fields:
+        return sparse_response(movies_list, fields)
     return to_response_model(movies_list, MovieList)
 
 
@@ -47,40 +61,78 @@ async def get_movies_list(
     name='Search Movies',
     description='Search for movies by title and paginate the results',
     response_model=list[MovieList],
-    response_model_exclude_unset=True,
 )
 async def get_movies_by_search(
     query: str,
     page_number: int = Query(default=0, ge=0),
     page_size: int = Query(default=Config.PROJECT_GLOBAL_PAGE_SIZE, gt=0),
+    fields: Optional[frozenset[str]] = Depends(sparse_fields(MovieList)),
     movie_service: MovieService = Depends(get_service),
 ) -> list[MovieList]:
     """
     Search for movies by title and paginate the results.
     """
     movies_list = await movie_service.get_movies_by_search(
-        query, page_number, page_size
+        query, page_number, page_size, fields
     )
     raise_exception_if_not_found(movies_list, 'No movies found')
+    if fields:
+        return sparse_response(movies_list, fields)
     return to_response_model(movies_list, MovieList)
 
 
+@router.get(
+    path='/export',
+    name='Export Movies',
+    description='Stream all movies, or those updated since a given time, as newline-delimited JSON',
+    response_class=StreamingResponse,
+    responses={200: {'content': {'application/x-ndjson': {}}}},
+)
+async def export_movies(
+    updated_since: Optional[datetime] = Query(
+        default=None,
+        description='Only export movies updated at or after this time (ISO 8601)',
+    ),
+    fields: Optional[frozenset[str]] = Depends(sparse_fields(MovieDetail)),
+    movie_service: MovieService = Depends(get_service),
+) -> StreamingResponse:
+    """
+    Stream all movies, or those updated since a given time, as newline-delimited JSON.
+    """
+    batches = movie_service.export_movies(updated_since=updated_since, fields=fields)
+    return StreamingResponse(
+        ndjson_stream(batches),
+        media_type='application/x-ndjson',
+        # Let nginx pass the stream through instead of buffering the whole export.
+        headers={'X-Accel-Buffering': 'no'},
+    )
+
+
 @router.get(
     path='/{movie_id}',
     name='Movie Details',
     description='Get detailed information about a specific movie by its ID',
     response_model=MovieDetail,
-    response_model_exclude_unset=True,
 )
 async def get_movie_details(
-    movie_id: UUID, movie_service: MovieService = Depends(get_service)
+    movie_id: UUID,
+    request: Request,
+    response: Response,
+    fields: Optional[frozenset[str]] = Depends(sparse_fields(MovieDetail)),
+    movie_service: MovieService = Depends(get_service),
 ) -> MovieDetail:
     """
     Get detailed information about a specific movie by its ID.
     """
-    movie = await movie_service.get_movie_by_id(movie_id)
+    etag, max_age = await movie_service.get_etag_by_id(movie_id, fields)
+    if not_modified := not_modified_response(request, etag, max_age):
+        return not_modified
+    movie = await movie_service.get_movie_by_id(movie_id, fields)
     raise_exception_if_not_found(movie, 'Movie not found')
-    return movie
+    set_cache_headers(response, etag, movie, max_age)
+    if fields:
+        return sparse_response(movie, fields, response.headers)
+    return to_response_model(movie, MovieDetail, response.headers, exclude_unset=True)
 
 
 @router.get(
@@ -88,16 +140,19 @@ async def get_movie_details(
     name='Similar Movies',
     description='Get a list of movies similar to the specified movie, based on genre',
     response_model=list[MovieList],
-    response_model_exclude_unset=True,
 )
 async def get_similar_movies(
-    movie_id: UUID, movie_service: MovieService = Depends(get_service)
+    movie_id: UUID,
+    fields: Optional[frozenset[str]] = Depends(sparse_fields(MovieList)),
+    movie_service: MovieService = Depends(get_service),
 ) -> list[MovieList]:
     """
     Get a list of movies similar to the specified movie, based on genre.
     """
-    movies_list = await movie_service.get_similar_movies(movie_id)
+    movies_list = await movie_service.get_similar_movies(movie_id, fields)
     raise_exception_if_not_found(movies_list, 'No similar movies found')
+    if fields:
+        return sparse_response(movies_list, fields)
     return to_response_model(movies_list, MovieList)
 
 
@@ -106,14 +161,17 @@ async def get_similar_movies(
     name='Popular Movies in Genre',
     description='Get a list of the most popular movies in a specific genre',
     response_model=list[MovieList],
-    response_model_exclude_unset=True,
 )
 async def get_popular_in_genre(
-    genre_id: UUID, movie_service: MovieService = Depends(get_service)
+    genre_id: UUID,
+    fields: Optional[frozenset[str]] = Depends(sparse_fields(MovieList)),
+    movie_service: MovieService = Depends(get_service),
 ) -> list[MovieList]:
     """
     Get a list of the most popular movies in a specific genre.
     """
-    movies_list = await movie_service.get_popular_movies_by_genre(genre_id)
+    movies_list = await movie_service.get_popular_movies_by_genre(genre_id, fields)
     raise_exception_if_not_found(movies_list, 'No movies found in the specified genre')
+    if fields:
+        return sparse_response(movies_list, fields)
     return to_response_model(movies_list, MovieList)
@@ -1,8 +1,16 @@
+from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
 
-from api.v1.utils import raise_exception_if_not_found, to_response_model
+from api.v1.utils import (
+    not_modified_response,
+    raise_exception_if_not_found,
+    set_cache_headers,
+    sparse_fields,
+    sparse_response,
+    to_response_model,
+)
 from core.config import Config
 from models.schemas import PersonDetail
 from services.persons import PersonService, get_service
@@ -15,20 +23,22 @@ router = APIRouter(prefix='/persons', tags=['Persons'])
     name='Persons List',
     description='Get a list of all persons involved in the movies, with optional pagination',
     response_model=list[PersonDetail],
-    response_model_exclude_unset=True,
 )
 async def get_persons_list(
     page_number: int = Query(default=0, ge=0),
     page_size: int = Query(default=Config.PROJECT_GLOBAL_PAGE_SIZE, gt=0),
+    fields: Optional[frozenset[str]] = Depends(sparse_fields(PersonDetail)),
     person_service: PersonService = Depends(get_service),
 ) -> list[PersonDetail]:
     """
     Get a list of all persons involved in the movies, with optional pagination.
     """
     persons_list = await person_service.get_persons_list(
-        page_number=page_number, page_size=page_size
+        page_number=page_number, page_size=page_size, fields=fields
     )
     raise_exception_if_not_found(persons_list, 'No persons found')
+    if fields:
+        return sparse_response(persons_list, fields)
     return to_response_model(persons_list, PersonDetail)
 
 
@@ -37,21 +47,23 @@ async def get_persons_list(
     name='Search Persons',
     description='Search for persons involved in the movies by their name',
     response_model=list[PersonDetail],
-    response_model_exclude_unset=True,
 )
 async def get_persons_by_search(
     query: str,
     page_number: int = Query(default=0, ge=0),
     page_size: int = Query(default=Config.PROJECT_GLOBAL_PAGE_SIZE, gt=0),
+    fields: Optional[frozenset[str]] = Depends(sparse_fields(PersonDetail)),
     person_service: PersonService = Depends(get_service),
 ) -> list[PersonDetail]:
     """
     Search for persons involved in the movies by their name.
     """
     persons_list = await person_service.get_persons_by_search(
-        query, page_number, page_size
+        query, page_number, page_size, fields
     )
     raise_exception_if_not_found(persons_list, 'No persons found')
+    if fields:
+        return sparse_response(persons_list, fields)
     return to_response_model(persons_list, PersonDetail)
 
 
@@ -60,19 +72,23 @@ async def get_persons_by_search(
     name='Person Details',
     description='Get detailed information about a specific person by their ID',
     response_model=PersonDetail,
-    response_model_exclude_unset=True,
 )
 async def get_person_detail(
-    person_id: UUID, person_service: PersonService = Depends(get_service)
+    person_id: UUID,
+    request: Request,
+    response: Response,
+    fields: Optional[frozenset[str]] = Depends(sparse_fields(PersonDetail)),
+    person_service: PersonService = Depends(get_service),
 ) -> PersonDetail:
     """
     Get detailed information about a specific person by their ID.
     """
-    person = await person_service.get_person_by_id(person_id)
+    etag, max_age = await person_service.get_etag_by_id(person_id, fields)
+    if not_modified := not_modified_response(request, etag, max_age):
+        return not_modified
+    person = await person_service.get_person_by_id(person_id, fields)
     raise_exception_if_not_found(person, 'Person not found')
-    return PersonDetail(
-        id=person.id,
-        full_name=person.full_name,
-        roles=person.roles,
-        movies_ids=person.movies_ids,
-    )
+    set_cache_headers(response, etag, person, max_age)
+    if fields:
+        return sparse_response(person, fields, response.headers)
+    return to_response_model(person, PersonDetail, response.headers)
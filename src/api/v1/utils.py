@@ -1,10 +1,15 @@
+from contextlib import aclosing
 from http import HTTPStatus
-from typing import Any, Callable, Optional, TypeVar, Union
+from typing import Any, AsyncIterator, Callable, Mapping, Optional, Union
 
-from fastapi import HTTPException
+import orjson
+from fastapi import HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
 
-T = TypeVar('T')
-R = TypeVar('R')
+from core.config import Config
+from core.timing import timed
+from data_services.cache import make_etag
 
 
 def raise_exception_if_not_found(
@@ -24,16 +29,212 @@ def raise_exception_if_not_found(
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=error_detail)
 
 
-def to_response_model(data_list: list[T], response_model: Callable[..., R]) -> list[R]:
+def to_response_model(
+    data: Union[BaseModel, list[BaseModel]],
+    response_model: type[BaseModel],
+    headers: Optional[Mapping[str, str]] = None,
+    exclude_unset: bool = False,
+) -> ORJSONResponse:
     """
-    Convert a list of data instances to a list of response model instances.
+    Build a response with the fields of the response model out of already validated data
+    (e.g. a MovieDetail projected onto MovieList). The data is neither rebuilt as the
+    response model nor validated against it again by FastAPI, so a page costs one `model_dump()`
+    per item. FastAPI's response_model_exclude_unset doesn't apply to a returned
+    response, so it is passed here instead.
 
     Args:
-        data_list: A list of data instances to be converted.
-        response_model: A callable (e.g., a Pydantic model) that takes keyword arguments and returns an instance
-                        of the desired response model.
+        data: A model instance or a list of them, validated when they were read.
+        response_model: The model whose fields are returned.
+        headers: Optional headers of the response.
+        exclude_unset: Leave out the fields that weren't set when the data was read, e.g.
+            the ones missing from the Elasticsearch document.
 
     Returns:
-        A list of response model instances created from the given data instances.
+        A JSON response with the fields of the response model.
     """
-    return [response_model(**vars(item)) for item in data_list]
+    with timed('serialize'):
+        return ORJSONResponse(
+            content=project(
+                data,
+                frozenset(response_model.model_fields),
+                exclude_unset=exclude_unset,
+            ),
+            headers=headers,
+        )
+
+
+def project(
+    data: Union[BaseModel, list[BaseModel]],
+    fields: frozenset[str],
+    exclude_unset: bool,
+) -> Union[dict, list[dict]]:
+    """
+    Convert a model instance or a list of them into dicts of the given fields. Sparse models
+    are built without validation and keep raw values (e.g. str ids), so they are dumped as is.
+    """
+    if isinstance(data, list):
+        return [
+            item.model_dump(include=fields, exclude_unset=exclude_unset, warnings=False)
+            for item in data
+        ]
+    return data.model_dump(include=fields, exclude_unset=exclude_unset, warnings=False)
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """
+    Check whether an If-None-Match header matches the given ETag, using the weak comparison
+    required for If-None-Match.
+
+    Args:
+        if_none_match: The value of the If-None-Match header, if any.
+        etag: The current ETag of the requested document, if known.
+
+    Returns:
+        True if the client already has the current version of the document.
+    """
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    candidates = (candidate.strip() for candidate in if_none_match.split(','))
+    return etag.removeprefix('W/') in (
+        candidate.removeprefix('W/') for candidate in candidates
+    )
+
+
+def cache_headers(etag: str, max_age: Optional[int] = None) -> dict[str, str]:
+    """
+    Build the validator and freshness headers of a document, keeping it fresh for as long
+    as it stays in the Redis cache: max_age seconds, the whole cache timeout by default.
+    """
+    if max_age is None:
+        max_age = Config.REDIS_CACHE_TIMEOUT
+    return {
+        'ETag': etag,
+        'Cache-Control': f'max-age={max_age}',
+    }
+
+
+def not_modified_response(
+    request: Request, etag: Optional[str], max_age: Optional[int] = None
+) -> Optional[Response]:
+    """
+    Return a 304 Not Modified response if the request's If-None-Match header matches the
+    ETag of the cached document, and None if the document has to be sent.
+
+    Args:
+        request: The incoming request.
+        etag: The ETag of the cached document, if it is cached.
+        max_age: The number of seconds the cached document stays cached.
+
+    Returns:
+        An empty 304 response carrying the ETag and Cache-Control headers, or None.
+    """
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(
+            status_code=HTTPStatus.NOT_MODIFIED, headers=cache_headers(etag, max_age)
+        )
+    return None
+
+
+def set_cache_headers(
+    response: Response,
+    etag: Optional[str],
+    data: BaseModel,
+    max_age: Optional[int] = None,
+) -> None:
+    """
+    Set the ETag and Cache-Control headers of a document response.
+
+    Args:
+        response: The response the headers are set on.
+        etag: The ETag stored alongside the cached document, if known.
+        data: The document, used to compute the ETag when it wasn't cached yet.
+        max_age: The number of seconds the cached document stays cached, if it was cached
+            before this request.
+    """
+    response.headers.update(
+        cache_headers(
+            etag or make_etag(data.model_dump_json(exclude_unset=True, warnings=False)),
+            max_age,
+        )
+    )
+
+
+def sparse_fields(
+    model: type[BaseModel],
+) -> Callable[[Optional[str]], Optional[frozenset[str]]]:
+    """
+    Create a dependency that parses the `fields` query parameter against the fields of a
+    response model.
+
+    Args:
+        model: The response model whose fields may be requested.
+
+    Returns:
+        A dependency returning the requested fields (always including `id`), or None if the
+        parameter is absent and the whole model is returned.
+    """
+
+    def dependency(
+        fields: Optional[str] = Query(
+            default=None,
+            description=f'Comma-separated fields to return, out of: {", ".join(model.model_fields)}',
+        )
+    ) -> Optional[frozenset[str]]:
+        if not fields:
+            return None
+        requested = frozenset(
+            field.strip() for field in fields.split(',') if field.strip()
+        )
+        unknown = requested - model.model_fields.keys()
+        if unknown:
+            raise HTTPException(
+                status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+                detail=f'Unknown fields: {", ".join(sorted(unknown))}',
+            )
+        return requested | {'id'}
+
+    return dependency
+
+
+def sparse_response(
+    data: Union[BaseModel, list[BaseModel]],
+    fields: frozenset[str],
+    headers: Optional[Mapping[str, str]] = None,
+) -> ORJSONResponse:
+    """
+    Build a response with only the requested fields of the data. Sparse models lack required
+    fields, so they bypass the validation of the route's response model.
+
+    Args:
+        data: A model instance or a list of them.
+        fields: The requested fields.
+        headers: Optional headers of the response.
+
+    Returns:
+        A JSON response with the requested fields that are set.
+    """
+    with timed('serialize'):
+        return ORJSONResponse(
+            content=project(data, fields, exclude_unset=True), headers=headers
+        )
+
+
+async def ndjson_stream(batches: AsyncIterator[list[dict]]) -> AsyncIterator[bytes]:
+    """
+    Serialize batches of documents into newline-delimited JSON, one chunk per batch, so a
+    response streams any number of documents with the memory of one batch.
+
+    Args:
+        batches: An async iterator of document batches.
+
+    Yields:
+        The NDJSON lines of every batch.
+    """
+    async with aclosing(batches):
+        async for batch in batches:
+            yield b''.join(
+                orjson.dumps(document, option=orjson.OPT_APPEND_NEWLINE)
+                for document in batch
+            )
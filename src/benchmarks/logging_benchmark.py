@@ -0,0 +1,125 @@
+"""
+Micro-benchmark of the logging done on the request path: the uvicorn access record of a
+request, routed from the logging module to loguru by core.custom_logger.
+
+Compares the per-request cost, as seen by the code that logs, of:
+
+* the former InterceptHandler: looking the level up with logger.level() and binding the
+  request id for every record, text format, enqueued sinks;
+* the current InterceptHandler with the text and the JSON formats, with and without
+  enqueued sinks, and with INFO access records sampled at --sampling.
+
+Records are written to two sinks, as in the service, both opened on os.devnull. Run it
+from the src directory, e.g.:
+
+    python -m benchmarks.logging_benchmark --records 20000 --sampling 0.1
+"""
+import argparse
+import logging
+import os
+import time
+
+from loguru import logger
+
+from core import custom_logger
+from core.config import Config
+from core.custom_logger import InterceptHandler, add_request_id, serialize_record
+from core.request_id import request_id_var
+
+TEXT_FORMAT = (
+    '<level>{level: <8}</level> <green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> '
+    'request id: {extra[request_id]} - <cyan>{name}</cyan>:<cyan>{function}</cyan> '
+    '- <level>{message}</level>'
+)
+ACCESS_ARGS = ('172.18.0.5:41236', 'GET', '/api/v1/movies/?page[size]=20', '1.1', 200)
+
+
+class FormerInterceptHandler(logging.Handler):
+    loglevel_mapping = InterceptHandler.loglevel_mapping
+
+    def emit(self, record):
+        try:
+            level = logger.level(record.levelname).name
+        except AttributeError:
+            level = self.loglevel_mapping[record.levelno]
+
+        frame, depth = logging.currentframe(), 2
+        while frame.f_code.co_filename == logging.__file__:
+            frame = frame.f_back
+            depth += 1
+
+        log = logger.bind(request_id='app')
+        log.opt(depth=depth, exception=record.exc_info).log(level, record.getMessage())
+
+
+def configure(handler: logging.Handler, format, patcher, enqueue: bool, sampling: dict):
+    logger.remove()
+    logger.configure(patcher=patcher)
+    sinks = [open(os.devnull, 'w') for _ in range(2)]
+    for sink in sinks:
+        logger.add(sink, enqueue=enqueue, level='INFO', format=format)
+    Config.LOG_ACCESS_SAMPLING = sampling
+    access_logger = logging.getLogger('uvicorn.access')
+    access_logger.handlers = [handler]
+    access_logger.propagate = False
+    access_logger.setLevel(logging.INFO)
+    return access_logger, sinks
+
+
+def per_request_cost(access_logger: logging.Logger, records: int) -> float:
+    """
+    Returns the time per access record, in microseconds, spent in the logging call.
+    """
+
+    token = request_id_var.set('7c9e6679f4e14a0c9f0b3d2b8c1e5d4a')
+    try:
+        started_at = time.perf_counter()
+        for _ in range(records):
+            access_logger.info('%s - "%s %s HTTP/%s" %d', *ACCESS_ARGS)
+        elapsed = time.perf_counter() - started_at
+    finally:
+        request_id_var.reset(token)
+    logger.complete()
+    return elapsed / records * 1e6
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=20000)
+    parser.add_argument('--sampling', type=float, default=0.1)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    json_format = custom_logger.json_format
+    sampled = {'INFO': args.sampling}
+    scenarios = [
+        (
+            'former handler, text, enqueue',
+            FormerInterceptHandler(),
+            TEXT_FORMAT,
+            None,
+            True,
+            {},
+        ),
+        ('text, enqueue', InterceptHandler(), TEXT_FORMAT, add_request_id, True, {}),
+        ('text', InterceptHandler(), TEXT_FORMAT, add_request_id, False, {}),
+        ('json, enqueue', InterceptHandler(), json_format, serialize_record, True, {}),
+        ('json', InterceptHandler(), json_format, serialize_record, False, {}),
+        (
+            f'json, enqueue, INFO sampled at {args.sampling}',
+            InterceptHandler(),
+            json_format,
+            serialize_record,
+            True,
+            sampled,
+        ),
+    ]
+    for name, handler, format, patcher, enqueue, sampling in scenarios:
+        access_logger, sinks = configure(handler, format, patcher, enqueue, sampling)
+        cost = per_request_cost(access_logger, args.records)
+        logger.remove()
+        for sink in sinks:
+            sink.close()
+        print(f'{name:<40} {cost:6.1f} us/request')
@@ -0,0 +1,134 @@
+"""
+Benchmark of the model work a request does on the functional test data: parsing
+Elasticsearch sources, writing and reading the Redis cache and building the response.
+
+Every scenario runs the code of data_services and api.v1.utils against an in-memory
+stand-in for Redis, so it measures only the CPU spent in the models and serialization:
+
+* detail-miss: ES source -> model, cache write, response;
+* detail-hit: cache read, response;
+* list-miss / list-hit: the same for a page of --page-size movies projected onto MovieList.
+
+Run it from the src directory, e.g.:
+
+    python -m benchmarks.models_benchmark --page-size 20
+"""
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+from uuid import uuid4
+
+from api.v1.utils import to_response_model
+from data_services.cache import RedisCache
+from data_services.database import ElasticSearch
+from models.schemas import MovieDetail, MovieList
+
+TESTDATA = Path(__file__).parents[2] / 'tests' / 'functional' / 'testdata'
+CACHE_TIMEOUT = 60
+
+
+class InMemoryRedis:
+    """
+    The part of the aioredis client RedisCache uses, kept in a dict.
+    """
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key: str, encoding: Optional[str] = None):
+        value = self.data.get(key)
+        return value.decode(encoding) if value and encoding else value
+
+    async def set(self, key: str, value, expire: int = 0) -> None:
+        self.data[key] = value.encode() if isinstance(value, str) else value
+
+    def multi_exec(self) -> 'InMemoryTransaction':
+        return InMemoryTransaction(self)
+
+
+class InMemoryTransaction:
+    def __init__(self, redis: InMemoryRedis):
+        self.redis = redis
+        self.commands = []
+
+    def set(self, key: str, value, expire: int = 0) -> None:
+        self.commands.append((key, value, expire))
+
+    async def execute(self) -> None:
+        for command in self.commands:
+            await self.redis.set(*command)
+
+
+def load_sources(count: int) -> list[dict]:
+    movies = json.loads((TESTDATA / 'movies.json').read_text())
+    return [{**movies[i % len(movies)], 'id': str(uuid4())} for i in range(count)]
+
+
+def scenarios(page_size: int) -> dict[str, Callable[[], Awaitable[bytes]]]:
+    cache = RedisCache(InMemoryRedis())
+    source = load_sources(1)[0]
+    page = load_sources(page_size)
+    movie_id = source['id']
+
+    async def detail_miss() -> bytes:
+        movie = ElasticSearch.to_model(source, MovieDetail)
+        await cache.put_by_id(id=movie_id, model=movie, cache_timeout=CACHE_TIMEOUT)
+        return to_response_model(movie, MovieDetail).body
+
+    async def detail_hit() -> bytes:
+        movie = await cache.get_by_id(id=movie_id, model=MovieDetail)
+        return to_response_model(movie, MovieDetail).body
+
+    async def list_miss() -> bytes:
+        movies = [ElasticSearch.to_model(item, MovieDetail) for item in page]
+        await cache.put_list(key='page', data_list=movies, cache_timeout=CACHE_TIMEOUT)
+        return to_response_model(movies, MovieList).body
+
+    async def list_hit() -> bytes:
+        movies = await cache.get_list(key='page', model=MovieDetail)
+        return to_response_model(movies, MovieList).body
+
+    return {
+        'detail-miss': detail_miss,
+        'detail-hit': detail_hit,
+        'list-miss': list_miss,
+        'list-hit': list_hit,
+    }
+
+
+async def per_request_cost(
+    request: Callable[[], Awaitable[bytes]], repeat: int, number: int
+) -> float:
+    """
+    Returns the best time per request, in microseconds, out of `repeat` runs of `number`
+    requests.
+    """
+
+    best = float('inf')
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        for _ in range(number):
+            await request()
+        best = min(best, time.perf_counter() - started_at)
+    return best / number * 1e6
+
+
+async def main(args: argparse.Namespace) -> None:
+    for name, request in scenarios(args.page_size).items():
+        cost = await per_request_cost(request, args.repeat, args.number)
+        print(f'{name:<12} {cost:9.1f} us/request')
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--page-size', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--number', type=int, default=200)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,161 @@
+import gzip
+from hashlib import blake2b
+from typing import Awaitable, Callable, Optional
+
+from aioredis import Redis
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.timing import timed
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE_TYPES = frozenset({'application/json'})
+SKIPPED_STATUSES = frozenset({204, 206, 304})
+
+
+def compress_gzip(body: bytes) -> bytes:
+    # A fixed mtime keeps the output of equal bodies equal, so it can be cached.
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+ENCODERS: dict[str, Callable[[bytes], bytes]] = {}
+if zstandard is not None:
+    ENCODERS['zstd'] = zstandard.ZstdCompressor(level=3).compress
+if brotli is not None:
+    ENCODERS['br'] = lambda body: brotli.compress(body, quality=4)
+ENCODERS['gzip'] = compress_gzip
+
+
+def mark_negotiated(headers: MutableHeaders) -> None:
+    """
+    Mark a response to a client that negotiated an encoding as varying on Accept-Encoding,
+    with a weak ETag. The body is sent compressed or not depending on its size and the
+    client, so the ETag only identifies the document, not its bytes; a 304 or an
+    uncompressed response gets the same validator as a compressed one.
+    """
+    headers.add_vary_header('Accept-Encoding')
+    etag = headers.get('etag')
+    if etag and not etag.startswith('W/'):
+        headers['ETag'] = f'W/{etag}'
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the content coding for an Accept-Encoding header: the one with the highest q-value
+    among the available encoders, preferring zstd, then br, then gzip on a tie. Returns
+    None if the client accepts none of them.
+    """
+    weights = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        name, _, value = params.partition('=')
+        if name.strip().lower() == 'q':
+            try:
+                weight = float(value)
+            except ValueError:
+                weight = 0.0
+        weights[coding] = weight
+
+    best, best_weight = None, 0.0
+    for coding in ENCODERS:
+        weight = weights.get(coding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+class CompressionMiddleware:
+    """
+    Compresses complete JSON responses of at least `minimum_size` bytes with the best
+    encoding the client accepts. Streamed responses (e.g. the NDJSON export) are sent as is.
+
+    With `get_redis`, compressed bodies are cached in Redis under the hash of the original
+    body for as long as cached documents live, so a body that is served from the cache
+    again is only compressed once per encoding.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        get_redis: Optional[Callable[[], Awaitable[Redis]]] = None,
+        cache_timeout: int = 0,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.get_redis = get_redis
+        self.cache_timeout = cache_timeout
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get('accept-encoding', ''))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message
+            if message['type'] == 'http.response.start':
+                start_message = message
+                return
+            if start_message is None:
+                await send(message)
+                return
+            start, start_message = start_message, None
+            body = message.get('body', b'')
+            headers = MutableHeaders(raw=start['headers'])
+            if message.get('more_body', False) or not self.should_compress(start, body):
+                if 'etag' in headers:
+                    mark_negotiated(headers)
+                await send(start)
+                await send(message)
+                return
+            compressed = await self.compress(body, encoding)
+            headers['Content-Encoding'] = encoding
+            headers['Content-Length'] = str(len(compressed))
+            mark_negotiated(headers)
+            await send(start)
+            await send({'type': 'http.response.body', 'body': compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+    def should_compress(self, start: Message, body: bytes) -> bool:
+        if start['status'] in SKIPPED_STATUSES or len(body) < self.minimum_size:
+            return False
+        headers = Headers(raw=start['headers'])
+        if 'content-encoding' in headers:
+            return False
+        content_type = headers.get('content-type', '').partition(';')[0].strip()
+        return content_type in COMPRESSIBLE_TYPES
+
+    async def compress(self, body: bytes, encoding: str) -> bytes:
+        if self.get_redis is None:
+            with timed('compress'):
+                return ENCODERS[encoding](body)
+        key = f'compressed:{encoding}:{blake2b(body, digest_size=16).hexdigest()}'
+        redis = await self.get_redis()
+        with timed('redis'):
+            compressed = await redis.get(key)
+        if compressed is None:
+            with timed('compress'):
+                compressed = ENCODERS[encoding](body)
+            with timed('redis'):
+                await redis.set(key, compressed, expire=self.cache_timeout)
+        return compressed
@@ -1,6 +1,8 @@
 import os
+from typing import Literal
 
-from pydantic import BaseSettings, Field
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -35,42 +37,56 @@ PROJECT_TAGS_METADATA = [
 
 
 class Config(BaseSettings):
-    PROJECT_NAME: str = Field('CinemaHub API', env='PROJECT_NAME')
-    PROJECT_DESCRIPTION: str = Field(PROJECT_DESCRIPTION, env='PROJECT_DESCRIPTION')
-    PROJECT_VERSION: str = Field('1.0.0', env='PROJECT_VERSION')
+    PROJECT_NAME: str = Field('CinemaHub API')
+    PROJECT_DESCRIPTION: str = Field(PROJECT_DESCRIPTION)
+    PROJECT_VERSION: str = Field('1.0.0')
     PROJECT_LICENSE: dict = Field(LICENSE_INFO)
     PROJECT_OPENAPI_TAGS: list[dict[str, str]] = Field(PROJECT_TAGS_METADATA)
-    PROJECT_DOCS_URL: str = Field('/api/openapi', env='PROJECT_DOCS_URL')
-    PROJECT_OPENAPI_URL: str = Field('/api/openapi.json', env='PROJECT_OPENAPI_URL')
-    PROJECT_GLOBAL_PAGE_SIZE: int = Field(20, env='PROJECT_GLOBAL_PAGE_SIZE')
-
-    REDIS_HOST: str = Field('127.0.0.1', env='REDIS_HOST')
-    REDIS_PORT: int = Field(6379, env='REDIS_PORT')
-    REDIS_CACHE_TIMEOUT: int = Field(60 * 10, env='REDIS_CACHE_TIMEOUT')
-
-    ES_HOST: str = Field('127.0.0.1', env='ES_HOST')
-    ES_PORT: int = Field(9200, env='ES_PORT')
-
-    POSTGRES_HOST: str = Field('db', env='POSTGRES_HOST')
-    POSTGRES_PORT: int = Field(5432, env='POSTGRES_PORT')
-    POSTGRES_USER: str = Field('app', env='POSTGRES_USER')
-    POSTGRES_PASSWORD: str = Field('123qwe', env='POSTGRES_PASSWORD')
-    POSTGRES_DB: str = Field('movies_database', env='POSTGRES_DB')
-
-    FASTAPI_HOST: str = Field('0.0.0.0', env='FASTAPI_HOST')
-    FASTAPI_PORT: int = Field(8000, env='FASTAPI_PORT')
-
-    LOG_LEVEL: str = Field('INFO', env='LOGLEVEL')
-    LOG_PATH: str = Field(os.path.join(BASE_DIR, './logs/fastapi.log'), env='LOG_PATH')
-    LOG_RETENTION: str = Field('10 days', env='LOG_RETENTION')
-    LOG_ROTATION: str = Field('1 day', env='LOG_ROTATION')
-
-    MAX_RETRIES: int = Field(10, env='MAX_RETRIES')
-    MIN_SIZE: int = Field(10, env='MIN_SIZE')
-    MAX_SIZE: int = Field(20, env='MAX_SIZE')
-
-    class Config:
-        env_file = os.path.join(BASE_DIR, '..', '.env')
+    PROJECT_DOCS_URL: str = Field('/api/openapi')
+    PROJECT_OPENAPI_URL: str = Field('/api/openapi.json')
+    PROJECT_GLOBAL_PAGE_SIZE: int = Field(20)
+
+    REDIS_HOST: str = Field('127.0.0.1')
+    REDIS_PORT: int = Field(6379)
+    REDIS_CACHE_TIMEOUT: int = Field(60 * 10)
+
+    METRICS_ENABLED: bool = Field(True)
+    SERVER_TIMING_ENABLED: bool = Field(True)
+
+    COMPRESSION_ENABLED: bool = Field(False)
+    COMPRESSION_MINIMUM_SIZE: int = Field(1024)
+    COMPRESSION_CACHE: bool = Field(False)
+
+    EXPORT_BATCH_SIZE: int = Field(1000)
+    EXPORT_KEEP_ALIVE: str = Field('1m')
+
+    ES_HOST: str = Field('127.0.0.1')
+    ES_PORT: int = Field(9200)
+
+    POSTGRES_HOST: str = Field('db')
+    POSTGRES_PORT: int = Field(5432)
+    POSTGRES_USER: str = Field('app')
+    POSTGRES_PASSWORD: str = Field('123qwe')
+    POSTGRES_DB: str = Field('movies_database')
+
+    FASTAPI_HOST: str = Field('0.0.0.0')
+    FASTAPI_PORT: int = Field(8000)
+
+    LOG_LEVEL: str = Field('INFO', validation_alias='LOGLEVEL')
+    LOG_PATH: str = Field(os.path.join(BASE_DIR, './logs/fastapi.log'))
+    LOG_RETENTION: str = Field('10 days')
+    LOG_ROTATION: str = Field('1 day')
+    LOG_FORMAT: Literal['text', 'json'] = Field('text')
+    LOG_ENQUEUE: bool = Field(True)
+    LOG_ACCESS_SAMPLING: dict[str, float] = Field({})
+
+    MAX_RETRIES: int = Field(10)
+    MIN_SIZE: int = Field(10)
+    MAX_SIZE: int = Field(20)
+
+    model_config = SettingsConfigDict(
+        env_file=os.path.join(BASE_DIR, '..', '.env'), extra='ignore'
+    )
 
 
 Config = Config()
@@ -1,13 +1,46 @@
 import logging
+import random
 import sys
+import traceback
 from pathlib import Path
+from typing import Callable, Optional, Union
 
+import orjson
 from loguru import logger
 
 from core.config import Config
+from core.request_id import request_id_var
+
+ACCESS_LOGGERS = frozenset({'uvicorn.access'})
+
+
+def access_level(status_code: Optional[int]) -> str:
+    """
+    The level of an access record: server errors are logged as errors, client errors as
+    warnings, everything else as info.
+    """
+    if status_code is None or status_code >= 500:
+        return 'ERROR'
+    if status_code >= 400:
+        return 'WARNING'
+    return 'INFO'
+
+
+def sample_access(level: str) -> bool:
+    """
+    Decide whether an access record of the given level is logged, keeping the share of
+    records configured for the level in LOG_ACCESS_SAMPLING (all of them by default).
+    """
+    rate = Config.LOG_ACCESS_SAMPLING.get(level, 1.0)
+    return rate >= 1 or random.random() < rate
 
 
 class InterceptHandler(logging.Handler):
+    """
+    Route records of the standard logging module (uvicorn, fastapi, libraries) to loguru.
+    Access records are sampled before any loguru work is done.
+    """
+
     loglevel_mapping = {
         50: 'CRITICAL',
         40: 'ERROR',
@@ -18,55 +51,115 @@ class InterceptHandler(logging.Handler):
     }
 
     def emit(self, record):
-        try:
-            level = logger.level(record.levelname).name
-        except AttributeError:
-            level = self.loglevel_mapping[record.levelno]
+        level = self.loglevel_mapping.get(record.levelno, record.levelno)
+        if record.name in ACCESS_LOGGERS:
+            # uvicorn passes (client, method, path, http version, status code).
+            status_code = record.args[-1] if isinstance(record.args, tuple) else None
+            if isinstance(status_code, int):
+                level = access_level(status_code)
+            if not sample_access(level):
+                return
 
-        frame, depth = logging.currentframe(), 2
+        # Report the caller of the stdlib logger: skip the frames of the logging module,
+        # starting from the one that called emit.
+        frame, depth = sys._getframe(1), 1
         while frame.f_code.co_filename == logging.__file__:
             frame = frame.f_back
             depth += 1
 
-        log = logger.bind(request_id='app')
-        log.opt(depth=depth, exception=record.exc_info).log(level, record.getMessage())
+        logger.opt(depth=depth, exception=record.exc_info).log(
+            level, record.getMessage()
+        )
+
+
+def add_request_id(record: dict) -> None:
+    record['extra'].setdefault('request_id', request_id_var.get() or 'app')
+
+
+def serialize_record(record: dict) -> None:
+    """
+    Render the record as one JSON object in `extra[serialized]`, once for all sinks.
+    """
+    add_request_id(record)
+    payload = {
+        'time': record['time'].isoformat(),
+        'level': record['level'].name,
+        'message': record['message'],
+        'logger': record['name'],
+        'function': record['function'],
+        'line': record['line'],
+    }
+    payload.update(record['extra'])
+    if record['exception']:
+        payload['exception'] = ''.join(traceback.format_exception(*record['exception']))
+    record['extra']['serialized'] = orjson.dumps(payload, default=str).decode()
+
+
+def json_format(record: dict) -> str:
+    return '{extra[serialized]}\n'
 
 
 class CustomLogger:
+    _configured = False
+
     @classmethod
     def make_logger(cls):
-        logger = cls.customize_logging(
+        """
+        Configure logging on the first call and return the loguru logger.
+        """
+        if cls._configured:
+            return logger
+        if Config.LOG_FORMAT == 'json':
+            format, patcher = json_format, serialize_record
+        else:
+            format = (
+                '<level>{level: <8}</level> <green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> '
+                'request id: {extra[request_id]} - <cyan>{name}</cyan>:<cyan>{function}</cyan> '
+                '- <level>{message}</level>'
+            )
+            patcher = add_request_id
+        logger.configure(patcher=patcher)
+        cls.customize_logging(
             filepath=Config.LOG_PATH,
             level=Config.LOG_LEVEL,
             retention=Config.LOG_RETENTION,
             rotation=Config.LOG_ROTATION,
-            format='<level>{level: <8}</level> <green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> '
-            'request id: {extra[request_id]} - <cyan>{name}</cyan>:<cyan>{function}</cyan> '
-            '- <level>{message}</level>',
+            format=format,
         )
+        cls._configured = True
         return logger
 
     @classmethod
     def customize_logging(
-        cls, filepath: Path, level: str, rotation: str, retention: str, format: str
+        cls,
+        filepath: Path,
+        level: str,
+        rotation: str,
+        retention: str,
+        format: Union[str, Callable[[dict], str]],
     ):
         logger.remove()
         logger.add(
-            sys.stdout, enqueue=True, backtrace=True, level=level.upper(), format=format
+            sys.stdout,
+            enqueue=Config.LOG_ENQUEUE,
+            backtrace=True,
+            level=level.upper(),
+            format=format,
         )
         logger.add(
             str(filepath),
             rotation=rotation,
             retention=retention,
-            enqueue=True,
+            enqueue=Config.LOG_ENQUEUE,
             backtrace=True,
             level=level.upper(),
             format=format,
         )
-        logging.basicConfig(handlers=[InterceptHandler()], level=0)
-        logging.getLogger("uvicorn.access").handlers = [InterceptHandler()]
-        for _log in ['uvicorn', 'uvicorn.error', 'fastapi']:
+        # Records below the level are dropped by the logging module, before the handler.
+        logging.basicConfig(handlers=[InterceptHandler()], level=level.upper())
+        for _log in ['uvicorn', 'uvicorn.error', 'uvicorn.access', 'fastapi']:
             _logger = logging.getLogger(_log)
             _logger.handlers = [InterceptHandler()]
+            _logger.propagate = False
 
-        return logger.bind(request_id=None, method=None)
+        return logger
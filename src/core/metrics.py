@@ -0,0 +1,103 @@
+from time import perf_counter
+from typing import Optional
+
+from aioredis import Redis
+from elasticsearch import AsyncElasticsearch
+from prometheus_client import Counter, Gauge, Histogram
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+REQUEST_DURATION = Histogram(
+    'api_request_duration_seconds',
+    'Latency of API requests by route template; its count is the request rate.',
+    ['method', 'route', 'status'],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    'api_requests_in_progress',
+    'API requests being served.',
+)
+CACHE_REQUESTS = Counter(
+    'api_cache_requests_total',
+    'Redis cache lookups by key family (id, etag, or the prefix of a list key) and result '
+    '(hit, miss or error).',
+    ['family', 'result'],
+)
+ELASTICSEARCH_DURATION = Histogram(
+    'api_elasticsearch_duration_seconds',
+    'Latency of Elasticsearch requests by operation and index.',
+    ['operation', 'index'],
+)
+REDIS_POOL_CONNECTIONS = Gauge(
+    'api_redis_pool_connections',
+    'Connections of the Redis pool: in use, free and the maximum.',
+    ['state'],
+)
+ELASTICSEARCH_POOL_CONNECTIONS = Gauge(
+    'api_elasticsearch_pool_connections',
+    'HTTP connections of the Elasticsearch client: in use and the maximum per node.',
+    ['state'],
+)
+
+
+def key_family(key: str) -> str:
+    """
+    The family of a list cache key, e.g. `movies` for `movies:0:20`.
+    """
+    return key.split(':', 1)[0]
+
+
+def observe_pools(redis: Redis, elastic: AsyncElasticsearch) -> None:
+    """
+    Update the pool utilization gauges, right before the metrics are scraped.
+    """
+    pool = redis.connection
+    if hasattr(pool, 'freesize'):
+        REDIS_POOL_CONNECTIONS.labels('in_use').set(pool.size - pool.freesize)
+        REDIS_POOL_CONNECTIONS.labels('free').set(pool.freesize)
+        REDIS_POOL_CONNECTIONS.labels('max').set(pool.maxsize)
+
+    in_use = limit = 0
+    for connection in elastic.transport.connection_pool.connections:
+        session = getattr(connection, 'session', None)
+        if session is None:
+            continue
+        # aiohttp only exposes the number of acquired connections privately.
+        in_use += len(getattr(session.connector, '_acquired', ()))
+        limit += session.connector.limit
+    ELASTICSEARCH_POOL_CONNECTIONS.labels('in_use').set(in_use)
+    ELASTICSEARCH_POOL_CONNECTIONS.labels('max').set(limit)
+
+
+class MetricsMiddleware:
+    """
+    Observes the latency of every HTTP request under the template of the route that
+    served it (e.g. `/api/v1/movies/{movie_id}`), so the label set stays bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        started_at = perf_counter()
+        status_code: Optional[int] = None
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_PROGRESS.dec()
+            route = scope.get('route')
+            REQUEST_DURATION.labels(
+                scope['method'],
+                route.path if route else 'unmatched',
+                status_code or 500,
+            ).observe(perf_counter() - started_at)
@@ -0,0 +1,44 @@
+from contextvars import ContextVar
+from typing import Optional
+from uuid import uuid4
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+MAX_REQUEST_ID_LENGTH = 128
+
+request_id_var: ContextVar[Optional[str]] = ContextVar('request_id', default=None)
+
+
+class RequestIdMiddleware:
+    """
+    Gives every HTTP request an id: the X-Request-ID header set by nginx or the client, or
+    a new one. The id is available to logging through `request_id_var` while the request
+    is served and is echoed in the X-Request-ID response header.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        request_id = Headers(scope=scope).get(REQUEST_ID_HEADER)
+        if not request_id or len(request_id) > MAX_REQUEST_ID_LENGTH:
+            request_id = uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_with_request_id(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                MutableHeaders(raw=message['headers']).append(
+                    REQUEST_ID_HEADER, request_id
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
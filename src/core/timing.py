@@ -0,0 +1,148 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Iterator, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.custom_logger import CustomLogger, access_level, sample_access
+
+logger = CustomLogger.make_logger()
+
+
+class RequestTimings:
+    """
+    Durations of the phases of one request (Redis, Elasticsearch, parsing, serialization,
+    ...) and the outcome of its cache lookups.
+    """
+
+    __slots__ = ('started_at', 'phases', 'cache_hits', 'cache_misses')
+
+    def __init__(self):
+        self.started_at = perf_counter()
+        self.phases: dict[str, float] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def add(self, phase: str, duration: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + duration
+
+    @property
+    def total(self) -> float:
+        return perf_counter() - self.started_at
+
+    @property
+    def cache_status(self) -> Optional[str]:
+        if self.cache_misses and self.cache_hits:
+            return 'partial'
+        if self.cache_misses:
+            return 'miss'
+        if self.cache_hits:
+            return 'hit'
+        return None
+
+    def server_timing(self) -> str:
+        metrics = [
+            f'{phase};dur={duration * 1000:.1f}'
+            for phase, duration in self.phases.items()
+        ]
+        if self.cache_status:
+            metrics.append(f'cache;desc={self.cache_status}')
+        metrics.append(f'total;dur={self.total * 1000:.1f}')
+        return ', '.join(metrics)
+
+
+current_timings: ContextVar[Optional[RequestTimings]] = ContextVar(
+    'request_timings', default=None
+)
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """
+    Add the duration of the block to the given phase of the current request, if it is
+    being timed.
+    """
+    timings = current_timings.get()
+    if timings is None:
+        yield
+        return
+    started_at = perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, perf_counter() - started_at)
+
+
+def record_cache_lookup(hit: bool) -> None:
+    timings = current_timings.get()
+    if timings is None:
+        return
+    if hit:
+        timings.cache_hits += 1
+    else:
+        timings.cache_misses += 1
+
+
+class ServerTimingMiddleware:
+    """
+    Times every HTTP request, sends the per-phase durations in a `Server-Timing` header and
+    logs them in one line together with the cache status of the request. The line is an
+    access record: its level follows the status code and it is sampled like the others.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        status_code = None
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+                MutableHeaders(raw=message['headers']).append(
+                    'Server-Timing', timings.server_timing()
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_timings.reset(token)
+            self.log(scope, status_code, timings)
+
+    @staticmethod
+    def log(scope: Scope, status_code: Optional[int], timings: RequestTimings) -> None:
+        level = access_level(status_code)
+        if not sample_access(level):
+            return
+        phases = {
+            phase: round(duration * 1000, 1)
+            for phase, duration in timings.phases.items()
+        }
+        total = round(timings.total * 1000, 1)
+        details = [f'cache {timings.cache_status}'] if timings.cache_status else []
+        details += [f'{phase} {duration} ms' for phase, duration in phases.items()]
+        logger.bind(
+            path=scope['path'],
+            status_code=status_code,
+            duration_ms=total,
+            phases_ms=phases,
+            cache=timings.cache_status,
+        ).log(
+            level,
+            '{} {} {} in {} ms{}',
+            scope['method'],
+            scope['path'],
+            status_code,
+            total,
+            f' ({", ".join(details)})' if details else '',
+        )
@@ -1,24 +1,71 @@
-import json
 from abc import ABC, abstractmethod
-from typing import Any
+from functools import lru_cache
+from hashlib import blake2b
+from typing import Any, Optional
 from uuid import UUID
 
+import orjson
 from aioredis import Redis
-from pydantic import BaseModel, parse_raw_as
-from pydantic.json import pydantic_encoder
+from pydantic import BaseModel, TypeAdapter
+
+from core.metrics import CACHE_REQUESTS, key_family
+from core.timing import timed
+
+# Cached values that only record that nothing was found.
+EMPTY_VALUES = frozenset({b'{}', b'[]', b'null'})
+
+
+def fields_suffix(fields: Optional[frozenset[str]]) -> str:
+    """
+    Build the part of a cache key that tells a sparse fieldset apart from the full document.
+    """
+    return f':fields={",".join(sorted(fields))}' if fields else ''
+
+
+def make_etag(data: str | bytes) -> str:
+    """
+    Build a strong ETag from the serialized representation of a document.
+    """
+    if isinstance(data, str):
+        data = data.encode()
+    return f'"{blake2b(data, digest_size=16).hexdigest()}"'
+
+
+@lru_cache()
+def list_adapter(model: type[BaseModel]) -> TypeAdapter:
+    """
+    Build the validator of a list of models once per model; building it compiles a schema.
+    """
+    return TypeAdapter(list[model])
 
 
 class Cache(ABC):
     @abstractmethod
-    async def get_by_id(self, id: UUID, model: BaseModel) -> BaseModel | None:
+    async def get_by_id(
+        self, id: UUID, model: BaseModel, fields: Optional[frozenset[str]] = None
+    ) -> BaseModel | None:
         pass
 
     @abstractmethod
-    async def put_by_id(self, id: UUID, model: BaseModel, cache_timeout: int) -> None:
+    async def put_by_id(
+        self,
+        id: UUID,
+        model: BaseModel,
+        cache_timeout: int,
+        fields: Optional[frozenset[str]] = None,
+    ) -> None:
         pass
 
     @abstractmethod
-    async def get_list(self, key: str, model: BaseModel) -> list[BaseModel] | None:
+    async def get_etag(
+        self, id: UUID, fields: Optional[frozenset[str]] = None
+    ) -> tuple[str | None, int | None]:
+        pass
+
+    @abstractmethod
+    async def get_list(
+        self, key: str, model: BaseModel, fields: Optional[frozenset[str]] = None
+    ) -> list[BaseModel] | None:
         pass
 
     @abstractmethod
@@ -32,25 +79,118 @@ class RedisCache(Cache):
     def __init__(self, redis: Redis):
         self.redis = redis
 
-    async def get_by_id(self, id: UUID, model: BaseModel) -> BaseModel | None:
-        data = await self.redis.get(key=str(id))
-        if not data or data == b'{}':
+    async def get_by_id(
+        self, id: UUID, model: BaseModel, fields: Optional[frozenset[str]] = None
+    ) -> BaseModel | None:
+        data = await self.get(self.id_key(id, fields), family='id')
+        if not data or data in EMPTY_VALUES:
             return None
-        return model.parse_raw(data)
+        with timed('parse'):
+            if fields:
+                return model.model_construct(**orjson.loads(data))
+            return model.model_validate_json(data)
+
+    async def put_by_id(
+        self,
+        id: UUID,
+        model: BaseModel,
+        cache_timeout: int,
+        fields: Optional[frozenset[str]] = None,
+    ) -> None:
+        """
+        Store the document together with its ETag, so conditional requests can be answered
+        without reading and parsing the document itself.
+        """
+        key = self.id_key(id, fields)
+        # Sparse models are built without validation and keep raw values, e.g. str ids.
+        with timed('serialize'):
+            value = (
+                model.model_dump_json(exclude_unset=True, warnings=False)
+                if model
+                else '{}'
+            )
+        transaction = self.redis.multi_exec()
+        transaction.set(key=key, value=value, expire=cache_timeout)
+        if model:
+            transaction.set(
+                key=f'etag:{key}', value=make_etag(value), expire=cache_timeout
+            )
+        with timed('redis'):
+            await transaction.execute()
+
+    async def get_etag(
+        self, id: UUID, fields: Optional[frozenset[str]] = None
+    ) -> tuple[str | None, int | None]:
+        """
+        Read the ETag of a cached document together with the number of seconds the document
+        stays cached, in one round trip.
+        """
+        key = f'etag:{self.id_key(id, fields)}'
+        transaction = self.redis.multi_exec()
+        transaction.get(key, encoding='utf-8')
+        transaction.ttl(key)
+        try:
+            with timed('redis'):
+                etag, ttl = await transaction.execute()
+        except Exception:
+            CACHE_REQUESTS.labels('etag', 'error').inc()
+            raise
+        self.count_lookup('etag', etag)
+        # TTL is -2 for a missing key and -1 for a key without expiry.
+        return etag, ttl if etag and ttl >= 0 else None
+
+    async def get(
+        self, key: str, family: str, encoding: Optional[str] = None
+    ) -> bytes | str | None:
+        """
+        Read a key and count the lookup as a hit, miss or error of its key family.
+        """
+        try:
+            with timed('redis'):
+                data = await self.redis.get(key, encoding=encoding)
+        except Exception:
+            CACHE_REQUESTS.labels(family, 'error').inc()
+            raise
+        self.count_lookup(family, data)
+        return data
+
+    @staticmethod
+    def count_lookup(family: str, data: bytes | str | None) -> None:
+        """
+        Count a lookup as a hit or a miss. A cached empty document or list only records that
+        nothing was found and is looked up in Elasticsearch again, so it counts as a miss.
+        """
+        hit = bool(data) and data not in EMPTY_VALUES
+        CACHE_REQUESTS.labels(family, 'hit' if hit else 'miss').inc()
 
-    async def put_by_id(self, id: UUID, model: BaseModel, cache_timeout: int) -> None:
-        await self.redis.set(
-            key=str(id), value=model.json() if model else '{}', expire=cache_timeout
-        )
+    @staticmethod
+    def id_key(id: UUID, fields: Optional[frozenset[str]] = None) -> str:
+        return f'{id}{fields_suffix(fields)}'
 
-    async def get_list(self, key: str, model: BaseModel) -> list[BaseModel] | None:
-        data = await self.redis.get(key)
-        if not data:
+    async def get_list(
+        self, key: str, model: BaseModel, fields: Optional[frozenset[str]] = None
+    ) -> list[BaseModel] | None:
+        """
+        Read a cached list. Sparse fieldsets are cached without the fields that weren't
+        requested, so their items are built without validation.
+        """
+        data = await self.get(key, family=key_family(key))
+        if not data or data in EMPTY_VALUES:
             return None
-        return parse_raw_as(list[model], data)
+        with timed('parse'):
+            if fields:
+                return [model.model_construct(**item) for item in orjson.loads(data)]
+            return list_adapter(model).validate_json(data)
 
     async def put_list(
         self, key: str, data_list: list[BaseModel], cache_timeout: int
     ) -> None:
-        list_json = json.dumps(data_list, default=pydantic_encoder)
-        await self.redis.set(key=str(key), value=list_json, expire=cache_timeout)
+        with timed('serialize'):
+            if data_list is not None:
+                data_list = [
+                    item.model_dump(exclude_unset=True, warnings=False)
+                    for item in data_list
+                ]
+            value = orjson.dumps(data_list)
+        with timed('redis'):
+            await self.redis.set(key=str(key), value=value, expire=cache_timeout)
@@ -1,14 +1,23 @@
 from abc import ABC, abstractmethod
+from typing import AsyncIterator, Optional
 from uuid import UUID
 
 from elasticsearch import AsyncElasticsearch, NotFoundError
 from pydantic import BaseModel
 
+from core.config import Config
+from core.metrics import ELASTICSEARCH_DURATION
+from core.timing import timed
+
 
 class Database(ABC):
     @abstractmethod
     async def get_by_id(
-        self, id: UUID, model: BaseModel, es_index: str
+        self,
+        id: UUID,
+        model: BaseModel,
+        es_index: str,
+        fields: Optional[frozenset[str]] = None,
     ) -> BaseModel | None:
         pass
 
@@ -21,6 +30,7 @@ class Database(ABC):
         page_size: int,
         es_index: str,
         model: BaseModel,
+        fields: Optional[frozenset[str]] = None,
     ) -> list[BaseModel]:
         pass
 
@@ -32,22 +42,55 @@ class Database(ABC):
         es_index: str,
         model: BaseModel,
         query: dict = None,
+        fields: Optional[frozenset[str]] = None,
     ) -> list[BaseModel]:
         pass
 
+    @abstractmethod
+    def export(
+        self,
+        es_index: str,
+        query: dict,
+        fields: frozenset[str],
+        batch_size: int,
+    ) -> AsyncIterator[list[dict]]:
+        pass
+
 
 class ElasticSearch(Database):
     def __init__(self, elastic: AsyncElasticsearch):
         self.elastic = elastic
 
+    @staticmethod
+    def to_model(
+        source: dict, model: BaseModel, fields: Optional[frozenset[str]] = None
+    ) -> BaseModel:
+        """
+        Build a model from a document source. A sparse fieldset lacks required fields, so it
+        is built without validation.
+        """
+        if fields:
+            return model.model_construct(**source)
+        return model.model_validate(source)
+
     async def get_by_id(
-        self, id: UUID, model: BaseModel, es_index: str
+        self,
+        id: UUID,
+        model: BaseModel,
+        es_index: str,
+        fields: Optional[frozenset[str]] = None,
     ) -> BaseModel | None:
         try:
-            doc = await self.elastic.get(index=es_index, id=id)
+            with timed('es'), ELASTICSEARCH_DURATION.labels('get', es_index).time():
+                doc = await self.elastic.get(
+                    index=es_index,
+                    id=id,
+                    _source_includes=sorted(fields) if fields else None,
+                )
         except NotFoundError:
             return None
-        return model(**doc['_source'])
+        with timed('parse'):
+            return self.to_model(doc['_source'], model, fields)
 
     async def search(
         self,
@@ -57,15 +100,22 @@ class ElasticSearch(Database):
         page_size: int,
         es_index: str,
         model: BaseModel,
+        fields: Optional[frozenset[str]] = None,
     ) -> list[BaseModel]:
         body = {"from": page_number * page_size, "size": page_size}
+        if fields:
+            body["_source"] = sorted(fields)
         query = {
             "query": {
                 "match": {search_field: {"query": search_string, "fuzziness": "auto"}}
             }
         }
-        doc = await self.elastic.search(index=es_index, body=body | query)
-        return [model(**d['_source']) for d in doc['hits']['hits']]
+        with timed('es'), ELASTICSEARCH_DURATION.labels('search', es_index).time():
+            doc = await self.elastic.search(index=es_index, body=body | query)
+        with timed('parse'):
+            return [
+                self.to_model(d['_source'], model, fields) for d in doc['hits']['hits']
+            ]
 
     async def get_list(
         self,
@@ -74,9 +124,57 @@ class ElasticSearch(Database):
         es_index: str,
         model: BaseModel,
         query: dict = None,
+        fields: Optional[frozenset[str]] = None,
     ) -> list[BaseModel]:
         body = {"from": page_number * page_size, "size": page_size}
+        if fields:
+            body["_source"] = sorted(fields)
         if query:
             body = body | query
-        docs = await self.elastic.search(index=es_index, body=body)
-        return [model(**d['_source']) for d in docs['hits']['hits']]
+        with timed('es'), ELASTICSEARCH_DURATION.labels('list', es_index).time():
+            docs = await self.elastic.search(index=es_index, body=body)
+        with timed('parse'):
+            return [
+                self.to_model(d['_source'], model, fields) for d in docs['hits']['hits']
+            ]
+
+    async def export(
+        self,
+        es_index: str,
+        query: dict,
+        fields: frozenset[str],
+        batch_size: int,
+        keep_alive: str = Config.EXPORT_KEEP_ALIVE,
+    ) -> AsyncIterator[list[dict]]:
+        """
+        Iterate over all documents matching the query in batches of raw sources. The index
+        is read through a point in time with search_after, so the result is consistent and
+        deep pages cost the same as the first one.
+        """
+        pit = await self.elastic.open_point_in_time(
+            index=es_index, keep_alive=keep_alive
+        )
+        pit_id = pit['id']
+        search_after = None
+        try:
+            while True:
+                body = {
+                    "size": batch_size,
+                    "query": query,
+                    "_source": sorted(fields),
+                    "pit": {"id": pit_id, "keep_alive": keep_alive},
+                    "sort": [{"_shard_doc": "asc"}],
+                    "track_total_hits": False,
+                }
+                if search_after:
+                    body["search_after"] = search_after
+                with ELASTICSEARCH_DURATION.labels('export', es_index).time():
+                    docs = await self.elastic.search(body=body)
+                hits = docs['hits']['hits']
+                if not hits:
+                    break
+                pit_id = docs.get('pit_id', pit_id)
+                search_after = hits[-1]['sort']
+                yield [hit['_source'] for hit in hits]
+        finally:
+            await self.elastic.close_point_in_time(body={"id": pit_id})
@@ -6,8 +6,13 @@ from fastapi import FastAPI
 from fastapi.responses import ORJSONResponse
 
 from api import router
+from api.metrics import router as metrics_router
+from core.compression import CompressionMiddleware
 from core.config import Config
 from core.custom_logger import CustomLogger
+from core.metrics import MetricsMiddleware
+from core.request_id import RequestIdMiddleware
+from core.timing import ServerTimingMiddleware
 from db.elastic import es_manager
 from db.redis import redis_manager
 
@@ -44,6 +49,25 @@ async def shutdown():
 
 app.include_router(router)
 
+if Config.METRICS_ENABLED:
+    app.include_router(metrics_router)
+    app.add_middleware(MetricsMiddleware)
+
+if Config.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=Config.COMPRESSION_MINIMUM_SIZE,
+        get_redis=redis_manager.get_redis if Config.COMPRESSION_CACHE else None,
+        cache_timeout=Config.REDIS_CACHE_TIMEOUT,
+    )
+
+# Added after compression so its total includes compression.
+if Config.SERVER_TIMING_ENABLED:
+    app.add_middleware(ServerTimingMiddleware)
+
+# Added last so it is the outermost middleware and every record of a request has its id.
+app.add_middleware(RequestIdMiddleware)
+
 
 if __name__ == '__main__':
     uvicorn.run(
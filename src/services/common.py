@@ -1,10 +1,11 @@
-from typing import Optional
+from typing import AsyncIterator, Optional
 from uuid import UUID
 
 from pydantic import BaseModel
 
 from core.config import Config
-from data_services.cache import Cache
+from core.timing import record_cache_lookup
+from data_services.cache import Cache, fields_suffix
 from data_services.database import Database
 from models.schemas import MovieList
 
@@ -25,16 +26,45 @@ class MovieCommonService:
         model: BaseModel,
         es_index: str,
         cache_timeout: int = Config.REDIS_CACHE_TIMEOUT,
+        fields: Optional[frozenset[str]] = None,
     ) -> BaseModel | None:
         """
-        Retrieve a movie detail by its unique id from the database and cache.
+        Retrieve a movie detail by its unique id from the database and cache. With fields only
+        that sparse fieldset of the document is read and cached.
         """
-        data = await self.cache.get_by_id(id=id, model=model)
+        data = await self.cache.get_by_id(id=id, model=model, fields=fields)
+        record_cache_lookup(hit=bool(data))
         if not data:
-            data = await self.database.get_by_id(id=id, model=model, es_index=es_index)
-            await self.cache.put_by_id(id=id, model=data, cache_timeout=cache_timeout)
+            data = await self.database.get_by_id(
+                id=id, model=model, es_index=es_index, fields=fields
+            )
+            await self.cache.put_by_id(
+                id=id, model=data, cache_timeout=cache_timeout, fields=fields
+            )
         return data
 
+    async def get_etag_by_id(
+        self, id: UUID, fields: Optional[frozenset[str]] = None
+    ) -> tuple[str | None, int | None]:
+        """
+        Retrieve the ETag of a cached document by its unique id without reading the document,
+        together with the number of seconds the document stays cached.
+        """
+        return await self.cache.get_etag(id=id, fields=fields)
+
+    def export(
+        self,
+        es_index: str,
+        query: dict,
+        fields: frozenset[str],
+        batch_size: int = Config.EXPORT_BATCH_SIZE,
+    ) -> AsyncIterator[list[dict]]:
+        """
+        Iterate over all documents matching the query in batches of raw sources, bypassing
+        the cache.
+        """
+        return self.database.export(es_index, query, fields, batch_size)
+
     async def get_by_search(
         self,
         search_string: str,
@@ -44,15 +74,24 @@ class MovieCommonService:
         es_index: str,
         cache_timeout: int,
         model: BaseModel,
+        fields: Optional[frozenset[str]] = None,
     ) -> list[BaseModel]:
         """
         Retrieve a list of movies by search from the database and cache.
         """
         key = f'{es_index}:{search_string}:{search_field}:{page_number}:{page_size}'
-        data = await self.cache.get_list(key=key, model=model)
+        key += fields_suffix(fields)
+        data = await self.cache.get_list(key=key, model=model, fields=fields)
+        record_cache_lookup(hit=bool(data))
         if not data:
             data = await self.database.search(
-                search_string, search_field, page_number, page_size, es_index, model
+                search_string,
+                search_field,
+                page_number,
+                page_size,
+                es_index,
+                model,
+                fields,
             )
             await self.cache.put_list(
                 key=key, data_list=data, cache_timeout=cache_timeout
@@ -66,15 +105,17 @@ class MovieCommonService:
         cache_timeout: int,
         es_index: str,
         model: BaseModel,
+        fields: Optional[frozenset[str]] = None,
     ) -> list[BaseModel] | None:
         """
         Retrieve a list of movies from the database and cache.
         """
-        key = f'{es_index}:{page_number}:{page_size}'
-        data_list = await self.cache.get_list(key=key, model=model)
+        key = f'{es_index}:{page_number}:{page_size}{fields_suffix(fields)}'
+        data_list = await self.cache.get_list(key=key, model=model, fields=fields)
+        record_cache_lookup(hit=bool(data_list))
         if not data_list:
             data_list = await self.database.get_list(
-                page_number, page_size, es_index, model
+                page_number, page_size, es_index, model, fields=fields
             )
             await self.cache.put_list(
                 key=key, data_list=data_list, cache_timeout=cache_timeout
@@ -91,6 +132,7 @@ class MovieCommonService:
         es_index: str,
         cache_timeout: int,
         model: BaseModel,
+        fields: Optional[frozenset[str]] = None,
     ) -> list[BaseModel]:
         """
         Retrieve a list of movies sorted by a specific field from the database and cache.
@@ -106,10 +148,12 @@ class MovieCommonService:
         key = (
             f'{es_index}:{sort_field}:{sort_type}:{genre_id}:{page_number}:{page_size}'
         )
-        data_list = await self.cache.get_list(key=key, model=model)
+        key += fields_suffix(fields)
+        data_list = await self.cache.get_list(key=key, model=model, fields=fields)
+        record_cache_lookup(hit=bool(data_list))
         if not data_list:
             data_list = await self.database.get_list(
-                page_number, page_size, es_index, model, query
+                page_number, page_size, es_index, model, query, fields
             )
             await self.cache.put_list(
                 key=key, data_list=data_list, cache_timeout=cache_timeout
@@ -117,16 +161,22 @@ class MovieCommonService:
         return data_list
 
     async def get_similar_list(
-        self, movie_id: UUID, es_index: str, model: BaseModel, cache_timeout: int
+        self,
+        movie_id: UUID,
+        es_index: str,
+        model: BaseModel,
+        cache_timeout: int,
+        fields: Optional[frozenset[str]] = None,
     ) -> Optional[list[MovieList]]:
         """
         Retrieve a list of similar movies by genres from the database and cache.
         """
-        key = f'similar:{movie_id}:{es_index}'
-        data_list = await self.cache.get_list(key=key, model=model)
+        key = f'similar:{movie_id}:{es_index}{fields_suffix(fields)}'
+        data_list = await self.cache.get_list(key=key, model=model, fields=fields)
+        record_cache_lookup(hit=bool(data_list))
         if not data_list:
             data_list = await self._fetch_similar_movies_by_genres(
-                movie_id, es_index, model, cache_timeout
+                movie_id, es_index, model, cache_timeout, fields
             )
             await self.cache.put_list(
                 key=key, data_list=data_list, cache_timeout=cache_timeout
@@ -134,7 +184,12 @@ class MovieCommonService:
         return data_list
 
     async def _fetch_similar_movies_by_genres(
-        self, movie_id: UUID, es_index: str, model: BaseModel, cache_timeout: int
+        self,
+        movie_id: UUID,
+        es_index: str,
+        model: BaseModel,
+        cache_timeout: int,
+        fields: Optional[frozenset[str]] = None,
     ) -> Optional[list[MovieList]]:
         """
         Retrieve a list of similar movies by genres from the database.
@@ -153,19 +208,26 @@ class MovieCommonService:
                 es_index=es_index,
                 model=model,
                 cache_timeout=cache_timeout,
+                fields=fields,
             )
             if similar_movies:
                 data.extend(similar_movies or [])
         return data
 
     async def get_list_of_popular_movies_by_genre(
-        self, genre_id: UUID, es_index: str, model: BaseModel, cache_timeout: int
+        self,
+        genre_id: UUID,
+        es_index: str,
+        model: BaseModel,
+        cache_timeout: int,
+        fields: Optional[frozenset[str]] = None,
     ) -> list[BaseModel]:
         """
         Retrieve a list of popular movies by genre from the database and cache.
         """
-        key = f'popular_genre:{genre_id}:{es_index}'
-        data_list = await self.cache.get_list(key=key, model=model)
+        key = f'popular_genre:{genre_id}:{es_index}{fields_suffix(fields)}'
+        data_list = await self.cache.get_list(key=key, model=model, fields=fields)
+        record_cache_lookup(hit=bool(data_list))
         if not data_list:
             data_list = await self.get_sorted_list(
                 sort_field='imdb_rating',
@@ -176,6 +238,7 @@ class MovieCommonService:
                 es_index=es_index,
                 model=model,
                 cache_timeout=cache_timeout,
+                fields=fields,
             )
             await self.cache.put_list(
                 key=key, data_list=data_list, cache_timeout=cache_timeout
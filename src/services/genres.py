@@ -28,7 +28,11 @@ class GenreService(MovieCommonService):
         self.es_index = 'genres'
         self.model = GenreDetail
 
-    async def get_genre_by_id(self, genre_id: UUID) -> Optional[GenreDetail]:
+    async def get_genre_by_id(
+        self,
+        genre_id: UUID,
+        fields: Optional[frozenset[str]] = None,
+    ) -> Optional[GenreDetail]:
         """
         Retrieve a genre detail by its unique id from the database and cache.
         """
@@ -37,10 +41,15 @@ class GenreService(MovieCommonService):
             model=self.model,
             es_index=self.es_index,
             cache_timeout=Config.REDIS_CACHE_TIMEOUT,
+            fields=fields,
         )
 
     async def get_genres_by_search(
-        self, search_string: str, page_number: int, page_size: int
+        self,
+        search_string: str,
+        page_number: int,
+        page_size: int,
+        fields: Optional[frozenset[str]] = None,
     ) -> list[BaseModel]:
         """
         Retrieve a list of genres by search from the database and cache.
@@ -53,10 +62,14 @@ class GenreService(MovieCommonService):
             es_index=self.es_index,
             model=self.model,
             cache_timeout=Config.REDIS_CACHE_TIMEOUT,
+            fields=fields,
         )
 
     async def get_genres_list(
-        self, page_number: int, page_size: int
+        self,
+        page_number: int,
+        page_size: int,
+        fields: Optional[frozenset[str]] = None,
     ) -> Optional[list[GenreDetail]]:
         """
         Retrieve a list of genres from the database and cache.
@@ -67,6 +80,7 @@ class GenreService(MovieCommonService):
             es_index=self.es_index,
             model=self.model,
             cache_timeout=Config.REDIS_CACHE_TIMEOUT,
+            fields=fields,
         )
 
 
@@ -1,5 +1,6 @@
+from datetime import datetime
 from functools import lru_cache
-from typing import Optional
+from typing import AsyncIterator, Optional
 from uuid import UUID
 
 from aioredis import Redis
@@ -15,6 +16,8 @@ from db.redis import redis_manager
 from models.schemas import MovieDetail
 from services.common import MovieCommonService
 
+EXPORT_FIELDS = frozenset(MovieDetail.model_fields) | {'updated_at'}
+
 
 class MovieService(MovieCommonService):
     """
@@ -28,7 +31,11 @@ class MovieService(MovieCommonService):
         self.es_index = 'movies'
         self.model = MovieDetail
 
-    async def get_movie_by_id(self, movie_id: UUID) -> Optional[MovieDetail]:
+    async def get_movie_by_id(
+        self,
+        movie_id: UUID,
+        fields: Optional[frozenset[str]] = None,
+    ) -> Optional[MovieDetail]:
         """
         Retrieve a movie detail by its unique id from the database and cache.
         """
@@ -37,10 +44,31 @@ class MovieService(MovieCommonService):
             model=self.model,
             es_index=self.es_index,
             cache_timeout=Config.REDIS_CACHE_TIMEOUT,
+            fields=fields,
+        )
+
+    def export_movies(
+        self,
+        updated_since: Optional[datetime] = None,
+        fields: Optional[frozenset[str]] = None,
+    ) -> AsyncIterator[list[dict]]:
+        """
+        Iterate over all movies, or those updated since the given time, in batches of
+        documents with the given fields (all fields of MovieDetail and updated_at by default).
+        """
+        query = {"match_all": {}}
+        if updated_since:
+            query = {"range": {"updated_at": {"gte": updated_since.isoformat()}}}
+        return self.export(
+            es_index=self.es_index, query=query, fields=fields or EXPORT_FIELDS
         )
 
     async def get_movies_by_search(
-        self, search_string: str, page_number: int, page_size: int
+        self,
+        search_string: str,
+        page_number: int,
+        page_size: int,
+        fields: Optional[frozenset[str]] = None,
     ) -> list[BaseModel]:
         """
         Retrieve a list of movies by search from the database and cache.
@@ -53,6 +81,7 @@ class MovieService(MovieCommonService):
             es_index=self.es_index,
             model=self.model,
             cache_timeout=Config.REDIS_CACHE_TIMEOUT,
+            fields=fields,
         )
 
     async def get_sorted_movies(
@@ -62,6 +91,7 @@ class MovieService(MovieCommonService):
         sort_field: str,
         sort_type: str,
         genre_id: UUID,
+        fields: Optional[frozenset[str]] = None,
     ) -> list[BaseModel] | None:
         """
         Retrieve a list of sorted movies from the database and cache.
@@ -75,11 +105,13 @@ class MovieService(MovieCommonService):
             es_index=self.es_index,
             model=self.model,
             cache_timeout=Config.REDIS_CACHE_TIMEOUT,
+            fields=fields,
         )
 
     async def get_similar_movies(
         self,
         movie_id: UUID,
+        fields: Optional[frozenset[str]] = None,
     ) -> Optional[list[MovieDetail]]:
         """
         Retrieve a list of similar movies from the database and cache.
@@ -89,9 +121,14 @@ class MovieService(MovieCommonService):
             es_index=self.es_index,
             model=self.model,
             cache_timeout=Config.REDIS_CACHE_TIMEOUT,
+            fields=fields,
         )
 
-    async def get_popular_movies_by_genre(self, genre_id: UUID) -> list[BaseModel]:
+    async def get_popular_movies_by_genre(
+        self,
+        genre_id: UUID,
+        fields: Optional[frozenset[str]] = None,
+    ) -> list[BaseModel]:
         """
         Retrieve a list of popular movies by genre from the database and cache.
         """
@@ -100,6 +137,7 @@ class MovieService(MovieCommonService):
             es_index=self.es_index,
             model=self.model,
             cache_timeout=Config.REDIS_CACHE_TIMEOUT,
+            fields=fields,
         )
 
 
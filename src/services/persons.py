@@ -28,7 +28,11 @@ class PersonService(MovieCommonService):
         self.es_index = 'persons'
         self.model = PersonDetail
 
-    async def get_person_by_id(self, person_id: UUID) -> Optional[PersonDetail]:
+    async def get_person_by_id(
+        self,
+        person_id: UUID,
+        fields: Optional[frozenset[str]] = None,
+    ) -> Optional[PersonDetail]:
         """
         Retrieve a person detail by its unique id from the database and cache.
         """
@@ -37,10 +41,15 @@ class PersonService(MovieCommonService):
             model=self.model,
             es_index=self.es_index,
             cache_timeout=Config.REDIS_CACHE_TIMEOUT,
+            fields=fields,
         )
 
     async def get_persons_by_search(
-        self, search_string: str, page_number: int, page_size: int
+        self,
+        search_string: str,
+        page_number: int,
+        page_size: int,
+        fields: Optional[frozenset[str]] = None,
     ) -> list[BaseModel]:
         """
         Retrieve a list of persons by search from the database and cache.
@@ -53,10 +62,14 @@ class PersonService(MovieCommonService):
             es_index=self.es_index,
             model=self.model,
             cache_timeout=Config.REDIS_CACHE_TIMEOUT,
+            fields=fields,
         )
 
     async def get_persons_list(
-        self, page_number: int, page_size: int
+        self,
+        page_number: int,
+        page_size: int,
+        fields: Optional[frozenset[str]] = None,
     ) -> Optional[list[PersonDetail]]:
         """
         Retrieve a list of persons from the database and cache.
@@ -67,6 +80,7 @@ class PersonService(MovieCommonService):
             es_index=self.es_index,
             model=self.model,
             cache_timeout=Config.REDIS_CACHE_TIMEOUT,
+            fields=fields,
         )
 
 
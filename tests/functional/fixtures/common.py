@@ -1,4 +1,6 @@
 import asyncio
+import json
+from http import HTTPStatus
 
 import aiohttp
 import aioredis
@@ -44,20 +46,54 @@ async def session():
     await session.close()
 
 
+async def read_body(response: aiohttp.ClientResponse):
+    if response.status == HTTPStatus.NOT_MODIFIED:
+        return None
+    if response.content_type == 'application/x-ndjson':
+        return [json.loads(line) for line in (await response.text()).splitlines()]
+    if response.content_type == 'text/plain':
+        return await response.text()
+    return await response.json()
+
+
+async def get(
+    session: aiohttp.ClientSession, url: str, params: dict = None, headers: dict = None
+) -> HTTPResponse:
+    async with session.get(url, params=params or {}, headers=headers) as response:
+        return HTTPResponse(
+            body=await read_body(response),
+            headers=response.headers,
+            status=response.status,
+        )
+
+
 @pytest.fixture(scope='session')
 def make_get_request(session):
-    async def inner(method: str, params: dict = None) -> HTTPResponse:
-        params = params or {}
+    async def inner(
+        method: str, params: dict = None, headers: dict = None
+    ) -> HTTPResponse:
         url = 'http://{host}:{port}/api/v1/{method}'.format(
             host=test_settings.SERVICE_HOST,
             port=test_settings.SERVICE_PORT,
             method=method,
         )
-        async with session.get(url, params=params) as response:
-            return HTTPResponse(
-                body=await response.json(),
-                headers=response.headers,
-                status=response.status,
-            )
+        return await get(session, url, params, headers)
+
+    return inner
+
+
+@pytest.fixture(scope='session')
+def make_api_request(session):
+    """Send a request to the API directly, bypassing nginx."""
+
+    async def inner(
+        path: str, params: dict = None, headers: dict = None
+    ) -> HTTPResponse:
+        url = 'http://{host}:{port}/{path}'.format(
+            host=test_settings.API_HOST,
+            port=test_settings.API_PORT,
+            path=path,
+        )
+        return await get(session, url, params, headers)
 
     return inner
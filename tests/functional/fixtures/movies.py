@@ -1,13 +1,21 @@
+from http import HTTPStatus
+
 import pytest
 
 from tests.functional.utils.helpers import extract_payload
 from tests.functional.utils.schemas import MovieDetail
 
+# The export filters on updated_at, which must be mapped as a date. The index is usually
+# created by the ETL already; otherwise it is created here and mapped dynamically.
+UPDATED_AT_MAPPING = {'properties': {'updated_at': {'type': 'date'}}}
+
 
 @pytest.fixture(scope='session')
 async def load_testing_movies_data(es_client):
     index = 'movies'
     payload = await extract_payload(f'{index}.json', MovieDetail, index)
+    await es_client.indices.create(index=index, ignore=HTTPStatus.BAD_REQUEST)
+    await es_client.indices.put_mapping(index=index, body=UPDATED_AT_MAPPING)
     await es_client.bulk(body=payload[0], index=index, refresh=True)
     yield
     await es_client.bulk(body=payload[1], index=index, refresh=True)
@@ -19,6 +19,11 @@ class TestSettings(BaseSettings):
     SERVICE_HOST: str = Field('localhost', env='NGINX_HOST')
     SERVICE_PORT: int = Field(80, env='NGINX_PORT')
 
+    # The API itself, for what nginx changes or doesn't expose: compression and metrics.
+    API_HOST: str = Field('localhost', env='FASTAPI_HOST')
+    API_PORT: int = Field(8000, env='FASTAPI_PORT')
+    COMPRESSION_MINIMUM_SIZE: int = Field(1024, env='COMPRESSION_MINIMUM_SIZE')
+
     MAX_RETRIES: int = Field(5, env='MAX_RETRIES')
 
     class Config:
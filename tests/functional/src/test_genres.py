@@ -74,7 +74,7 @@ async def test_genres_list_negative_page_number(make_get_request):
     response_body = response.body.get('detail')[0].get('msg')
 
     assert response.status == HTTPStatus.UNPROCESSABLE_ENTITY
-    assert response_body == 'ensure this value is greater than or equal to 0'
+    assert response_body == 'Input should be greater than or equal to 0'
 
 
 async def test_genres_list_negative_page_size(make_get_request):
@@ -84,7 +84,7 @@ async def test_genres_list_negative_page_size(make_get_request):
     response_body = response.body.get('detail')[0].get('msg')
 
     assert response.status == HTTPStatus.UNPROCESSABLE_ENTITY
-    assert response_body == 'ensure this value is greater than 0'
+    assert response_body == 'Input should be greater than 0'
 
 
 async def test_genres_search_no_results(make_get_request, redis_client):
@@ -1,8 +1,16 @@
+from datetime import date, datetime
 from http import HTTPStatus
 
+import aiohttp
+import pytest
+
+from tests.functional.settings import test_settings
 from tests.functional.utils.helpers import (
     extract_movie,
     extract_movies,
+    get_max_age,
+    get_metric,
+    get_server_timing,
 )
 
 pytest_plugins = "tests.functional.fixtures.movies"
@@ -154,7 +162,7 @@ async def test_movies_list_negative_page_number(make_get_request):
     response_body = response.body.get('detail')[0].get('msg')
 
     assert response.status == HTTPStatus.UNPROCESSABLE_ENTITY
-    assert response_body == 'ensure this value is greater than or equal to 0'
+    assert response_body == 'Input should be greater than or equal to 0'
 
 
 async def test_movies_list_negative_page_size(make_get_request):
@@ -164,7 +172,7 @@ async def test_movies_list_negative_page_size(make_get_request):
     response_body = response.body.get('detail')[0].get('msg')
 
     assert response.status == HTTPStatus.UNPROCESSABLE_ENTITY
-    assert response_body == 'ensure this value is greater than 0'
+    assert response_body == 'Input should be greater than 0'
 
 
 async def test_movies_search_no_results(make_get_request, redis_client):
@@ -217,3 +225,222 @@ async def test_es_uploading(make_get_request, redis_client):
     assert str(movie.id) == "2a090dde-f688-46fe-a9f4-b781a9852756"
     assert movie.title == "Blindeer"
     assert cache
+
+
+async def test_movie_details_not_modified(make_get_request, load_testing_movies_data):
+    movie_id = '2a090dde-f688-46fe-a9f4-b781a9852756'
+    response = await make_get_request(f'movies/{movie_id}')
+    etag = response.headers.get('ETag')
+
+    not_modified = await make_get_request(
+        f'movies/{movie_id}', headers={'If-None-Match': etag}
+    )
+    modified = await make_get_request(
+        f'movies/{movie_id}', headers={'If-None-Match': '"outdated"'}
+    )
+
+    assert response.status == HTTPStatus.OK
+    assert etag
+    # The document stays fresh for as long as it stays cached, at most the cache timeout.
+    assert 0 < get_max_age(response) <= 600
+    assert get_max_age(not_modified) <= get_max_age(response)
+    assert not_modified.status == HTTPStatus.NOT_MODIFIED
+    assert not_modified.headers.get('ETag')
+    assert not not_modified.body
+    assert modified.status == HTTPStatus.OK
+
+
+async def test_movie_details_sparse_fields(
+    make_get_request, redis_client, load_testing_movies_data
+):
+    movie_id = '2a090dde-f688-46fe-a9f4-b781a9852756'
+    response = await make_get_request(
+        f'movies/{movie_id}', params={'fields': 'title,imdb_rating'}
+    )
+    cache = await redis_client.get(f'{movie_id}:fields=id,imdb_rating,title')
+
+    assert response.status == HTTPStatus.OK
+    assert set(response.body) == {'id', 'title', 'imdb_rating'}
+    assert cache
+
+
+async def test_movies_list_unknown_fields(make_get_request):
+    response = await make_get_request('movies', params={'fields': 'title,actors'})
+
+    assert response.status == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert response.body == {'detail': 'Unknown fields: actors'}
+
+
+async def test_movies_export(make_get_request, load_testing_movies_data):
+    response = await make_get_request('movies/export')
+    movies = await extract_movies(response)
+
+    assert response.status == HTTPStatus.OK
+    assert response.headers.get('Content-Type') == 'application/x-ndjson'
+    assert len(movies) > 0
+    assert len({movie.id for movie in movies}) == len(movies)
+
+
+async def test_movies_export_updated_since(make_get_request, load_testing_movies_data):
+    updated = await make_get_request(
+        'movies/export', params={'updated_since': '2023-02-01T00:00:00'}
+    )
+    not_updated = await make_get_request(
+        'movies/export', params={'updated_since': '2100-01-01T00:00:00'}
+    )
+
+    exported_ids = {movie['id'] for movie in updated.body}
+
+    assert updated.status == HTTPStatus.OK
+    assert '2a090dde-f688-46fe-a9f4-b781a9852757' in exported_ids
+    assert '2a090dde-f688-46fe-a9f4-b781a9852756' not in exported_ids
+    assert all(
+        datetime.fromisoformat(movie['updated_at']).date() >= date(2023, 2, 1)
+        for movie in updated.body
+    )
+    assert not_updated.status == HTTPStatus.OK
+    assert not_updated.body == []
+
+
+async def test_movie_details_compressed(make_api_request, load_testing_movies_data):
+    movie_id = '2a090dde-f688-46fe-a9f4-b781a9852756'
+    threshold = test_settings.COMPRESSION_MINIMUM_SIZE
+    plain = await make_api_request(
+        f'api/v1/movies/{movie_id}', headers={'Accept-Encoding': 'identity'}
+    )
+    compressed = await make_api_request(
+        f'api/v1/movies/{movie_id}', headers={'Accept-Encoding': 'gzip'}
+    )
+    etag = compressed.headers.get('ETag')
+    not_modified = await make_api_request(
+        f'api/v1/movies/{movie_id}',
+        headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag},
+    )
+
+    assert plain.status == HTTPStatus.OK
+    assert 'Content-Encoding' not in plain.headers
+    assert int(plain.headers['Content-Length']) >= threshold
+    assert compressed.status == HTTPStatus.OK
+    assert compressed.headers.get('Content-Encoding') == 'gzip'
+    assert 'Accept-Encoding' in compressed.headers.get('Vary', '')
+    assert compressed.body == plain.body
+    # The compressed body is another representation of the document, so its ETag is weak.
+    assert etag == f'W/{plain.headers["ETag"]}'
+    # A 304 carries the validator the compressed 200 would have had.
+    assert not_modified.status == HTTPStatus.NOT_MODIFIED
+    assert not_modified.headers.get('ETag') == etag
+    assert 'Accept-Encoding' in not_modified.headers.get('Vary', '')
+
+
+async def test_movie_details_below_compression_threshold(
+    make_api_request, load_testing_movies_data
+):
+    movie_id = '2a090dde-f688-46fe-a9f4-b781a9852756'
+    threshold = test_settings.COMPRESSION_MINIMUM_SIZE
+    response = await make_api_request(
+        f'api/v1/movies/{movie_id}',
+        params={'fields': 'title'},
+        headers={'Accept-Encoding': 'gzip'},
+    )
+
+    assert response.status == HTTPStatus.OK
+    assert 'Content-Encoding' not in response.headers
+    assert int(response.headers['Content-Length']) < threshold
+    # Bigger versions of the document are compressed, so its ETag is weak all the same.
+    assert response.headers['ETag'].startswith('W/"')
+    assert 'Accept-Encoding' in response.headers.get('Vary', '')
+
+
+@pytest.mark.parametrize('encoding', ['zstd', 'br'])
+async def test_movie_details_compressed_with_the_preferred_encoding(
+    encoding, load_testing_movies_data
+):
+    movie_id = '2a090dde-f688-46fe-a9f4-b781a9852756'
+    url = 'http://{host}:{port}/api/v1/movies/{movie_id}'.format(
+        host=test_settings.API_HOST, port=test_settings.API_PORT, movie_id=movie_id
+    )
+    # The body is left compressed, the client may not be able to decode it.
+    async with aiohttp.ClientSession(auto_decompress=False) as session:
+        async with session.get(
+            url, headers={'Accept-Encoding': f'gzip;q=0.5, {encoding}'}
+        ) as response:
+            status = response.status
+            headers = response.headers
+
+    assert status == HTTPStatus.OK
+    assert headers.get('Content-Encoding') == encoding
+    assert headers.get('ETag', '').startswith('W/"')
+
+
+async def test_movie_details_server_timing(
+    make_get_request, redis_client, load_testing_movies_data
+):
+    movie_id = '2a090dde-f688-46fe-a9f4-b781a9852757'
+    await redis_client.delete(movie_id, f'etag:{movie_id}')
+
+    miss = await make_get_request(f'movies/{movie_id}')
+    hit = await make_get_request(f'movies/{movie_id}')
+    miss_timing = get_server_timing(miss)
+    hit_timing = get_server_timing(hit)
+
+    assert miss.status == HTTPStatus.OK
+    assert miss_timing['cache'] == 'desc=miss'
+    assert miss_timing['es'].startswith('dur=')
+    assert miss_timing['total'].startswith('dur=')
+    assert hit.status == HTTPStatus.OK
+    assert hit_timing['cache'] == 'desc=hit'
+    assert 'es' not in hit_timing
+
+
+async def test_metrics(make_api_request, redis_client, load_testing_movies_data):
+    movie_id = '2a090dde-f688-46fe-a9f4-b781a9852756'
+    await redis_client.delete(movie_id, f'etag:{movie_id}')
+    await make_api_request(f'api/v1/movies/{movie_id}')
+
+    # nginx doesn't expose the metrics, so they are read from the API directly.
+    response = await make_api_request('metrics')
+    metrics = response.body
+
+    assert response.status == HTTPStatus.OK
+    assert (
+        'api_request_duration_seconds_count{method="GET",'
+        'route="/api/v1/movies/{movie_id}",status="200"}' in metrics
+    )
+    assert 'api_cache_requests_total{family="id",result="miss"}' in metrics
+    assert (
+        'api_elasticsearch_duration_seconds_count{index="movies",operation="get"}'
+        in metrics
+    )
+    # Requests are labelled with their route template, never with the requested path.
+    assert movie_id not in metrics
+
+
+async def test_request_id(make_api_request, load_testing_movies_data):
+    movie_id = '2a090dde-f688-46fe-a9f4-b781a9852756'
+    # nginx replaces the X-Request-ID of the client with its own, so the API is called directly.
+    echoed = await make_api_request(
+        f'api/v1/movies/{movie_id}', headers={'X-Request-ID': 'functional-test'}
+    )
+    generated = await make_api_request(f'api/v1/movies/{movie_id}')
+    generated_again = await make_api_request(f'api/v1/movies/{movie_id}')
+
+    assert echoed.status == HTTPStatus.OK
+    assert echoed.headers.get('X-Request-ID') == 'functional-test'
+    assert generated.status == HTTPStatus.OK
+    assert generated.headers.get('X-Request-ID')
+    assert generated.headers['X-Request-ID'] != generated_again.headers['X-Request-ID']
+
+
+async def test_metrics_count_cached_empty_pages_as_misses(make_api_request):
+    params = {'page_number': 499, 'page_size': 20}
+    hits = 'api_cache_requests_total{family="movies",result="hit"}'
+    first = await make_api_request('api/v1/movies', params=params)
+    hits_before = get_metric((await make_api_request('metrics')).body, hits)
+    second = await make_api_request('api/v1/movies', params=params)
+    hits_after = get_metric((await make_api_request('metrics')).body, hits)
+
+    # An empty page is cached, but read from Elasticsearch again, like a missing one.
+    assert first.status == HTTPStatus.NOT_FOUND
+    assert second.status == HTTPStatus.NOT_FOUND
+    assert get_server_timing(second)['cache'] == 'desc=miss'
+    assert hits_after == hits_before
@@ -1,4 +1,5 @@
 import json
+from datetime import datetime
 from uuid import UUID
 
 from pydantic import BaseModel
@@ -37,11 +38,34 @@ async def extract_genre(response: HTTPResponse) -> GenreDetail:
     return GenreDetail.parse_obj(response.body)
 
 
+def get_max_age(response: HTTPResponse) -> int:
+    return int(response.headers['Cache-Control'].removeprefix('max-age='))
+
+
+def get_server_timing(response: HTTPResponse) -> dict[str, str]:
+    """Map the metric names of the Server-Timing header to their parameters."""
+    metrics = (
+        metric.partition(';') for metric in response.headers['Server-Timing'].split(',')
+    )
+    return {name.strip(): params for name, _, params in metrics}
+
+
+def get_metric(metrics: str, series: str) -> float:
+    """Read the value of a series from metrics in the Prometheus text format."""
+    for line in metrics.splitlines():
+        name, _, value = line.rpartition(' ')
+        if name == series:
+            return float(value)
+    return 0.0
+
+
 class UUIDEncoder(json.JSONEncoder):
     def default(self, obj):
         if isinstance(obj, UUID):
             # if the obj is uuid, we simply return the value of uuid
             return str(obj)
+        if isinstance(obj, datetime):
+            return obj.isoformat()
         return json.JSONEncoder.default(self, obj)
 
 
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
@@ -147,6 +148,11 @@ class MovieDetail(MovieList):
         ],
         default=[],
     )
+    updated_at: Optional[datetime] = Field(
+        title='Last update',
+        example='2023-03-15T12:00:00+00:00',
+        default=None,
+    )
 
 
 @dataclass